@@ -3,15 +3,55 @@ Alternative AI generators for vocabulary data
 Use these if OpenAI is not available or preferred
 """
 
-import requests
 import json
-from typing import Dict
+from typing import Dict, Optional
 
-class GeminiGenerator:
+try:
+    from ai_tools.pipeline import RateLimiter, ThroughputStats, estimate_tokens, post_json
+    from ai_tools.response_cache import ResponseCache
+except ImportError:
+    from pipeline import RateLimiter, ThroughputStats, estimate_tokens, post_json
+    from response_cache import ResponseCache
+
+class BaseGenerator:
+    """Shared rate limiting, retries and response caching for the HTTP generators"""
+    provider = ""
+    max_tokens = 500
+
+    def __init__(self, base_url: str, limiter: Optional[RateLimiter] = None,
+                 stats: Optional[ThroughputStats] = None, max_retries: int = 5,
+                 cache: Optional[ResponseCache] = None):
+        self.base_url = base_url
+        self.limiter = limiter or RateLimiter()
+        self.stats = stats or ThroughputStats()
+        self.max_retries = max_retries
+        self.cache = cache
+
+    def _cached(self, model: str, prompt: str, word: str, fetch) -> Dict:
+        if self.cache:
+            return self.cache.get_or_fetch(self.provider, model, prompt, word, fetch)
+        return fetch()
+
+    def _post(self, url: str, payload: Dict, prompt: str, headers: Optional[Dict] = None) -> Dict:
+        return post_json(
+            url, payload, headers=headers, limiter=self.limiter,
+            estimated_tokens=estimate_tokens(prompt, self.max_tokens),
+            stats=self.stats, max_retries=self.max_retries,
+        )
+
+    def _extract_json(self, content: str) -> Dict:
+        start = content.find('{')
+        end = content.rfind('}') + 1
+        return json.loads(content[start:end])
+
+class GeminiGenerator(BaseGenerator):
     """Google Gemini API generator"""
-    def __init__(self, api_key: str):
+    provider = "gemini"
+    model = "gemini-pro"
+
+    def __init__(self, api_key: str, base_url: str = "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent", **kwargs):
+        super().__init__(base_url, **kwargs)
         self.api_key = api_key
-        self.base_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent"
     
     def generate_word_data(self, word: str) -> Dict:
         prompt = f"Generate vocabulary data for '{word}' in JSON format with fields: word, word_type, difficulty_level, meaning_english, meaning_urdu, example_sentence, synonyms, antonyms, pronunciation"
@@ -20,29 +60,27 @@ class GeminiGenerator:
             "contents": [{"parts": [{"text": prompt}]}]
         }
         
-        try:
-            response = requests.post(
+        def fetch():
+            response = self._post(
                 f"{self.base_url}?key={self.api_key}",
-                json=payload,
+                payload,
+                prompt,
                 headers={"Content-Type": "application/json"}
             )
-            
-            if response.status_code == 200:
-                content = response.json()["candidates"][0]["content"]["parts"][0]["text"]
-                # Extract JSON from response
-                start = content.find('{')
-                end = content.rfind('}') + 1
-                return json.loads(content[start:end])
-        except:
-            pass
+            content = response["candidates"][0]["content"]["parts"][0]["text"]
+            return self._extract_json(content)
         
-        return self._fallback_data(word)
+        # Errors propagate, so run_concurrently counts the word as failed instead of saving placeholder data
+        return self._cached(self.model, prompt, word, fetch)
 
-class ClaudeGenerator:
+class ClaudeGenerator(BaseGenerator):
     """Anthropic Claude API generator"""
-    def __init__(self, api_key: str):
+    provider = "claude"
+    model = "claude-3-sonnet-20240229"
+
+    def __init__(self, api_key: str, base_url: str = "https://api.anthropic.com/v1/messages", **kwargs):
+        super().__init__(base_url, **kwargs)
         self.api_key = api_key
-        self.base_url = "https://api.anthropic.com/v1/messages"
     
     def generate_word_data(self, word: str) -> Dict:
         prompt = f"Generate vocabulary data for '{word}' in JSON format with fields: word, word_type, difficulty_level, meaning_english, meaning_urdu, example_sentence, synonyms, antonyms, pronunciation"
@@ -54,28 +92,25 @@ class ClaudeGenerator:
         }
         
         payload = {
-            "model": "claude-3-sonnet-20240229",
-            "max_tokens": 500,
+            "model": self.model,
+            "max_tokens": self.max_tokens,
             "messages": [{"role": "user", "content": prompt}]
         }
         
-        try:
-            response = requests.post(self.base_url, json=payload, headers=headers)
-            if response.status_code == 200:
-                content = response.json()["content"][0]["text"]
-                start = content.find('{')
-                end = content.rfind('}') + 1
-                return json.loads(content[start:end])
-        except:
-            pass
+        def fetch():
+            response = self._post(self.base_url, payload, prompt, headers=headers)
+            return self._extract_json(response["content"][0]["text"])
         
-        return self._fallback_data(word)
+        # Errors propagate, so run_concurrently counts the word as failed instead of saving placeholder data
+        return self._cached(self.model, prompt, word, fetch)
 
-class OllamaGenerator:
+class OllamaGenerator(BaseGenerator):
     """Local Ollama generator"""
-    def __init__(self, model: str = "llama2"):
+    provider = "ollama"
+
+    def __init__(self, model: str = "llama2", base_url: str = "http://localhost:11434/api/generate", **kwargs):
+        super().__init__(base_url, **kwargs)
         self.model = model
-        self.base_url = "http://localhost:11434/api/generate"
     
     def generate_word_data(self, word: str) -> Dict:
         prompt = f"Generate vocabulary data for '{word}' in JSON format with fields: word, word_type, difficulty_level, meaning_english, meaning_urdu, example_sentence, synonyms, antonyms, pronunciation"
@@ -86,27 +121,9 @@ class OllamaGenerator:
             "stream": False
         }
         
-        try:
-            response = requests.post(self.base_url, json=payload)
-            if response.status_code == 200:
-                content = response.json()["response"]
-                start = content.find('{')
-                end = content.rfind('}') + 1
-                return json.loads(content[start:end])
-        except:
-            pass
+        def fetch():
+            response = self._post(self.base_url, payload, prompt)
+            return self._extract_json(response["response"])
         
-        return self._fallback_data(word)
-    
-    def _fallback_data(self, word: str) -> Dict:
-        return {
-            "word": word,
-            "word_type": "noun",
-            "difficulty_level": "intermediate",
-            "meaning_english": f"Definition for {word}",
-            "meaning_urdu": f"{word} کا معنی",
-            "example_sentence": f"Example with {word}.",
-            "synonyms": "",
-            "antonyms": "",
-            "pronunciation": f"/{word}/"
-        }
\ No newline at end of file
+        # Errors propagate, so run_concurrently counts the word as failed instead of saving placeholder data
+        return self._cached(self.model, prompt, word, fetch)
\ No newline at end of file
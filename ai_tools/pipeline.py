@@ -0,0 +1,174 @@
+"""
+Concurrent, rate-limited request pipeline shared by the AI generators.
+
+- TokenBucket / RateLimiter keep us under requests-per-minute and
+  tokens-per-minute quotas across all worker threads
+- post_json retries 429 and 5xx responses with jittered exponential backoff,
+  or after the server's Retry-After (capped at max_delay)
+- run_concurrently fans work out over a thread pool and prints live
+  throughput as results come back
+"""
+
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class RetryableError(Exception):
+    """Transient API failure worth retrying (rate limit, overload, network)"""
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at rate_per_minute"""
+    def __init__(self, rate_per_minute: float, burst_seconds: float = 10):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount: float = 1) -> float:
+        """Block until amount tokens are available; returns seconds waited"""
+        if self.rate <= 0:
+            return 0.0
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits (0 disables a limit)"""
+    def __init__(self, requests_per_minute: float = 60, tokens_per_minute: float = 0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def acquire(self, estimated_tokens: int = 0) -> float:
+        waited = self.requests.acquire(1)
+        if estimated_tokens:
+            waited += self.tokens.acquire(estimated_tokens)
+        return waited
+
+
+class ThroughputStats:
+    """Counters shared by worker threads, reported as a one-line summary"""
+    def __init__(self, total: int = 0):
+        self.total = total
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        self.tokens = 0
+        self.throttled_seconds = 0.0
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+
+    def record(self, **deltas):
+        with self.lock:
+            for name, value in deltas.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def summary(self) -> str:
+        with self.lock:
+            elapsed = max(time.monotonic() - self.started, 1e-9)
+            done = self.completed + self.failed
+            rate = done / elapsed
+            line = (f"{done}/{self.total} | {rate:.2f} words/s | {self.tokens / elapsed:.0f} tokens/s"
+                    f" | retries {self.retries} | failed {self.failed}")
+            if rate and self.total > done:
+                line += f" | ETA {(self.total - done) / rate:.0f}s"
+            return line
+
+
+def estimate_tokens(prompt: str, max_tokens: int) -> int:
+    """Rough token estimate (about 4 characters per token) plus the completion budget"""
+    return len(prompt) // 4 + max_tokens
+
+
+def _retry_after(response) -> Optional[float]:
+    try:
+        seconds = float(response.headers.get('Retry-After', ''))
+    except ValueError:
+        return None
+    return seconds if math.isfinite(seconds) else None
+
+
+def post_json(url: str, payload: Dict, headers: Optional[Dict] = None,
+              limiter: Optional[RateLimiter] = None, estimated_tokens: int = 0,
+              stats: Optional[ThroughputStats] = None, max_retries: int = 5,
+              base_delay: float = 1.0, max_delay: float = 60.0, timeout: float = 60) -> Dict:
+    """POST payload as JSON and return the decoded response.
+
+    429/5xx responses and network errors are retried up to max_retries times
+    with full-jitter exponential backoff, or after the server's Retry-After
+    capped at max_delay.
+    Other HTTP errors are raised immediately.
+    """
+    attempt = 0
+    while True:
+        if limiter:
+            waited = limiter.acquire(estimated_tokens)
+            if stats and waited:
+                stats.record(throttled_seconds=waited)
+        try:
+            response = requests.post(url, json=payload, headers=headers, timeout=timeout)
+            if response.status_code in RETRYABLE_STATUS:
+                raise RetryableError(f"HTTP {response.status_code}", _retry_after(response))
+            response.raise_for_status()
+            if stats:
+                stats.record(tokens=estimated_tokens)
+            return response.json()
+        except (RetryableError, requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= max_retries:
+                raise
+            retry_after = getattr(e, 'retry_after', None)
+            # A Retry-After of minutes (or a bogus one) must not stall a worker thread for that long
+            if retry_after is not None:
+                delay = min(max(retry_after, 0.0), max_delay)
+            else:
+                delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            attempt += 1
+            if stats:
+                stats.record(retries=1)
+            time.sleep(delay)
+
+
+def run_concurrently(items: List, worker: Callable, concurrency: int = 4,
+                     stats: Optional[ThroughputStats] = None, label: Callable = str) -> List:
+    """Apply worker to every item on a thread pool, returning results in input order"""
+    stats = stats or ThroughputStats(len(items))
+    stats.total = len(items)
+    results = [None] * len(items)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {executor.submit(worker, item): i for i, item in enumerate(items)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+                stats.record(completed=1)
+            except Exception as e:
+                stats.record(failed=1)
+                print(f"✗ {label(items[i])}: {e}")
+                continue
+            print(f"✓ {label(items[i])} [{stats.summary()}]")
+
+    return results
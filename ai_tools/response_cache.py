@@ -0,0 +1,113 @@
+"""
+Persistent cache for LLM word-data responses.
+
+Entries are content-addressed by (provider, model, prompt hash, word), so
+re-running an import, tweaking the prompt for a subset of words or
+resuming after a crash only pays for words whose request actually changed.
+Stored in a single SQLite file with a TTL and an LRU cap on entry count.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'responses.sqlite3')
+
+
+def cache_key(provider: str, model: str, prompt: str, word: str) -> str:
+    prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    raw = json.dumps([provider, model, prompt_hash, word.lower()], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response cache safe to share between worker threads.
+
+    bypass=True skips lookups but still stores fresh responses, which is how
+    to force a refresh. ttl_seconds=None keeps entries until evicted.
+    """
+    EVICT_EVERY = 100
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = 100000,
+                 ttl_seconds: Optional[float] = 30 * 24 * 3600, bypass: bool = False):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' key TEXT PRIMARY KEY, provider TEXT, model TEXT, word TEXT,'
+            ' data TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)')
+        self.conn.commit()
+
+    def get(self, provider: str, model: str, prompt: str, word: str) -> Optional[Dict]:
+        if self.bypass:
+            return None
+        key = cache_key(provider, model, prompt, word)
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute('SELECT data, created_at FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None or (self.ttl_seconds is not None and now - row[1] > self.ttl_seconds):
+                self.misses += 1
+                return None
+            self.conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+            self.conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, provider: str, model: str, prompt: str, word: str, data: Dict):
+        key = cache_key(provider, model, prompt, word)
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses (key, provider, model, word, data, created_at, accessed_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, provider, model, word, json.dumps(data, ensure_ascii=False), now, now),
+            )
+            self.conn.commit()
+            self.writes += 1
+            if self.writes % self.EVICT_EVERY == 0:
+                self._evict(now)
+
+    def _evict(self, now: float):
+        if self.ttl_seconds is not None:
+            self.evictions += self.conn.execute(
+                'DELETE FROM responses WHERE created_at < ?', (now - self.ttl_seconds,)
+            ).rowcount
+        excess = self.conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0] - self.max_entries
+        if excess > 0:
+            self.evictions += self.conn.execute(
+                'DELETE FROM responses WHERE key IN '
+                '(SELECT key FROM responses ORDER BY accessed_at LIMIT ?)', (excess,)
+            ).rowcount
+        self.conn.commit()
+
+    def get_or_fetch(self, provider: str, model: str, prompt: str, word: str, fetch) -> Dict:
+        """Return the cached response, or call fetch() and cache what it returns"""
+        data = self.get(provider, model, prompt, word)
+        if data is None:
+            data = fetch()
+            self.set(provider, model, prompt, word, data)
+        return data
+
+    def summary(self) -> str:
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups * 100 if lookups else 0
+        return (f"cache hits {self.hits}, misses {self.misses} ({rate:.0f}% hit rate),"
+                f" writes {self.writes}, evictions {self.evictions}")
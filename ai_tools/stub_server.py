@@ -0,0 +1,129 @@
+"""
+Local stand-in for the OpenAI, Gemini, Claude and Ollama endpoints.
+
+Lets the generation pipeline be exercised without API keys or costs:
+
+    python ai_tools/stub_server.py --port 8765 --latency 0.2 --error-rate 0.1
+    OPENAI_API_KEY=stub python ai_tools/word_generator.py words.xlsx --base-url http://127.0.0.1:8765/v1
+
+Responses echo the requested word back inside a valid word-data JSON
+object. A fraction of requests (--error-rate) fail with 429 or 503 so the
+retry path is exercised too, and --fail-first N answers the first N
+requests with 429 for repeatable runs.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+
+def _word_data(prompt: str) -> Dict:
+    match = re.search(r"""for (?:the word )?["']([^"']+)["']""", prompt)
+    word = match.group(1) if match else "unknown"
+    return {
+        "word": word,
+        "word_type": "adjective",
+        "difficulty_level": "intermediate",
+        "meaning_english": f"stub meaning of {word}",
+        "meaning_urdu": f"{word} کا معنی",
+        "example_sentence": f"A sentence using {word}.",
+        "synonyms": "",
+        "antonyms": "",
+        "pronunciation": f"/{word}/",
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    error_rate = 0.0
+    fail_first = 0
+    retry_after = "0"
+    requests_seen = 0
+    counter_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: Dict, headers: Optional[Dict] = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        # Counted per configured server class, so servers started side by side keep their own counts
+        with self.counter_lock:
+            type(self).requests_seen += 1
+            seen = type(self).requests_seen
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        time.sleep(self.latency)
+
+        if seen <= self.fail_first:
+            self._send(429, {"error": "stub rate limit"}, {"Retry-After": self.retry_after})
+            return
+        if random.random() < self.error_rate:
+            status = random.choice([429, 503])
+            self._send(status, {"error": "stub overload"}, {"Retry-After": self.retry_after})
+            return
+
+        path = self.path.split("?")[0]
+        if path.endswith("/chat/completions"):
+            prompt = payload["messages"][0]["content"]
+            text = json.dumps(_word_data(prompt), ensure_ascii=False)
+            self._send(200, {"choices": [{"message": {"content": text}}]})
+        elif path.endswith(":generateContent"):
+            prompt = payload["contents"][0]["parts"][0]["text"]
+            text = json.dumps(_word_data(prompt), ensure_ascii=False)
+            self._send(200, {"candidates": [{"content": {"parts": [{"text": text}]}}]})
+        elif path.endswith("/messages"):
+            prompt = payload["messages"][0]["content"]
+            text = json.dumps(_word_data(prompt), ensure_ascii=False)
+            self._send(200, {"content": [{"text": text}]})
+        elif path.endswith("/api/generate"):
+            text = json.dumps(_word_data(payload["prompt"]), ensure_ascii=False)
+            self._send(200, {"response": text})
+        else:
+            self._send(404, {"error": f"unknown path {path}"})
+
+
+def start_stub_server(port: int = 0, latency: float = 0.0, error_rate: float = 0.0,
+                      fail_first: int = 0, retry_after: str = "0") -> ThreadingHTTPServer:
+    """Start the stub on a background thread; port 0 picks a free port (see server.server_port)"""
+    handler = type("ConfiguredStubHandler", (StubHandler,), {
+        "latency": latency, "error_rate": error_rate, "fail_first": fail_first,
+        "retry_after": retry_after, "requests_seen": 0,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub AI provider server for local testing")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds to wait before each response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429/503")
+    parser.add_argument("--fail-first", type=int, default=0, help="Answer the first N requests with 429")
+    parser.add_argument("--retry-after", default="0", help="Retry-After header sent with 429/503 answers")
+    args = parser.parse_args()
+
+    server = start_stub_server(args.port, args.latency, args.error_rate, args.fail_first, args.retry_after)
+    print(f"Stub AI server listening on http://127.0.0.1:{server.server_port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
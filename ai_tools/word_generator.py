@@ -1,11 +1,10 @@
 import os
 import sys
 import django
+import argparse
 import pandas as pd
-import openai
-from typing import Dict, List
+from typing import Dict, List, Optional
 import json
-import time
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -14,14 +13,26 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vocab_flashcards.settings')
 django.setup()
 
-from vocabulary.models import WordsBank, WordType, DifficultyLevel, WordList
+from vocabulary.models import WordList
+from vocabulary.bulk import WordUpserter, chunked
 from decouple import config
+from ai_tools.pipeline import RateLimiter, ThroughputStats, estimate_tokens, post_json, run_concurrently
+from ai_tools.response_cache import DEFAULT_CACHE_PATH, ResponseCache
 
 class VocabularyGenerator:
-    def __init__(self):
+    model = "gpt-3.5-turbo"
+    max_tokens = 500
+
+    def __init__(self, concurrency: int = 4, requests_per_minute: float = 60,
+                 tokens_per_minute: float = 40000, max_retries: int = 5,
+                 base_url: Optional[str] = None, cache: Optional[ResponseCache] = None):
         self.openai_api_key = config('OPENAI_API_KEY', default='')
-        if self.openai_api_key:
-            openai.api_key = self.openai_api_key
+        self.base_url = (base_url or config('OPENAI_BASE_URL', default='https://api.openai.com/v1')).rstrip('/')
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.stats = ThroughputStats()
+        self.cache = cache
     
     def generate_word_data(self, word: str) -> Dict:
         """Generate comprehensive word data using OpenAI GPT"""
@@ -42,36 +53,48 @@ class VocabularyGenerator:
         Make sure the Urdu translation is accurate and the difficulty level is appropriate for SAT vocabulary.
         """
         
-        try:
-            if not self.openai_api_key:
-                return self._fallback_generation(word)
-            
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=500,
-                temperature=0.3
+        if not self.openai_api_key:
+            return self._fallback_generation(word)
+        
+        # API errors propagate: run_concurrently counts the word as failed and it is not saved
+        if self.cache:
+            return self.cache.get_or_fetch(
+                "openai", self.model, prompt, word, lambda: self._request_word_data(prompt)
             )
-            
-            content = response.choices[0].message.content.strip()
-            # Extract JSON from response
-            start = content.find('{')
-            end = content.rfind('}') + 1
-            json_str = content[start:end]
-            
-            return json.loads(json_str)
+        return self._request_word_data(prompt)
+    
+    def _request_word_data(self, prompt: str) -> Dict:
+        """Call the chat completions API and parse the JSON object in its reply"""
+        response = post_json(
+            f"{self.base_url}/chat/completions",
+            {
+                "model": self.model,
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": self.max_tokens,
+                "temperature": 0.3,
+            },
+            headers={"Authorization": f"Bearer {self.openai_api_key}"},
+            limiter=self.limiter,
+            estimated_tokens=estimate_tokens(prompt, self.max_tokens),
+            stats=self.stats,
+            max_retries=self.max_retries,
+        )
         
-        except Exception as e:
-            print(f"Error generating data for {word}: {e}")
-            return self._fallback_generation(word)
+        content = response["choices"][0]["message"]["content"].strip()
+        # Extract JSON from response
+        start = content.find('{')
+        end = content.rfind('}') + 1
+        json_str = content[start:end]
+        
+        return json.loads(json_str)
     
     def _fallback_generation(self, word: str) -> Dict:
-        """Fallback method when OpenAI is not available"""
+        """Placeholder data when no OpenAI API key is configured"""
         return {
             "word": word,
             "word_type": "noun",
             "difficulty_level": "intermediate",
-            "meaning_english": f"Definition for {word} (AI generation failed)",
+            "meaning_english": f"Definition for {word} (no API key configured)",
             "meaning_urdu": f"{word} کا اردو معنی",
             "example_sentence": f"This is an example sentence with {word}.",
             "synonyms": "",
@@ -86,88 +109,82 @@ class VocabularyGenerator:
             words_column = df.columns[0]  # First column
             words = df[words_column].dropna().tolist()
             
-            generated_data = []
+            words = [str(word).strip() for word in words]
             total_words = len(words)
             
-            print(f"Processing {total_words} words...")
+            print(f"Processing {total_words} words with {self.concurrency} workers...")
             
-            for i, word in enumerate(words, 1):
-                print(f"Processing {i}/{total_words}: {word}")
-                word_data = self.generate_word_data(str(word).strip())
-                generated_data.append(word_data)
-                
-                # Rate limiting for API calls
-                if self.openai_api_key:
-                    time.sleep(1)  # 1 second delay between requests
+            self.stats = ThroughputStats(total_words)
+            generated_data = run_concurrently(
+                words, self.generate_word_data, concurrency=self.concurrency, stats=self.stats
+            )
             
-            return generated_data
+            print(f"Generation finished: {self.stats.summary()}")
+            if self.stats.failed:
+                print(f"Skipped {self.stats.failed} words that could not be generated")
+            if self.cache:
+                print(f"Response cache: {self.cache.summary()}")
+            return [data for data in generated_data if data is not None]
         
         except Exception as e:
             print(f"Error processing Excel file: {e}")
             return []
     
-    def save_to_database(self, words_data: List[Dict]) -> int:
-        """Save generated words to database"""
-        saved_count = 0
-        
+    def save_to_database(self, words_data: List[Dict], update_existing: bool = False,
+                         batch_size: int = 500) -> int:
+        """Save generated words to database in batched transactions"""
         # Get or create default objects
         default_list, _ = WordList.objects.get_or_create(
             word_list_name="AI Generated",
             defaults={'description': 'Words generated using AI'}
         )
         
-        for word_data in words_data:
-            try:
-                # Get or create word type
-                word_type, _ = WordType.objects.get_or_create(
-                    word_type=word_data['word_type'],
-                    defaults={'abbreviation': word_data['word_type'][:3]}
-                )
-                
-                # Get or create difficulty level
-                difficulty, _ = DifficultyLevel.objects.get_or_create(
-                    level=word_data['difficulty_level']
-                )
-                
-                # Create word entry
-                word_obj, created = WordsBank.objects.get_or_create(
-                    word=word_data['word'],
-                    defaults={
-                        'word_type': word_type,
-                        'difficulty_level': difficulty,
-                        'meaning_english': word_data['meaning_english'],
-                        'meaning_urdu': word_data['meaning_urdu'],
-                        'example_sentence': word_data['example_sentence'],
-                        'synonyms': word_data['synonyms'],
-                        'antonyms': word_data['antonyms'],
-                        'pronunciation': word_data['pronunciation'],
-                    }
-                )
-                
-                if created:
-                    word_obj.word_lists.add(default_list)
-                    saved_count += 1
-                    print(f"✓ Saved: {word_data['word']}")
-                else:
-                    print(f"- Exists: {word_data['word']}")
-            
-            except Exception as e:
-                print(f"✗ Error saving {word_data['word']}: {e}")
+        upserter = WordUpserter([default_list], update_existing=update_existing)
+        for batch in chunked(words_data, batch_size):
+            upserter.save_batch(batch)
+            print(f"✓ Saved batch of {len(batch)}: {upserter.created} created, "
+                  f"{upserter.updated} updated, {upserter.existing} already existed")
         
-        return saved_count
+        for word, error in upserter.errors:
+            print(f"✗ Error saving {word}: {error}")
+        
+        return upserter.created
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python word_generator.py <excel_file_path>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Generate vocabulary data for an Excel word list")
+    parser.add_argument("excel_file", help="Excel file with words in the first column")
+    parser.add_argument("--concurrency", type=int, default=4, help="Parallel API requests")
+    parser.add_argument("--rpm", type=float, default=60, help="Requests per minute limit (0 = unlimited)")
+    parser.add_argument("--tpm", type=float, default=40000, help="Tokens per minute limit (0 = unlimited)")
+    parser.add_argument("--max-retries", type=int, default=5, help="Retries on 429/5xx responses")
+    parser.add_argument("--base-url", help="OpenAI-compatible API base URL (e.g. a local stub server)")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH, help="SQLite file for cached API responses")
+    parser.add_argument("--cache-ttl-days", type=float, default=30, help="Days before a cached response expires")
+    parser.add_argument("--cache-max-entries", type=int, default=100000, help="Cached responses kept (least recently used evicted)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached responses (fresh responses are still stored)")
+    parser.add_argument("--update-existing", action="store_true", help="Overwrite fields of words already in the database")
+    parser.add_argument("--batch-size", type=int, default=500, help="Words saved per database transaction")
+    args = parser.parse_args()
     
-    excel_file = sys.argv[1]
+    excel_file = args.excel_file
     
     if not os.path.exists(excel_file):
         print(f"Error: File {excel_file} not found")
         sys.exit(1)
     
-    generator = VocabularyGenerator()
+    generator = VocabularyGenerator(
+        concurrency=args.concurrency,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        max_retries=args.max_retries,
+        base_url=args.base_url,
+        cache=ResponseCache(
+            args.cache_path,
+            max_entries=args.cache_max_entries,
+            ttl_seconds=args.cache_ttl_days * 24 * 3600,
+            bypass=args.no_cache,
+        ),
+    )
     
     # Process Excel file
     print("Starting vocabulary generation...")
@@ -179,7 +196,9 @@ def main():
     
     # Save to database
     print("\nSaving to database...")
-    saved_count = generator.save_to_database(words_data)
+    saved_count = generator.save_to_database(
+        words_data, update_existing=args.update_existing, batch_size=args.batch_size
+    )
     
     print(f"\n✅ Process completed!")
     print(f"📊 Total words processed: {len(words_data)}")
@@ -14,6 +14,8 @@ from pathlib import Path
 from decouple import config
 import os
 
+from vocabulary.database import sqlite_databases
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -48,6 +50,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its latency covers the whole middleware stack
+    "vocabulary.metrics.MetricsMiddleware",
+    "vocabulary.nplusone.NPlusOneMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -81,10 +86,48 @@ WSGI_APPLICATION = "vocab_flashcards.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# "basic": Django's defaults. "production": WAL, tuned pragmas, persistent connections and
+# reads on a separate read-only alias (vocabulary/database.py)
+DATABASE_PROFILE = config('DATABASE_PROFILE', default='basic' if DEBUG else 'production')
+DATABASES = sqlite_databases(
+    BASE_DIR / "db.sqlite3",
+    DATABASE_PROFILE,
+    conn_max_age=config('CONN_MAX_AGE', default=600, cast=int),
+)
+DATABASE_ROUTERS = ['vocabulary.database.ReadWriteRouter']
+
+
+# Cache
+# "locmem" (per process, default with DEBUG), "file" (shared by processes on one host, default
+# without DEBUG), "redis" (needs redis-py and a server) or "dummy" (no caching).
+# The namespace versions that invalidate cached data (vocabulary/caching.py) live in this cache,
+# so with locmem a change made through one worker process is not seen by the others until their
+# entries time out; run more than one process only with file or redis (check vocabulary.W001).
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem' if DEBUG else 'file')
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'vocab-master',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / '.cache' / 'django')),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('CACHE_LOCATION', default='redis://127.0.0.1:6379/1'),
+    },
+    'dummy': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+}
+
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        'KEY_PREFIX': 'vocab',
+        # Entries are invalidated by namespace version bumps (vocabulary/caching.py), so they can live long
+        'TIMEOUT': config('CACHE_TIMEOUT', default=3600, cast=int),
     }
 }
 
@@ -189,3 +232,34 @@ SOCIALACCOUNT_PROVIDERS = {
         'VERIFIED_EMAIL': True,
     }
 }
+
+# Write-behind buffer for WordsBank.times_reviewed / last_reviewed (see vocabulary/review_counters.py)
+VOCABULARY_REVIEW_COUNTERS = {
+    'BACKEND': config('REVIEW_COUNTER_BACKEND', default='local'),
+    'FLUSH_INTERVAL': config('REVIEW_COUNTER_FLUSH_INTERVAL', default=30, cast=int),
+    'FLUSH_THRESHOLD': config('REVIEW_COUNTER_FLUSH_THRESHOLD', default=500, cast=int),
+}
+
+# Unfiltered list totals above this many rows use the database's row estimate instead of COUNT(*)
+VOCABULARY_COUNT_ESTIMATE_THRESHOLD = config('COUNT_ESTIMATE_THRESHOLD', default=100000, cast=int)
+
+# Flashcard decks up to this many words are downloaded whole as a cached bundle (see vocabulary/deck_bundles.py)
+VOCABULARY_DECK_BUNDLE_MAX_WORDS = config('DECK_BUNDLE_MAX_WORDS', default=20000, cast=int)
+
+# Candidate distractors kept per (word type, difficulty level) bucket for quiz questions
+VOCABULARY_QUIZ_POOL_SIZE = config('QUIZ_POOL_SIZE', default=50, cast=int)
+
+# Queries at least this slow are logged to vocabulary.slow_queries and listed on the admin dashboard
+VOCABULARY_SLOW_QUERY_MS = config('SLOW_QUERY_MS', default=100, cast=int)
+
+# Repeated-query (N+1) detection per request: "off", "log" or "raise" (see vocabulary/nplusone.py)
+VOCABULARY_NPLUSONE = {
+    'ACTION': config('NPLUSONE_ACTION', default='log' if DEBUG else 'off'),
+    'THRESHOLD': config('NPLUSONE_THRESHOLD', default=5, cast=int),
+}
+
+# Serve the deck API, change feed and dashboard with async views; only worth it under ASGI (see vocabulary/async_views.py)
+VOCABULARY_ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+
+# Every test runs under the N+1 detector with ACTION "raise"
+TEST_RUNNER = 'vocabulary.test_runner.DetectingTestRunner'
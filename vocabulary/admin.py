@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import WordsBank, WordList, WordType, DifficultyLevel, UserProgress, UserProfile, WordRelationship
+from .models import WordsBank, WordList, WordType, DifficultyLevel, UserProgress, UserProfile, UserStats, WordRelationship, DeckBundle, DistractorPool
 
 @admin.register(WordList)
 class WordListAdmin(admin.ModelAdmin):
@@ -18,18 +18,28 @@ class DifficultyLevelAdmin(admin.ModelAdmin):
 @admin.register(WordsBank)
 class WordsBankAdmin(admin.ModelAdmin):
     list_display = ['word', 'word_type', 'difficulty_level', 'is_favorite', 'times_reviewed']
+    # Admin only joins non-null foreign keys by itself; difficulty_level is nullable
+    list_select_related = ['word_type', 'difficulty_level']
     list_filter = ['word_type', 'difficulty_level', 'is_favorite', 'word_lists']
     search_fields = ['word', 'meaning_english', 'meaning_urdu', 'synonyms']
     filter_horizontal = ['word_lists']
     ordering = ['word']
     readonly_fields = ['created_at', 'updated_at']
+    # Managed by reseed_random_keys
+    exclude = ['random_key']
 
 @admin.register(UserProgress)
 class UserProgressAdmin(admin.ModelAdmin):
-    list_display = ['word', 'user', 'mastery_level', 'times_correct', 'times_incorrect']
+    list_display = ['word', 'user', 'mastery_level', 'times_correct', 'times_incorrect', 'due_at']
     list_filter = ['mastery_level']
     search_fields = ['word__word', 'user__email']
 
+@admin.register(UserStats)
+class UserStatsAdmin(admin.ModelAdmin):
+    list_display = ['user', 'words_studied', 'words_mastered', 'times_correct', 'times_incorrect', 'updated_at']
+    search_fields = ['user__email']
+    readonly_fields = ['updated_at']
+
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'first_name', 'last_name', 'subscription_status', 'created_at']
@@ -42,4 +52,25 @@ class WordRelationshipAdmin(admin.ModelAdmin):
     list_display = ['word1', 'word2', 'relationship_type', 'created_at']
     list_filter = ['relationship_type', 'created_at']
     search_fields = ['word1__word', 'word2__word']
-    autocomplete_fields = ['word1', 'word2']
\ No newline at end of file
+    autocomplete_fields = ['word1', 'word2']
+
+@admin.register(DeckBundle)
+class DeckBundleAdmin(admin.ModelAdmin):
+    list_display = ['key', 'word_list', 'word_count', 'size', 'built_at']
+    list_select_related = ['word_list']
+    exclude = ['content']
+    readonly_fields = ['key', 'word_list', 'etag', 'fingerprint', 'word_count', 'size', 'built_at']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('content')
+
+@admin.register(DistractorPool)
+class DistractorPoolAdmin(admin.ModelAdmin):
+    list_display = ['bucket', 'word_type', 'difficulty_level', 'size', 'built_at']
+    list_select_related = ['word_type', 'difficulty_level']
+    list_filter = ['word_type', 'difficulty_level']
+    exclude = ['entries']
+    readonly_fields = ['bucket', 'word_type', 'difficulty_level', 'size', 'built_at']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('entries')
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class VocabularyConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "vocabulary"
+
+    def ready(self):
+        from django.core import checks
+        from . import caching, signals  # noqa: F401
+        checks.register(caching.check_shared_versions, checks.Tags.caches)
@@ -0,0 +1,72 @@
+"""
+Async versions of the read endpoints: the deck API (including search),
+the change feed and the dashboard.
+
+They are routed instead of the sync views in views.py when
+VOCABULARY_ASYNC_VIEWS is on, which only pays off under ASGI: there a
+sync view holds a thread-pool slot for the whole request, while these
+await the ORM's and the cache's async interfaces. Under WSGI every async
+view is run through async_to_sync, which costs more than it saves.
+Compare the two with `manage.py loadtest --views sync,async`.
+
+Database access still goes through sync_to_async inside Django, so with
+SQLite the queries themselves don't overlap; what the event loop gains
+is not blocking on them. Filters, ordering, cursors and response bodies
+are shared with the sync views, so both return the same responses.
+"""
+
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from . import caching, changes, sampling, search, user_stats
+from .fragments import aserialize_cards
+from .pagination import akeyset_page
+from .views import (
+    CHANGES_ERROR, SHUFFLE_ERROR, _changes_params, _dashboard_context, _deck_limit, _deck_queryset, _shuffle_pivot,
+)
+
+
+async def _deck_page(params, cursor, limit, pivot):
+    # search_words() checks for the index with a sync query the first time
+    await search.asearch_index_available()
+    words, ordering = _deck_queryset(params)
+    if pivot is not None:
+        rows, next_cursor = await sampling.ashuffled_page(words, pivot, cursor, limit)
+    else:
+        rows, next_cursor = await akeyset_page(words, ordering, cursor, limit)
+    return {'cards': await aserialize_cards(rows), 'next_cursor': next_cursor}
+
+
+@login_required
+async def deck_api(request):
+    user = await request.auser()
+    try:
+        pivot = _shuffle_pivot(request.GET, user)
+    except ValueError:
+        return JsonResponse({'error': SHUFFLE_ERROR}, status=400)
+    return JsonResponse(await _deck_page(request.GET, request.GET.get('cursor'), _deck_limit(request.GET), pivot))
+
+
+@login_required
+async def changes_api(request):
+    try:
+        cursor, limit = _changes_params(request.GET)
+    except ValueError:
+        return JsonResponse({'error': CHANGES_ERROR}, status=400)
+
+    return JsonResponse(await changes.afeed(cursor, limit), json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+async def dashboard(request):
+    # The templates (and the learner's timezone) read request.user and its profile, which would load
+    # them with sync queries; both come in one query here
+    user = await request.auser()
+    request.user = user = await User.objects.select_related('userprofile').aget(pk=user.pk)
+    learning = user_stats.summarize(await user_stats.aget_stats(user), user)
+    return render(request, 'vocabulary/dashboard.html', _dashboard_context(
+        await caching.atotal_words(), await caching.aword_types(), await caching.adifficulty_levels(),
+        await caching.arecent_words(), learning,
+    ))
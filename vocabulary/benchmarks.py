@@ -0,0 +1,383 @@
+"""
+Reproducible performance benchmarks for the vocabulary views and commands.
+
+seed() fills an empty database with deterministic synthetic data at one of
+the SCALES (words with synonym/antonym text, word lists, relationships,
+learners with profiles, progress rows and their UserStats). run_views()
+drives every URL in vocabulary/urls.py through the test client and
+run_commands() times the bulk commands; both report latency percentiles
+and SQL query counts per case. compare() checks a run against a saved
+baseline. `manage.py benchmark` ties it together on a separate database,
+which benchmark_database() sets up (`manage.py loadtest` uses it too).
+"""
+
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import tempfile
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_databases, setup_test_environment, teardown_databases,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from . import caching, changes, quiz, user_stats
+from .bulk import chunked
+from .models import DifficultyLevel, UserProfile, UserProgress, WordList, WordRelationship, WordsBank, WordType
+from .urls import urlpatterns
+
+SCALES = {
+    'small': {'words': 3500, 'users': 50, 'progress_per_user': 300},
+    'medium': {'words': 50000, 'users': 500, 'progress_per_user': 1000},
+    'large': {'words': 500000, 'users': 2000, 'progress_per_user': 1000},
+}
+WORD_TYPES = ['noun', 'verb', 'adjective', 'adverb']
+SYLLABLES = ['ab', 'cor', 'den', 'ex', 'fal', 'gra', 'hel', 'in', 'jur', 'lum', 'mor', 'nov',
+             'ob', 'per', 'quin', 'ros', 'sub', 'ter', 'ul', 'ven', 'ax', 'ly', 'ous', 'ent']
+STAFF_USERNAME = 'benchmark-admin'
+BENCHMARK_DIR = os.path.join(settings.BASE_DIR, '.benchmarks')
+BATCH_SIZE = 5000
+IMPORT_PREFIX = 'bench-import-'
+
+
+def make_records(count, seed=0, prefix=''):
+    """count deterministic word records in the format of bulk.validate_record.
+
+    Synonyms and antonyms name earlier words of the same set, so
+    create_word_relationships finds real pairs.
+    """
+    rng = random.Random(seed)
+    levels = [level for level, _ in DifficultyLevel.LEVEL_CHOICES]
+    records, names = [], set()
+    for i in range(count):
+        word = prefix + ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if word in names:
+            word = f'{word}{i}'
+        names.add(word)
+        earlier = [records[j]['word'] for j in rng.sample(range(len(records)), min(len(records), 3))]
+        records.append({
+            'word': word,
+            'word_type': WORD_TYPES[i % len(WORD_TYPES)],
+            'difficulty_level': levels[rng.randrange(len(levels))],
+            'meaning_english': f'The meaning of {word}, a synthetic benchmark word number {i}',
+            'meaning_urdu': f'{word} کا مطلب',
+            'example_sentence': f'She used {word} in a sentence to show how {word} works.',
+            'synonyms': ', '.join(earlier[:2]),
+            'antonyms': ', '.join(earlier[2:]),
+        })
+    return records
+
+
+def seed(scale, seed=0, log=None):
+    """Fill the (empty) database with synthetic data; scale is a SCALES entry"""
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    types = {t: WordType.objects.get_or_create(word_type=t)[0] for t in WORD_TYPES}
+    levels = {level: DifficultyLevel.objects.get_or_create(level=level)[0] for level, _ in DifficultyLevel.LEVEL_CHOICES}
+    all_list, _ = WordList.objects.get_or_create(word_list_name='Benchmark - all words')
+    some_list, _ = WordList.objects.get_or_create(word_list_name='Benchmark - every third word')
+
+    log(f"Creating {scale['words']} words...")
+    word_ids = []
+    for batch in chunked(make_records(scale['words'], seed), BATCH_SIZE):
+        words = WordsBank.objects.bulk_create([
+            WordsBank(
+                word=record['word'],
+                word_type=types[record['word_type']],
+                difficulty_level=levels[record['difficulty_level']],
+                meaning_english=record['meaning_english'],
+                meaning_urdu=record['meaning_urdu'],
+                example_sentence=record['example_sentence'],
+                synonyms=record['synonyms'],
+                antonyms=record['antonyms'],
+                created_at=now - timedelta(minutes=len(word_ids) + i),
+                random_key=rng.random(),
+            )
+            for i, record in enumerate(batch)
+        ])
+        ids = [w.id for w in words]
+        word_ids.extend(ids)
+        Through = WordsBank.word_lists.through
+        Through.objects.bulk_create(
+            [Through(wordsbank_id=i, wordlist_id=all_list.id) for i in ids]
+            + [Through(wordsbank_id=i, wordlist_id=some_list.id) for i in ids[::3]]
+        )
+
+    log('Creating relationships...')
+    pairs = [(word_ids[i], word_ids[i + 1], 'synonym') for i in range(0, len(word_ids) - 1, 2)]
+    pairs += [(word_ids[i], word_ids[i + 3], 'antonym') for i in range(0, len(word_ids) - 3, 7)]
+    for batch in chunked(pairs, BATCH_SIZE):
+        WordRelationship.objects.bulk_create(
+            [WordRelationship(word1_id=a, word2_id=b, relationship_type=t) for a, b, t in batch],
+            ignore_conflicts=True,
+        )
+
+    # bulk_create skips the signals that feed the change log
+    changes.record(changes.WORD, word_ids)
+    changes.record(changes.RELATIONSHIP, WordRelationship.objects.values_list('id', flat=True))
+    quiz.build_all()
+
+    log(f"Creating {scale['users']} learners with {scale['progress_per_user']} progress rows each...")
+    password = make_password('benchmark')
+    User.objects.create_superuser(STAFF_USERNAME, 'admin@benchmark.invalid', 'benchmark')
+    users = User.objects.bulk_create([
+        User(username=f'learner{i}', email=f'learner{i}@benchmark.invalid', password=password,
+             date_joined=now - timedelta(hours=i))
+        for i in range(scale['users'])
+    ])
+    UserProfile.objects.bulk_create([UserProfile(user=u, first_name=u.username) for u in users])
+    per_user = min(scale['progress_per_user'], len(word_ids))
+    for user in users:
+        rows = []
+        for word_id in rng.sample(word_ids, per_user):
+            correct, incorrect = rng.randint(0, 8), rng.randint(0, 4)
+            rows.append(UserProgress(
+                user=user, word_id=word_id,
+                mastery_level=rng.randint(0, 5), times_correct=correct, times_incorrect=incorrect,
+                repetitions=correct, interval_days=rng.randint(0, 30),
+                due_at=now + timedelta(hours=rng.randint(-24 * 14, 24 * 30)),
+            ))
+        UserProgress.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    user_stats.rebuild(users)
+
+    # Bulk inserts bypass the signals, and the planner needs statistics
+    caching.bump(*caching.NAMESPACES)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def is_seeded(scale):
+    return (
+        User.objects.filter(username=STAFF_USERNAME).exists()
+        and WordsBank.objects.count() >= scale['words']
+    )
+
+
+@contextlib.contextmanager
+def benchmark_database(scale_name, db_file=None, reseed=False, log=None):
+    """Run the block on a separate, seeded database at the given scale, with a private cache.
+
+    On SQLite the database is a file (default .benchmarks/<scale>.sqlite3)
+    kept between runs, so seeding happens once.
+    """
+    log = log or (lambda message: None)
+    scale = SCALES[scale_name]
+    if connection.vendor == 'sqlite':
+        db_file = db_file or os.path.join(BENCHMARK_DIR, f'{scale_name}.sqlite3')
+        os.makedirs(os.path.dirname(os.path.abspath(db_file)), exist_ok=True)
+        if reseed and os.path.exists(db_file):
+            os.remove(db_file)
+        connection.settings_dict['TEST']['NAME'] = db_file
+
+    setup_test_environment(debug=False)
+    old_config = setup_databases(verbosity=0, interactive=False, keepdb=True, aliases={'default'})
+    try:
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'vocab-benchmark',
+        }}):
+            if not is_seeded(scale):
+                call_command('flush', interactive=False, verbosity=0)
+                started = time.perf_counter()
+                seed(scale, log=log)
+                log(f'Seeded in {time.perf_counter() - started:.1f}s')
+            yield
+    finally:
+        teardown_databases(old_config, verbosity=0, keepdb=True)
+        teardown_test_environment()
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    return sorted_values[max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)]
+
+
+def summarize(timings, queries):
+    """Latency percentiles (ms) and the largest query count of a case's runs"""
+    ms = sorted(t * 1000 for t in timings)
+    return {
+        'runs': len(ms),
+        'p50_ms': round(percentile(ms, 50), 2),
+        'p95_ms': round(percentile(ms, 95), 2),
+        'p99_ms': round(percentile(ms, 99), 2),
+        'mean_ms': round(sum(ms) / len(ms), 2),
+        'max_ms': round(ms[-1], 2),
+        'queries': max(queries),
+    }
+
+
+def measure(run, repeat, warmup=0):
+    """Time run() repeat times after warmup untimed calls; returns (summary, last result)"""
+    for _ in range(warmup):
+        run()
+    timings, queries, result = [], [], None
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            result = run()
+            timings.append(time.perf_counter() - started)
+        queries.append(len(ctx.captured_queries))
+    return summarize(timings, queries), result
+
+
+# URLs left out of view_cases() on purpose, with the reason
+UNMEASURED = {
+    'toggle_user_status': 'changes the user it measures on every request',
+}
+
+
+def view_cases():
+    """[(case name, url name, method, url, body)] covering every URL of the app but UNMEASURED.
+
+    Form views are measured on GET (rendering the form or redirecting);
+    the review API on a POSTed batch of 20 reviews; the change feed on a
+    short catch-up and on a full first page.
+    """
+    word = WordsBank.objects.order_by('id').first()
+    learner = User.objects.filter(is_staff=False).order_by('id').first()
+    word_list = WordList.objects.order_by('id').first()
+    level = DifficultyLevel.objects.order_by('id').first()
+    review_ids = WordsBank.objects.order_by('id').values_list('id', flat=True)[:20]
+    reviews = json.dumps({'reviews': [{'word_id': i, 'outcome': 'correct'} for i in review_ids]})
+    # A returning client that missed the last 50 changes
+    recent_cursor = max(changes.current_cursor() - 50, 0)
+
+    url = lambda name, *args: reverse(f'vocabulary:{name}', args=args)
+    return [
+        ('home', 'home', 'GET', url('home'), None),
+        ('word_list', 'word_list', 'GET', url('word_list'), None),
+        ('word_list_search', 'word_list', 'GET', url('word_list') + f'?q={word.word[:4]}', None),
+        ('word_list_per_page_50', 'word_list', 'GET', url('word_list') + '?per_page=50', None),
+        ('flashcards', 'flashcards', 'GET', url('flashcards'), None),
+        ('deck_api', 'deck_api', 'GET', url('deck_api'), None),
+        ('deck_api_shuffled', 'deck_api', 'GET', url('deck_api') + '?shuffle=42', None),
+        ('deck_api_shuffled_by_difficulty', 'deck_api', 'GET', url('deck_api') + f'?shuffle=42&difficulty={level.id}', None),
+        ('quiz', 'quiz', 'GET', url('quiz'), None),
+        ('quiz_api', 'quiz_api', 'GET', url('quiz_api'), None),
+        ('quiz_api_synonym_by_difficulty', 'quiz_api', 'GET', url('quiz_api') + f'?kind=synonym&difficulty={level.id}', None),
+        ('deck_bundle', 'deck_bundle', 'GET', url('deck_bundle', 'all'), None),
+        ('deck_bundle_by_list', 'deck_bundle', 'GET', url('deck_bundle', f'list-{word_list.id}'), None),
+        ('changes_api', 'changes_api', 'GET', url('changes_api') + f'?since={recent_cursor}', None),
+        ('changes_api_full_page', 'changes_api', 'GET', url('changes_api'), None),
+        ('review_api', 'review_api', 'POST', url('review_api'), reviews),
+        ('dashboard', 'dashboard', 'GET', url('dashboard'), None),
+        ('admin_dashboard', 'admin_dashboard', 'GET', url('admin_dashboard'), None),
+        ('add_word', 'add_word', 'GET', url('add_word'), None),
+        ('edit_word', 'edit_word', 'GET', url('edit_word', word.id), None),
+        ('user_management', 'user_management', 'GET', url('user_management'), None),
+        ('edit_user', 'edit_user', 'GET', url('edit_user', learner.id), None),
+        ('manage_categories', 'manage_categories', 'GET', url('manage_categories'), None),
+        ('add_word_type', 'add_word_type', 'GET', url('add_word_type'), None),
+        ('add_difficulty', 'add_difficulty', 'GET', url('add_difficulty'), None),
+        ('add_word_list', 'add_word_list', 'GET', url('add_word_list'), None),
+        ('word_relationships', 'word_relationships', 'GET', url('word_relationships'), None),
+        ('add_relationship', 'add_relationship', 'GET', url('add_relationship'), None),
+        ('metrics', 'metrics', 'GET', url('metrics'), None),
+    ]
+
+
+def uncovered_urls(cases):
+    """Names of app URLs that no benchmark case requests, other than UNMEASURED ones"""
+    covered = {url_name for _, url_name, _, _, _ in cases} | set(UNMEASURED)
+    return sorted(p.name for p in urlpatterns if p.name not in covered)
+
+
+def run_views(repeat=20, warmup=3, only=None):
+    """{'views.<case>': summary + status} for every view case, as the staff user"""
+    client = Client()
+    client.force_login(User.objects.get(username=STAFF_USERNAME))
+    results = {}
+    for name, _, method, path, body in view_cases():
+        if only and not any(o in name for o in only):
+            continue
+        run = lambda: client.generic(method, path, body or '', content_type='application/json')
+        summary, response = measure(run, repeat, warmup)
+        results[f'views.{name}'] = {**summary, 'status': response.status_code}
+    return results
+
+
+def _remove_imported_words():
+    WordsBank.objects.filter(word__startswith=IMPORT_PREFIX).delete()
+    WordList.objects.filter(word_list_name='AI Generated').delete()
+
+
+def run_commands(repeat=3, import_size=1000, only=None):
+    """{'commands.<name>': summary} for the relationship builder and both word importers.
+
+    Each import run gets fresh words so it measures inserts, not lookups;
+    they are deleted again afterwards so the database keeps its seeded size.
+    save_to_database is skipped when ai_tools cannot be imported.
+    """
+    results = {}
+    runs = iter(range(10 ** 6))
+
+    def relationships():
+        call_command('create_word_relationships', stdout=io.StringIO())
+
+    def load_vocabulary():
+        n = next(runs)
+        records = make_records(import_size, seed=n, prefix=f'{IMPORT_PREFIX}{n}-')
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'words.jsonl')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(r) + '\n' for r in records)
+            call_command('load_vocabulary', path, '--no-resume', stdout=io.StringIO())
+
+    cases = [('create_word_relationships', relationships), ('load_vocabulary', load_vocabulary)]
+    try:
+        from ai_tools.word_generator import VocabularyGenerator
+    except ImportError as e:
+        results['commands.save_to_database'] = {'skipped': str(e)}
+    else:
+        generator = VocabularyGenerator()
+
+        def save_to_database():
+            n = next(runs)
+            records = make_records(import_size, seed=n, prefix=f'{IMPORT_PREFIX}{n}-')
+            with contextlib.redirect_stdout(io.StringIO()):
+                generator.save_to_database(records)
+
+        cases.append(('save_to_database', save_to_database))
+
+    for name, run in cases:
+        if only and not any(o in name for o in only):
+            continue
+        _remove_imported_words()
+        results[f'commands.{name}'], _ = measure(run, repeat)
+    _remove_imported_words()
+    return results
+
+
+def compare(results, baseline, latency_tolerance=0.25, query_tolerance=0, min_delta_ms=5.0):
+    """Regression messages for results against a baseline's results.
+
+    A case regresses when its p95 latency grows by more than
+    latency_tolerance (a fraction) and by at least min_delta_ms, or when
+    it runs more than query_tolerance extra queries. Cases missing from
+    either side are ignored.
+    """
+    regressions = []
+    for name, current in sorted(results.items()):
+        before = baseline.get(name)
+        if not before or 'p95_ms' not in before or 'p95_ms' not in current:
+            continue
+        if (current['p95_ms'] > before['p95_ms'] * (1 + latency_tolerance)
+                and current['p95_ms'] - before['p95_ms'] >= min_delta_ms):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current['queries'] > before['queries'] + query_tolerance:
+            regressions.append(f"{name}: {before['queries']} -> {current['queries']} queries")
+    return regressions
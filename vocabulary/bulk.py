@@ -0,0 +1,195 @@
+"""
+Batched insert/update of WordsBank rows from plain dict records.
+
+Used by the AI generator and the load_vocabulary command. Lookup tables are
+loaded once, each batch is one transaction with a handful of statements
+(existing-word lookup, bulk_create, id lookup, M2M bulk insert, optional
+bulk_update) instead of several queries per word.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import caching, changes, quiz
+from .models import DifficultyLevel, WordsBank, WordType
+
+REQUIRED_FIELDS = ['word', 'word_type', 'meaning_english', 'meaning_urdu', 'example_sentence']
+TEXT_FIELDS = ['meaning_english', 'meaning_urdu', 'example_sentence', 'synonyms', 'antonyms', 'pronunciation']
+UPDATE_FIELDS = ['word_type', 'difficulty_level'] + TEXT_FIELDS
+LEVELS = dict(DifficultyLevel.LEVEL_CHOICES)
+WORD_TYPE_ABBREVIATIONS = {
+    'noun': 'n.',
+    'verb': 'v.',
+    'adjective': 'adj.',
+    'adverb': 'adv.',
+    'preposition': 'prep.',
+    'conjunction': 'conj.',
+}
+
+
+def validate_record(record):
+    """Return an error message for an unusable record, or None"""
+    if not isinstance(record, dict):
+        return 'record is not a mapping'
+    missing = [f for f in REQUIRED_FIELDS if not str(record.get(f) or '').strip()]
+    if missing:
+        return f"missing {', '.join(missing)}"
+    not_text = [f for f in ('word', 'word_type') if not isinstance(record[f], str)]
+    if not_text:
+        return f"{', '.join(not_text)} must be text"
+    if len(record['word'].strip()) > WordsBank._meta.get_field('word').max_length:
+        return 'word too long'
+    return None
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class WordUpserter:
+    """Insert (and optionally update) words in batches.
+
+    Counters (created, updated, existing, errors) accumulate across calls to
+    save_batch so a long import can report totals at the end.
+    """
+
+    def __init__(self, word_lists=(), update_existing=False):
+        self.word_lists = list(word_lists)
+        self.update_existing = update_existing
+        self.word_types = {wt.word_type: wt for wt in WordType.objects.all()}
+        self.levels = {dl.level: dl for dl in DifficultyLevel.objects.all()}
+        self.created = 0
+        self.updated = 0
+        self.existing = 0
+        self.errors = []
+
+    def _ensure_lookups(self, records):
+        new_types = {r['word_type'] for r in records} - set(self.word_types)
+        if new_types:
+            WordType.objects.bulk_create(
+                [WordType(word_type=t, abbreviation=WORD_TYPE_ABBREVIATIONS.get(t, t[:3])) for t in new_types], ignore_conflicts=True
+            )
+            self.word_types.update({wt.word_type: wt for wt in WordType.objects.filter(word_type__in=new_types)})
+            caching.bump_on_commit(caching.TAXONOMY)
+
+        new_levels = {r['difficulty_level'] for r in records if r['difficulty_level']} - set(self.levels)
+        if new_levels:
+            DifficultyLevel.objects.bulk_create(
+                [DifficultyLevel(level=l) for l in new_levels], ignore_conflicts=True
+            )
+            self.levels.update({dl.level: dl for dl in DifficultyLevel.objects.filter(level__in=new_levels)})
+            caching.bump_on_commit(caching.TAXONOMY)
+
+    def clean_batch(self, records):
+        """Validate and clean a batch, dropping bad rows and duplicate words"""
+        cleaned = {}
+        for record in records:
+            error = validate_record(record)
+            if error:
+                self.errors.append((record.get('word') if isinstance(record, dict) else None, error))
+                continue
+            word = record['word'].strip()
+            if word in cleaned:
+                continue
+            level = str(record.get('difficulty_level') or '').strip().lower()
+            cleaned[word] = {
+                'word': word,
+                'word_type': record['word_type'].strip().lower(),
+                # Unknown levels are stored as "no level" rather than rejecting the word
+                'difficulty_level': level if level in LEVELS else None,
+                **{f: str(record.get(f) or '').strip() for f in TEXT_FIELDS},
+            }
+        return list(cleaned.values())
+
+    def _build(self, record, word=None):
+        word = word or WordsBank(word=record['word'])
+        word.word_type = self.word_types[record['word_type']]
+        word.difficulty_level = self.levels.get(record['difficulty_level'])
+        for field in TEXT_FIELDS:
+            setattr(word, field, record[field])
+        return word
+
+    def save_batch(self, records):
+        """Persist one batch in a single transaction; returns the ids of newly created words"""
+        records = self.clean_batch(records)
+        if not records:
+            return []
+
+        with transaction.atomic():
+            self._ensure_lookups(records)
+            names = [r['word'] for r in records]
+            existing = WordsBank.objects.filter(word__in=names)
+            if not self.update_existing:
+                existing = existing.only('id', 'word')
+            existing = {w.word: w for w in existing}
+
+            new_words = [self._build(r) for r in records if r['word'] not in existing]
+            # ignore_conflicts covers words inserted concurrently by another process
+            WordsBank.objects.bulk_create(new_words, ignore_conflicts=True)
+            created_ids = list(
+                WordsBank.objects.filter(word__in=[w.word for w in new_words])
+                .exclude(id__in=[w.id for w in existing.values()])
+                .values_list('id', flat=True)
+            )
+
+            if self.word_lists and created_ids:
+                Through = WordsBank.word_lists.through
+                Through.objects.bulk_create(
+                    [Through(wordsbank_id=word_id, wordlist_id=wl.id) for word_id in created_ids for wl in self.word_lists],
+                    ignore_conflicts=True,
+                )
+
+            if created_ids or self.update_existing:
+                # bulk_create/bulk_update skip post_save, so invalidate cached counts and lookups here
+                caching.bump_on_commit(caching.WORDS)
+            changes.record(changes.WORD, created_ids)
+            quiz.refresh_on_commit(quiz.word_buckets(new_words))
+
+            self.created += len(created_ids)
+            self.existing += len(existing)
+
+            if self.update_existing and existing:
+                self._update(records, existing)
+
+        return created_ids
+
+    @staticmethod
+    def _values(word):
+        return (word.word_type_id, word.difficulty_level_id) + tuple(getattr(word, f) for f in TEXT_FIELDS)
+
+    def _update(self, records, existing):
+        now = timezone.now()
+        changed = []
+        changed_fields = set()
+        for record in records:
+            word = existing.get(record['word'])
+            if word is None:
+                continue
+            before = self._values(word)
+            self._build(record, word)
+            after = self._values(word)
+            if after != before:
+                word.updated_at = now
+                changed.append(word)
+                changed_fields |= {f for f, old, new in zip(UPDATE_FIELDS, before, after) if old != new}
+
+        if changed:
+            WordsBank.objects.bulk_update(changed, sorted(changed_fields) + ['updated_at'])
+            changes.record(changes.WORD, [w.id for w in changed])
+            quiz.refresh_on_commit(quiz.word_buckets(changed))
+            self.updated += len(changed)
+
+
+def bulk_upsert_words(records, word_lists=(), update_existing=False, batch_size=500):
+    """Save an iterable of word dicts in chunked transactions and return the WordUpserter with totals"""
+    upserter = WordUpserter(word_lists, update_existing)
+    for batch in chunked(records, batch_size):
+        upserter.save_batch(batch)
+    return upserter
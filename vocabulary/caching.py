@@ -0,0 +1,258 @@
+"""
+Versioned caching for read-mostly data (counts and lookup lists).
+
+Cached values are filed under one or more namespaces. Each namespace has a
+version number in the cache and the versions are part of every key, so
+bumping a namespace makes all of its entries unreachable at once - no key
+scans, and it works the same on every backend in settings.CACHES.
+
+Saves and deletes of the content models bump their namespaces through the
+signals in signals.py; bulk write paths call bump() themselves.
+Hit/miss counters are kept per process and reported by cache_stats().
+The a-prefixed functions are the same operations for async views, on the
+cache's async methods.
+
+The versions live in the default cache, so a bump only reaches the
+processes that share it. With LocMemCache each worker has its own
+versions and keeps serving what it cached (up to the cache TIMEOUT) after
+another worker changed the data. Multi-process deployments need a shared
+backend (CACHE_BACKEND=file or redis); check_shared_versions() warns when
+DEBUG is off and the cache is per process.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import defaultdict
+
+from django.core import checks
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+
+WORDS = 'words'
+TAXONOMY = 'taxonomy'
+RELATIONSHIPS = 'relationships'
+USERS = 'users'
+NAMESPACES = (WORDS, TAXONOMY, RELATIONSHIPS, USERS)
+
+# What each model's changes make stale. Renaming a word type or level
+# changes how words render. Lookups with word counts next to categories
+# are filed under both namespaces, so word saves leave TAXONOMY alone.
+MODEL_NAMESPACES = {
+    'WordsBank': (WORDS,),
+    'WordType': (TAXONOMY, WORDS),
+    'DifficultyLevel': (TAXONOMY, WORDS),
+    'WordList': (TAXONOMY,),
+    'WordRelationship': (RELATIONSHIPS,),
+    'User': (USERS,),
+}
+SAFE_KEY_PART = re.compile(r'[\w.:-]{0,100}')
+
+_counters = defaultdict(lambda: [0, 0])
+_counters_lock = threading.Lock()
+
+
+def _version_key(namespace):
+    return f'vocabulary:ns:{namespace}'
+
+
+def versions(*namespaces):
+    """Current version of each namespace, initialising any that are missing"""
+    keys = {_version_key(ns): ns for ns in namespaces}
+    found = cache.get_many(list(keys))
+    result = {}
+    for key, ns in keys.items():
+        if key not in found:
+            # A clock-based start value never reuses a version whose entries may still be cached
+            cache.add(key, int(time.time() * 1000), None)
+            found[key] = cache.get(key, 0)
+        result[ns] = found[key]
+    return result
+
+
+async def aversions(*namespaces):
+    """versions() for async views"""
+    keys = {_version_key(ns): ns for ns in namespaces}
+    found = await cache.aget_many(list(keys)) if keys else {}
+    result = {}
+    for key, ns in keys.items():
+        if key not in found:
+            await cache.aadd(key, int(time.time() * 1000), None)
+            found[key] = await cache.aget(key, 0)
+        result[ns] = found[key]
+    return result
+
+
+def bump(*namespaces):
+    """Invalidate everything cached under the given namespaces"""
+    for ns in namespaces:
+        try:
+            cache.incr(_version_key(ns))
+        except ValueError:
+            cache.add(_version_key(ns), int(time.time() * 1000), None)
+
+
+def check_shared_versions(app_configs=None, **kwargs):
+    """System check: warn when namespace versions can't reach other processes"""
+    from django.conf import settings
+    if settings.DEBUG or not isinstance(caches['default'], LocMemCache):
+        return []
+    return [checks.Warning(
+        'The default cache is per process, so cache invalidations in one worker do not reach the others.',
+        hint='Set CACHE_BACKEND=file (one host) or redis, or run a single process.',
+        id='vocabulary.W001',
+    )]
+
+
+def bump_on_commit(*namespaces):
+    transaction.on_commit(lambda: bump(*namespaces))
+
+
+def _key(name, namespaces, current, parts):
+    suffix = ':'.join(str(p) for p in parts)
+    if not SAFE_KEY_PART.fullmatch(suffix):
+        # Free text (search queries) would break memcached's key rules
+        suffix = hashlib.md5(suffix.encode()).hexdigest()
+    return f"vocabulary:{name}:{':'.join(f'{ns}{current[ns]}' for ns in namespaces)}:{suffix}"
+
+
+def make_key(name, namespaces, *parts):
+    return _key(name, namespaces, versions(*namespaces), parts)
+
+
+async def amake_key(name, namespaces, *parts):
+    return _key(name, namespaces, await aversions(*namespaces), parts)
+
+
+def record_lookup(name, hit, count=1):
+    with _counters_lock:
+        _counters[name][0 if hit else 1] += count
+
+
+def get_or_set(name, namespaces, compute, *parts, timeout=DEFAULT_TIMEOUT):
+    """Return the cached value for (name, parts), computing and storing it on a miss"""
+    key = make_key(name, namespaces, *parts)
+    value = cache.get(key)
+    if value is not None:
+        record_lookup(name, True)
+        return value
+    record_lookup(name, False)
+    value = compute()
+    cache.set(key, value, timeout)
+    return value
+
+
+async def aget_or_set(name, namespaces, compute, *parts, timeout=DEFAULT_TIMEOUT):
+    """get_or_set() for async views; compute is a coroutine function"""
+    key = await amake_key(name, namespaces, *parts)
+    value = await cache.aget(key)
+    if value is not None:
+        record_lookup(name, True)
+        return value
+    record_lookup(name, False)
+    value = await compute()
+    await cache.aset(key, value, timeout)
+    return value
+
+
+def cache_stats():
+    """{name: {'hits', 'misses', 'lookups', 'hit_rate'}} for this process since start-up"""
+    with _counters_lock:
+        snapshot = {name: tuple(counts) for name, counts in _counters.items()}
+    return {
+        name: {
+            'hits': hits,
+            'misses': misses,
+            'lookups': hits + misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else None,
+        }
+        for name, (hits, misses) in sorted(snapshot.items())
+    }
+
+
+def reset_stats():
+    with _counters_lock:
+        _counters.clear()
+
+
+# Shared lookups used by several views
+
+async def _alist(queryset):
+    return [row async for row in queryset]
+
+
+def total_words():
+    from .models import WordsBank
+    return get_or_set('total_words', (WORDS,), WordsBank.objects.count)
+
+
+async def atotal_words():
+    from .models import WordsBank
+    return await aget_or_set('total_words', (WORDS,), WordsBank.objects.acount)
+
+
+def word_types():
+    from .models import WordType
+    return get_or_set('word_types', (TAXONOMY,), lambda: list(WordType.objects.order_by('word_type')))
+
+
+async def aword_types():
+    from .models import WordType
+    return await aget_or_set('word_types', (TAXONOMY,), lambda: _alist(WordType.objects.order_by('word_type')))
+
+
+def difficulty_levels():
+    from .models import DifficultyLevel
+    return get_or_set('difficulty_levels', (TAXONOMY,), lambda: list(DifficultyLevel.objects.order_by('level')))
+
+
+async def adifficulty_levels():
+    from .models import DifficultyLevel
+    return await aget_or_set('difficulty_levels', (TAXONOMY,), lambda: _alist(DifficultyLevel.objects.order_by('level')))
+
+
+def word_lists():
+    from .models import WordList
+    return get_or_set('word_lists', (TAXONOMY,), lambda: list(WordList.objects.order_by('word_list_name')))
+
+
+async def aword_lists():
+    from .models import WordList
+    return await aget_or_set('word_lists', (TAXONOMY,), lambda: _alist(WordList.objects.order_by('word_list_name')))
+
+
+def categories_with_counts():
+    """(word types, difficulty levels, word lists), each annotated with word_count"""
+    from django.db.models import Count
+    from .models import DifficultyLevel, WordList, WordType
+
+    # Word counts are annotated in the same query instead of one COUNT per category
+    def counted(model, ordering):
+        return lambda: list(model.objects.annotate(word_count=Count('wordsbank')).order_by(ordering))
+
+    return (
+        get_or_set('word_types_with_counts', (TAXONOMY, WORDS), counted(WordType, 'word_type')),
+        get_or_set('difficulty_levels_with_counts', (TAXONOMY, WORDS), counted(DifficultyLevel, 'level')),
+        get_or_set('word_lists_with_counts', (TAXONOMY, WORDS), counted(WordList, 'word_list_name')),
+    )
+
+
+def recent_words(n=5):
+    from .models import WordsBank
+    return get_or_set(
+        'recent_words', (WORDS,),
+        lambda: list(WordsBank.objects.select_related('word_type', 'difficulty_level').order_by('-created_at')[:n]),
+        n,
+    )
+
+
+async def arecent_words(n=5):
+    from .models import WordsBank
+    return await aget_or_set(
+        'recent_words', (WORDS,),
+        lambda: _alist(WordsBank.objects.select_related('word_type', 'difficulty_level').order_by('-created_at')[:n]),
+        n,
+    )
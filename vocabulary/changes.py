@@ -0,0 +1,158 @@
+"""
+Change feed of words and relationships for client-side sync.
+
+ChangeLog keeps one row per word or relationship: its latest change.
+Recording a change deletes the object's previous row and inserts a new
+one, so the auto-increment id is a monotonic sequence and the log never
+holds more than one row per object. Deletions are recorded the same way
+with deleted=True (tombstones), so a client that was offline still
+learns which of its copies to drop.
+
+Signals record saves, deletes and word list membership changes. The bulk
+paths that skip signals (bulk.WordUpserter, create_word_relationships)
+call record() themselves. Entries are written in the same transaction
+as the change, and SQLite serializes writers, so sequence order is
+commit order and a reader never sees a later id before an earlier one.
+
+A client keeps the cursor of its last page and asks feed(cursor) for
+what changed since. Cursor 0 replays the whole log, which the migration
+that added it seeded with every existing word and relationship. Deck
+bundles carry the cursor they were built at, so a client that started
+from a bundle only syncs what changed after it.
+"""
+
+from django.db import transaction
+from django.db.models import Max
+
+from . import caching
+from .models import ChangeLog, WordRelationship, WordsBank
+from .serializers import split_terms
+
+WORD = 'word'
+RELATIONSHIP = 'relationship'
+PAGE_SIZE = 500
+MAX_PAGE_SIZE = 2000
+RECORD_CHUNK = 500
+
+# word_type and difficulty_level are ids into the lookups sent with every page
+WORD_FIELDS = ['id', 'word', 'pronunciation', 'word_type', 'difficulty_level', 'meaning_english',
+               'meaning_urdu', 'example_sentence', 'synonyms', 'antonyms', 'word_lists']
+RELATIONSHIP_FIELDS = ['id', 'word1', 'word2', 'relationship_type']
+
+
+def record(kind, ids, deleted=False):
+    """Log a change (or deletion) of the kind's objects with these ids"""
+    ids = sorted(set(ids))
+    with transaction.atomic():
+        for start in range(0, len(ids), RECORD_CHUNK):
+            chunk = ids[start:start + RECORD_CHUNK]
+            ChangeLog.objects.filter(kind=kind, object_id__in=chunk).delete()
+            ChangeLog.objects.bulk_create([ChangeLog(kind=kind, object_id=i, deleted=deleted) for i in chunk])
+
+
+def current_cursor():
+    """Cursor of the newest change; a snapshot taken now is complete up to it"""
+    return ChangeLog.objects.aggregate(last=Max('id'))['last'] or 0
+
+
+def parse_cursor(value):
+    """Cursor from a query parameter; ValueError if malformed"""
+    cursor = int(value or 0)
+    if cursor < 0:
+        raise ValueError(value)
+    return cursor
+
+
+def _memberships(ids):
+    return WordsBank.word_lists.through.objects.filter(wordsbank_id__in=ids).values_list('wordsbank_id', 'wordlist_id')
+
+
+def _words(ids):
+    return WordsBank.objects.filter(id__in=ids).order_by('id').values_list(
+        'id', 'word', 'pronunciation', 'word_type_id', 'difficulty_level_id',
+        'meaning_english', 'meaning_urdu', 'example_sentence', 'synonyms', 'antonyms',
+    )
+
+
+def _relationships(ids):
+    return WordRelationship.objects.filter(id__in=ids).order_by('id').values_list(
+        'id', 'word1_id', 'word2_id', 'relationship_type',
+    )
+
+
+def _word_row(row, memberships):
+    return [*row[:8], split_terms(row[8]), split_terms(row[9]), sorted(memberships.get(row[0], []))]
+
+
+def _word_rows(ids):
+    if not ids:
+        return []
+    memberships = {}
+    for word_id, word_list_id in _memberships(ids):
+        memberships.setdefault(word_id, []).append(word_list_id)
+    return [_word_row(row, memberships) for row in _words(ids)]
+
+
+def _relationship_rows(ids):
+    if not ids:
+        return []
+    return [list(row) for row in _relationships(ids)]
+
+
+def _entries(cursor, limit):
+    return ChangeLog.objects.filter(id__gt=cursor).order_by('id').values_list('id', 'kind', 'object_id', 'deleted')[:limit + 1]
+
+
+def _split(entries, limit):
+    """(entries of the page, whether more follow, {kind: changed ids}, {kind: deleted ids})"""
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    changed = {WORD: [], RELATIONSHIP: []}
+    deleted = {WORD: [], RELATIONSHIP: []}
+    for _, kind, object_id, is_deleted in entries:
+        (deleted if is_deleted else changed)[kind].append(object_id)
+    return entries, has_more, changed, deleted
+
+
+def _page(cursor, entries, has_more, deleted, words, relationships, word_types, difficulty_levels, word_lists):
+    # An object deleted after its entry was read has a newer tombstone the next page brings
+    return {
+        'cursor': entries[-1][0] if entries else cursor,
+        'has_more': has_more,
+        'word_fields': WORD_FIELDS,
+        'words': words,
+        'relationship_fields': RELATIONSHIP_FIELDS,
+        'relationships': relationships,
+        'deleted': {'words': deleted[WORD], 'relationships': deleted[RELATIONSHIP]},
+        'word_types': [[t.id, t.word_type] for t in word_types],
+        'difficulty_levels': [[d.id, str(d)] for d in difficulty_levels],
+        'word_lists': [[w.id, w.word_list_name] for w in word_lists],
+    }
+
+
+def feed(cursor=0, limit=PAGE_SIZE):
+    """Page of changes after cursor, oldest first"""
+    entries, has_more, changed, deleted = _split(list(_entries(cursor, limit)), limit)
+    return _page(
+        cursor, entries, has_more, deleted, _word_rows(changed[WORD]), _relationship_rows(changed[RELATIONSHIP]),
+        caching.word_types(), caching.difficulty_levels(), caching.word_lists(),
+    )
+
+
+async def afeed(cursor=0, limit=PAGE_SIZE):
+    """feed() for async views"""
+    entries, has_more, changed, deleted = _split([e async for e in _entries(cursor, limit)], limit)
+
+    words = []
+    if changed[WORD]:
+        memberships = {}
+        async for word_id, word_list_id in _memberships(changed[WORD]):
+            memberships.setdefault(word_id, []).append(word_list_id)
+        words = [_word_row(row, memberships) async for row in _words(changed[WORD])]
+    relationships = [list(row) async for row in _relationships(changed[RELATIONSHIP])] if changed[RELATIONSHIP] else []
+
+    return _page(
+        cursor, entries, has_more, deleted, words, relationships,
+        await caching.aword_types(), await caching.adifficulty_levels(), await caching.aword_lists(),
+    )
@@ -0,0 +1,95 @@
+"""
+SQLite database profiles and the read/write router.
+
+The "basic" profile is Django's default SQLite setup: rollback journal,
+one connection per request. The "production" profile opens the file in
+WAL mode, where readers see the last committed state while a writer
+works, and splits it into two aliases:
+
+- default: the write connection. Every write, every transaction and
+  every bulk job (imports, relationship rebuilds, bundle builds, which
+  all write inside transaction.atomic()) runs here. Transactions start
+  with BEGIN IMMEDIATE, so a second writer waits for the lock
+  (busy_timeout) up front instead of failing with "database is locked"
+  when its read transaction tries to upgrade.
+- replica: read-only connections to the same file (mode=ro, query_only),
+  which ReadWriteRouter uses for reads outside a transaction on default.
+  Reads inside one stay on default so they see its uncommitted writes.
+
+Both keep their connection for CONN_MAX_AGE seconds, so the pragmas are
+paid once per connection rather than per request.
+"""
+
+from pathlib import Path
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+READ_ALIAS = 'replica'
+PROFILES = ('basic', 'production')
+
+# Applied on every new connection; journal_mode is a property of the file and only the writer sets it
+PRAGMAS = {
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # negative: KiB, so 64 MB per connection
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+
+def init_command(pragmas):
+    """OPTIONS['init_command'] running these pragmas"""
+    return ';'.join(f'PRAGMA {name}={value}' for name, value in pragmas.items())
+
+
+def sqlite_databases(path, profile='basic', pragmas=None, conn_max_age=600):
+    """DATABASES for the SQLite file at path under the given profile"""
+    if profile not in PROFILES:
+        raise ValueError(f'Unknown database profile {profile!r}; use one of {", ".join(PROFILES)}')
+    if profile == 'basic':
+        return {DEFAULT_DB_ALIAS: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path}}
+
+    pragmas = {**PRAGMAS, **(pragmas or {})}
+    shared = {'ENGINE': 'django.db.backends.sqlite3', 'CONN_MAX_AGE': conn_max_age, 'CONN_HEALTH_CHECKS': True}
+    return {
+        DEFAULT_DB_ALIAS: {
+            **shared,
+            'NAME': path,
+            'OPTIONS': {
+                'init_command': init_command({'journal_mode': 'WAL', **pragmas}),
+                'transaction_mode': 'IMMEDIATE',
+            },
+        },
+        READ_ALIAS: {
+            **shared,
+            'NAME': f'{Path(path).resolve().as_uri()}?mode=ro',
+            'OPTIONS': {'init_command': init_command({**pragmas, 'query_only': 'ON'})},
+            'TEST': {'MIRROR': DEFAULT_DB_ALIAS},
+        },
+    }
+
+
+def _separate_reads():
+    if READ_ALIAS not in connections.settings:
+        return False
+    # A test mirror points at the default database and would only add a connection that can't see its transaction
+    if connections[READ_ALIAS].settings_dict['NAME'] == connections[DEFAULT_DB_ALIAS].settings_dict['NAME']:
+        return False
+    return not connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+class ReadWriteRouter:
+    """Reads on the read-only alias outside transactions; writes and migrations on default"""
+
+    def db_for_read(self, model, **hints):
+        return READ_ALIAS if _separate_reads() else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Without this, saving an instance read from the replica would go back to it
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
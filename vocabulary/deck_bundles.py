@@ -0,0 +1,178 @@
+"""
+Precompiled, compressed flashcard decks per WordList and for the whole bank.
+
+A bundle is one gzip-compressed JSON document holding every card of its
+deck in word order. Word types and difficulty levels are interned into
+small lookup arrays that the rows point into by index. Bundles are stored
+in DeckBundle and served with a strong ETag (a hash of the compressed
+bytes), so the flashcard page downloads a deck once and afterwards only
+revalidates it.
+
+Each bundle remembers a fingerprint of the rows it was built from: a hash
+of the member ids in id order, the newest updated_at, and the
+type/level/list names. The
+fingerprint is cached in the words and taxonomy caching namespaces, so
+checking freshness is free until member words change. The first request
+after a change rebuilds the bundle. `manage.py build_deck_bundles` builds
+them ahead of time, e.g. after an import. Each bundle records the change
+feed cursor it was built at (see vocabulary/changes.py).
+"""
+
+import gzip
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+
+from . import caching, changes
+from .models import DeckBundle, DifficultyLevel, WordList, WordsBank, WordType
+from .nplusone import allow_repeated_queries
+from .serializers import split_terms
+
+ALL = 'all'
+FORMAT = 2
+FIELDS = ['id', 'word', 'pronunciation', 'word_type', 'difficulty_level',
+          'meaning_english', 'meaning_urdu', 'example_sentence', 'synonyms', 'antonyms']
+# Larger decks are paged from the deck API instead of downloaded whole
+MAX_WORDS = getattr(settings, 'VOCABULARY_DECK_BUNDLE_MAX_WORDS', 20000)
+
+
+def key_for(word_list_id=None):
+    return f'list-{word_list_id}' if word_list_id else ALL
+
+
+def parse_key(key):
+    """word_list_id (None for the whole bank) of a bundle key; ValueError if malformed"""
+    if key == ALL:
+        return None
+    prefix, _, word_list_id = key.partition('-')
+    if prefix != 'list' or not word_list_id.isdigit():
+        raise ValueError(key)
+    return int(word_list_id)
+
+
+def _members(word_list_id):
+    words = WordsBank.objects.order_by()
+    if word_list_id:
+        words = words.filter(Exists(WordsBank.word_lists.through.objects.filter(
+            wordlist_id=word_list_id, wordsbank_id=OuterRef('pk'),
+        )))
+    return words
+
+
+def _fingerprint(word_list_id):
+    """(fingerprint, word count) of the deck's source rows"""
+    def compute():
+        members = _members(word_list_id)
+        # Swapping members keeps a count or an id sum, so the ids themselves are hashed
+        ids = hashlib.sha256()
+        word_count = 0
+        for word_id in members.order_by('id').values_list('id', flat=True).iterator(chunk_size=5000):
+            ids.update(b'%d,' % word_id)
+            word_count += 1
+        newest = members.aggregate(newest=Max('updated_at'))['newest']
+        names = [
+            list(WordType.objects.order_by('id').values_list('id', 'word_type')),
+            list(DifficultyLevel.objects.order_by('id').values_list('id', 'level')),
+            list(WordList.objects.filter(id=word_list_id).values_list('word_list_name', flat=True)),
+        ]
+        source = json.dumps([FORMAT, ids.hexdigest(), str(newest), names])
+        return hashlib.sha256(source.encode()).hexdigest(), word_count
+
+    return caching.get_or_set('deck_fingerprint', (caching.WORDS, caching.TAXONOMY), compute, key_for(word_list_id))
+
+
+def compile_deck(word_list_id=None):
+    """(gzip-compressed JSON bytes, word count) for the deck"""
+    word_types, word_type_index = [], {}
+    levels, level_index = [], {}
+    for word_type in WordType.objects.order_by('id'):
+        word_type_index[word_type.id] = len(word_types)
+        word_types.append([word_type.id, str(word_type)])
+    for level in DifficultyLevel.objects.order_by('id'):
+        level_index[level.id] = len(levels)
+        levels.append([level.id, str(level)])
+
+    # Read before the rows, so replaying the feed from here covers anything the deck misses
+    cursor = changes.current_cursor()
+    rows = _members(word_list_id).order_by('word', 'id').values_list(
+        'id', 'word', 'pronunciation', 'word_type_id', 'difficulty_level_id',
+        'meaning_english', 'meaning_urdu', 'example_sentence', 'synonyms', 'antonyms',
+    )
+    words = [
+        [word_id, word, pronunciation, word_type_index[type_id], level_index.get(level_id),
+         english, urdu, example, split_terms(synonyms), split_terms(antonyms)]
+        for word_id, word, pronunciation, type_id, level_id, english, urdu, example, synonyms, antonyms
+        in rows.iterator(chunk_size=2000)
+    ]
+    document = {
+        'format': FORMAT,
+        'key': key_for(word_list_id),
+        'changes_cursor': cursor,
+        'fields': FIELDS,
+        'word_types': word_types,
+        'difficulty_levels': levels,
+        'words': words,
+    }
+    raw = json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode()
+    # mtime=0 keeps the bytes, and so the ETag, identical for identical decks
+    return gzip.compress(raw, compresslevel=9, mtime=0), len(words)
+
+
+def build(word_list_id=None, fingerprint=None):
+    """Compile and store the deck's bundle; returns the DeckBundle"""
+    key = key_for(word_list_id)
+    fingerprint = fingerprint or _fingerprint(word_list_id)[0]
+    content, word_count = compile_deck(word_list_id)
+    values = {
+        'word_list_id': word_list_id,
+        'etag': hashlib.sha256(content).hexdigest()[:32],
+        'fingerprint': fingerprint,
+        'content': content,
+        'word_count': word_count,
+        'size': len(content),
+        'built_at': timezone.now(),
+    }
+    try:
+        bundle, _ = DeckBundle.objects.update_or_create(key=key, defaults=values)
+    except IntegrityError:
+        # Another request built it at the same moment
+        DeckBundle.objects.filter(key=key).update(**values)
+        bundle = DeckBundle(key=key, **values)
+    return bundle
+
+
+def get_bundle(word_list_id=None):
+    """The deck's up-to-date bundle, rebuilt first if its words changed (content loaded lazily)"""
+    fingerprint, _ = _fingerprint(word_list_id)
+    bundle = DeckBundle.objects.defer('content').filter(key=key_for(word_list_id)).first()
+    if bundle is None or bundle.fingerprint != fingerprint:
+        bundle = build(word_list_id, fingerprint)
+    return bundle
+
+
+def current_version(word_list_id=None):
+    """(etag or None if stale/unbuilt, word count) without building anything"""
+    fingerprint, word_count = _fingerprint(word_list_id)
+    etag = (
+        DeckBundle.objects.filter(key=key_for(word_list_id), fingerprint=fingerprint)
+        .values_list('etag', flat=True).first()
+    )
+    return etag, word_count
+
+
+@allow_repeated_queries()
+def build_stale(force=False):
+    """Build every missing or outdated bundle (or all with force); returns the keys built"""
+    stored = dict(DeckBundle.objects.values_list('key', 'fingerprint'))
+    built = []
+    # One fingerprint (and possibly one build) per deck
+    for word_list_id in [None] + list(WordList.objects.order_by('id').values_list('id', flat=True)):
+        fingerprint = _fingerprint(word_list_id)[0]
+        if force or stored.get(key_for(word_list_id)) != fingerprint:
+            build(word_list_id, fingerprint)
+            built.append(key_for(word_list_id))
+    return built
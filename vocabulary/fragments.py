@@ -0,0 +1,90 @@
+"""
+Per-word fragment cache for rendered word cards and flashcard payloads.
+
+A card only changes when its word is saved (updated_at), when its own
+word type or difficulty level is renamed (their names) or, for word list
+cards, when its synonyms/antonyms or their names change (relationships
+namespace, which signals also bump when a related word is renamed). Those
+go into the key together with the active language, so entries never need
+deleting and saving one word leaves every other card cached. A page of
+cards is fetched with one get_many; only the misses are rendered (and only
+they pay for relationship lookups) and written back with one set_many.
+"""
+
+import hashlib
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils import translation
+from django.utils.safestring import mark_safe
+
+from . import caching
+from .relationship_graph import attach_related
+from .serializers import serialize_word
+
+WORD_CARD_TEMPLATE = 'vocabulary/word_card.html'
+
+
+def _labels(word):
+    # Names are free text, so they go into the key hashed
+    labels = f'{word.word_type}|{word.difficulty_level if word.difficulty_level_id else ""}'
+    return hashlib.md5(labels.encode()).hexdigest()[:12]
+
+
+def _keys(kind, words, namespaces, current):
+    prefix = ':'.join([f'vocabulary:{kind}', translation.get_language() or ''] + [f'{ns}{current[ns]}' for ns in namespaces])
+    return [f'{prefix}:{w.id}:{w.updated_at.timestamp()}:{_labels(w)}' for w in words]
+
+
+def _misses(kind, keys, words, found):
+    missing = [(key, word) for key, word in zip(keys, words) if key not in found]
+    caching.record_lookup(kind, True, len(found))
+    caching.record_lookup(kind, False, len(missing))
+    return missing
+
+
+def _cached_many(kind, words, namespaces, build):
+    """[value per word] using one get_many, building and storing only the misses"""
+    words = list(words)
+    keys = _keys(kind, words, namespaces, caching.versions(*namespaces))
+    found = cache.get_many(keys)
+
+    missing = _misses(kind, keys, words, found)
+    if missing:
+        built = build([word for _, word in missing])
+        fresh = {key: value for (key, _), value in zip(missing, built)}
+        cache.set_many(fresh)
+        found.update(fresh)
+    return [found[key] for key in keys]
+
+
+async def _acached_many(kind, words, namespaces, build):
+    keys = _keys(kind, words, namespaces, await caching.aversions(*namespaces))
+    found = await cache.aget_many(keys)
+
+    missing = _misses(kind, keys, words, found)
+    if missing:
+        built = build([word for _, word in missing])
+        fresh = {key: value for (key, _), value in zip(missing, built)}
+        await cache.aset_many(fresh)
+        found.update(fresh)
+    return [found[key] for key in keys]
+
+
+def render_word_cards(words):
+    """Rendered word_card.html for each word, as safe HTML strings"""
+    def build(missed):
+        return [render_to_string(WORD_CARD_TEMPLATE, {'word': word}) for word in attach_related(missed)]
+
+    cards = _cached_many('word_card', words, (caching.RELATIONSHIPS,), build)
+    return [mark_safe(card) for card in cards]
+
+
+def serialize_cards(words):
+    """serialize_word() for each word, cached the same way for the flashcard deck"""
+    return _cached_many('flashcard', words, (), lambda missed: [serialize_word(w) for w in missed])
+
+
+async def aserialize_cards(words):
+    """serialize_cards() for async views; words is a list"""
+    return await _acached_many('flashcard', words, (), lambda missed: [serialize_word(w) for w in missed])
@@ -0,0 +1,215 @@
+"""
+In-process load test of the WSGI and ASGI entry points.
+
+Simulated learners send the read requests of a study session (deck pages,
+a search, the change feed, the dashboard) back to back for a fixed time,
+each with its own logged-in session. On the WSGI side requests run on a
+fixed pool of worker threads, like a threaded server (gunicorn gthread,
+mod_wsgi). A request that finds every thread busy waits, and the wait
+counts towards its latency. On the ASGI side the ASGI application is
+called from one event loop, as uvicorn does.
+
+Each run routes the read endpoints either to the sync views or to their
+async versions (async_views.py), as VOCABULARY_ASYNC_VIEWS would.
+
+No sockets or HTTP parsing are involved, so the numbers compare Django's
+two handlers and the views behind them, not HTTP servers. Run it through
+`manage.py loadtest`, which uses the seeded benchmark database.
+"""
+
+import asyncio
+import importlib
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
+from django.test import Client, override_settings
+from django.urls import clear_url_caches, reverse
+
+from . import changes, urls
+from .benchmarks import percentile
+from .models import WordList, WordsBank
+
+HOST = 'testserver'
+
+
+VIEWS = ('sync', 'async')
+
+
+def _reload_urls():
+    # urls.py picks the views when it is imported, and the root URLconf holds on to that module
+    importlib.reload(urls)
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+@contextmanager
+def read_views(views):
+    """Route the read endpoints to the 'sync' or 'async' views inside the block"""
+    try:
+        with override_settings(VOCABULARY_ASYNC_VIEWS=views == 'async'):
+            _reload_urls()
+            yield
+    finally:
+        _reload_urls()
+
+
+def session_cookies(n):
+    """Session cookies of up to n learners, logged in once each"""
+    cookies = []
+    for user in User.objects.filter(is_staff=False).order_by('id')[:n]:
+        client = Client()
+        client.force_login(user)
+        cookies.append(f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}')
+    return cookies
+
+
+def study_session():
+    """[(path, query string)] one learner cycles through"""
+    word = WordsBank.objects.order_by('id').first()
+    word_list = WordList.objects.order_by('id').first()
+    url = lambda name: reverse(f'vocabulary:{name}')
+    return [
+        (url('deck_api'), ''),
+        (url('deck_api'), urlencode({'list': word_list.id})),
+        (url('deck_api'), urlencode({'q': word.word[:4]})),
+        (url('changes_api'), urlencode({'since': max(changes.current_cursor() - 50, 0)})),
+        (url('dashboard'), ''),
+    ]
+
+
+def _wsgi_request(app, path, query, cookie):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': HOST,
+        'HTTP_COOKIE': cookie,
+        'HTTP_ACCEPT_ENCODING': 'gzip',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    status = []
+    body = app(environ, lambda s, headers, exc_info=None: status.append(s))
+    try:
+        b''.join(body)
+    finally:
+        # Fires request_finished, which closes the database connection
+        if hasattr(body, 'close'):
+            body.close()
+    return int(status[0].split()[0])
+
+
+async def _asgi_request(app, path, query, cookie):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', HOST.encode()), (b'cookie', cookie.encode()), (b'accept-encoding', b'gzip')],
+        'client': ('127.0.0.1', 50000),
+        'server': (HOST, 80),
+    }
+    disconnected = asyncio.Event()
+    messages = iter([{'type': 'http.request', 'body': b'', 'more_body': False}])
+    status = []
+
+    async def receive():
+        message = next(messages, None)
+        if message is None:
+            # Django listens for a disconnect while the view runs; the client never leaves
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+        return message
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+async def _drive(request, concurrency, duration, session, cookies):
+    """Closed loop of concurrency learners for duration seconds; returns (latencies, errors, elapsed)"""
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    deadline = started + duration
+
+    async def learner(i):
+        nonlocal errors
+        cookie = cookies[i % len(cookies)]
+        # Start learners at different steps so the mix is even from the first second
+        step = i
+        while time.perf_counter() < deadline:
+            path, query = session[step % len(session)]
+            step += 1
+            sent = time.perf_counter()
+            status = await request(path, query, cookie)
+            latencies.append(time.perf_counter() - sent)
+            if status >= 400:
+                errors += 1
+
+    await asyncio.gather(*(learner(i) for i in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def run(interface, concurrency, duration=10.0, warmup=1.0, wsgi_threads=32, cookies=None, session=None, views='sync'):
+    """Throughput and latency percentiles of one interface ('wsgi' or 'asgi') and views at one concurrency"""
+    with read_views(views):
+        result = _run(interface, concurrency, duration, warmup, wsgi_threads, cookies, session)
+    return {'views': views, **result}
+
+
+def _run(interface, concurrency, duration, warmup, wsgi_threads, cookies, session):
+    cookies = cookies or session_cookies(concurrency)
+    session = session or study_session()
+
+    async def main():
+        if interface == 'wsgi':
+            app = get_wsgi_application()
+            loop = asyncio.get_running_loop()
+            with ThreadPoolExecutor(max_workers=wsgi_threads) as pool:
+                request = lambda path, query, cookie: loop.run_in_executor(
+                    pool, _wsgi_request, app, path, query, cookie,
+                )
+                await _drive(request, min(concurrency, wsgi_threads), warmup, session, cookies)
+                return await _drive(request, concurrency, duration, session, cookies)
+        app = get_asgi_application()
+        request = lambda path, query, cookie: _asgi_request(app, path, query, cookie)
+        await _drive(request, concurrency, warmup, session, cookies)
+        return await _drive(request, concurrency, duration, session, cookies)
+
+    latencies, errors, elapsed = asyncio.run(main())
+    ms = sorted(t * 1000 for t in latencies)
+    return {
+        'interface': interface,
+        'concurrency': concurrency,
+        'requests': len(ms),
+        'errors': errors,
+        'throughput_rps': round(len(ms) / elapsed, 1),
+        'p50_ms': round(percentile(ms, 50), 2),
+        'p95_ms': round(percentile(ms, 95), 2),
+        'p99_ms': round(percentile(ms, 99), 2),
+    }
@@ -0,0 +1,102 @@
+import json
+import os
+import platform
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from vocabulary import benchmarks
+
+BENCHMARK_DIR = benchmarks.BENCHMARK_DIR
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every vocabulary view and the bulk commands on a seeded database and compare with a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=benchmarks.SCALES, default='small',
+                            help='Synthetic data size: small (3.5k words), medium (50k) or large (500k)')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per view')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per view before timing')
+        parser.add_argument('--command-repeat', type=int, default=3, help='Timed runs per command')
+        parser.add_argument('--import-size', type=int, default=1000, help='Words per load_vocabulary/save_to_database run')
+        parser.add_argument('--only', action='append', default=[], help='Only run cases whose name contains this (repeatable)')
+        parser.add_argument('--db-file', help='SQLite file for the benchmark database, reused between runs '
+                                              '(default: .benchmarks/<scale>.sqlite3)')
+        parser.add_argument('--reseed', action='store_true', help='Empty and reseed the benchmark database')
+        parser.add_argument('--output', help='Where to write the results (default: .benchmarks/latest-<scale>.json)')
+        parser.add_argument('--baseline', help='Baseline to compare with (default: .benchmarks/baseline-<scale>.json)')
+        parser.add_argument('--save-baseline', action='store_true', help='Also write the results as the new baseline')
+        parser.add_argument('--latency-tolerance', type=float, default=0.25,
+                            help='Allowed p95 latency growth as a fraction of the baseline')
+        parser.add_argument('--min-delta-ms', type=float, default=5.0,
+                            help='Ignore p95 latency growth smaller than this many milliseconds')
+        parser.add_argument('--query-tolerance', type=int, default=0, help='Allowed extra SQL queries per case')
+
+    def handle(self, *args, **options):
+        scale_name = options['scale']
+        scale = benchmarks.SCALES[scale_name]
+        output = options['output'] or os.path.join(BENCHMARK_DIR, f'latest-{scale_name}.json')
+        baseline_path = options['baseline'] or os.path.join(BENCHMARK_DIR, f'baseline-{scale_name}.json')
+
+        with benchmarks.benchmark_database(scale_name, options['db_file'], options['reseed'], log=self.stdout.write):
+            results = self.run_benchmarks(options)
+
+        report = {
+            'scale': scale_name,
+            'size': scale,
+            'recorded_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'results': results,
+        }
+        self.write_json(output, report)
+        self.stdout.write(f'Results written to {output}')
+        if options['save_baseline']:
+            self.write_json(baseline_path, report)
+            self.stdout.write(self.style.SUCCESS(f'Baseline saved to {baseline_path}'))
+            return
+
+        failed = [name for name, r in results.items() if r.get('status', 200) >= 400]
+        if failed:
+            raise CommandError(f"Requests failed: {', '.join(failed)}")
+
+        if not os.path.exists(baseline_path):
+            self.stdout.write(self.style.WARNING(f'No baseline at {baseline_path}; run with --save-baseline to create one'))
+            return
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if baseline.get('size') != scale:
+            raise CommandError(f'{baseline_path} was recorded at a different scale')
+        regressions = benchmarks.compare(
+            results, baseline['results'],
+            latency_tolerance=options['latency_tolerance'],
+            query_tolerance=options['query_tolerance'],
+            min_delta_ms=options['min_delta_ms'],
+        )
+        if regressions:
+            raise CommandError('Performance regressions against the baseline:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+
+    def run_benchmarks(self, options):
+        uncovered = benchmarks.uncovered_urls(benchmarks.view_cases())
+        if uncovered:
+            raise CommandError(f"No benchmark case requests these URLs: {', '.join(uncovered)}")
+
+        results = benchmarks.run_views(options['repeat'], options['warmup'], options['only'])
+        results.update(benchmarks.run_commands(options['command_repeat'], options['import_size'], options['only']))
+
+        self.stdout.write(f"{'case':<40} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8}")
+        for name, r in results.items():
+            if 'skipped' in r:
+                self.stdout.write(f"{name:<40} skipped: {r['skipped']}")
+            else:
+                self.stdout.write(f"{name:<40} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} {r['queries']:>8}")
+        return results
+
+    def write_json(self, path, data):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
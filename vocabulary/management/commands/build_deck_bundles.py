@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+from vocabulary import deck_bundles
+
+
+class Command(BaseCommand):
+    help = 'Compile the compressed flashcard deck bundles (whole bank and each word list) whose words changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild every bundle, even if up to date')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        built = deck_bundles.build_stale(force=options['force'])
+        if built:
+            self.stdout.write(self.style.SUCCESS(
+                f"Built {len(built)} deck bundles in {time.perf_counter() - started:.1f}s: {', '.join(built)}"
+            ))
+        else:
+            self.stdout.write('All deck bundles are up to date')
@@ -0,0 +1,13 @@
+import time
+
+from django.core.management.base import BaseCommand
+from vocabulary import quiz
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the distractor pool of every (word type, difficulty level) bucket used by quizzes'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        built = quiz.build_all()
+        self.stdout.write(self.style.SUCCESS(f'Built {built} distractor pools in {time.perf_counter() - started:.1f}s'))
@@ -1,4 +1,9 @@
+import time
+
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from vocabulary import changes, relationship_graph
 from vocabulary.models import WordsBank, WordRelationship
 
 class Command(BaseCommand):
@@ -6,70 +11,64 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('--dry-run', action='store_true', help='Show what would be created without actually creating')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Relationships inserted per bulk_create call')
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
-        
+        batch_size = options['batch_size']
+
         if dry_run:
             self.stdout.write(self.style.WARNING('DRY RUN MODE - No data will be created'))
-        
-        created_synonyms = 0
-        created_antonyms = 0
-        skipped = 0
-        
-        words = WordsBank.objects.all()
-        total_words = words.count()
-        
+
+        started = time.perf_counter()
+
+        # One query for the whole table: ids, names and the comma-separated fields
+        words = list(WordsBank.objects.order_by('word').values_list('id', 'word', 'synonyms', 'antonyms'))
+        total_words = len(words)
+        words_by_name = {}
+        for word_id, word, _, _ in words:
+            words_by_name.setdefault(word.lower(), (word_id, word))
+
         self.stdout.write(f'Processing {total_words} words...')
-        
-        for i, word in enumerate(words, 1):
+
+        # Canonical (min id, max id, type) pairs -> the names first seen for them, in first-seen order
+        pairs = {}
+        skipped = 0
+
+        for i, (word_id, word, synonyms, antonyms) in enumerate(words, 1):
             if i % 100 == 0:
                 self.stdout.write(f'Processed {i}/{total_words} words...')
-            
-            # Process synonyms
-            if word.synonyms:
-                synonym_list = [s.strip().lower() for s in word.synonyms.split(',') if s.strip()]
-                for synonym_text in synonym_list:
-                    try:
-                        synonym_word = WordsBank.objects.get(word__iexact=synonym_text)
-                        if not dry_run:
-                            relationship, created = WordRelationship.objects.get_or_create(
-                                word1=min(word, synonym_word, key=lambda w: w.id),
-                                word2=max(word, synonym_word, key=lambda w: w.id),
-                                relationship_type='synonym'
-                            )
-                            if created:
-                                created_synonyms += 1
-                        else:
-                            created_synonyms += 1
-                            self.stdout.write(f'Would create synonym: {word.word} ↔ {synonym_word.word}')
-                    except WordsBank.DoesNotExist:
-                        skipped += 1
-                        if dry_run:
-                            self.stdout.write(f'Synonym not found: "{synonym_text}" for word "{word.word}"')
-            
-            # Process antonyms
-            if word.antonyms:
-                antonym_list = [a.strip().lower() for a in word.antonyms.split(',') if a.strip()]
-                for antonym_text in antonym_list:
-                    try:
-                        antonym_word = WordsBank.objects.get(word__iexact=antonym_text)
-                        if not dry_run:
-                            relationship, created = WordRelationship.objects.get_or_create(
-                                word1=min(word, antonym_word, key=lambda w: w.id),
-                                word2=max(word, antonym_word, key=lambda w: w.id),
-                                relationship_type='antonym'
-                            )
-                            if created:
-                                created_antonyms += 1
-                        else:
-                            created_antonyms += 1
-                            self.stdout.write(f'Would create antonym: {word.word} ↔ {antonym_word.word}')
-                    except WordsBank.DoesNotExist:
+
+            for relationship_type, text in (('synonym', synonyms), ('antonym', antonyms)):
+                if not text:
+                    continue
+                for related_text in [t.strip().lower() for t in text.split(',') if t.strip()]:
+                    related = words_by_name.get(related_text)
+                    if related is None:
                         skipped += 1
                         if dry_run:
-                            self.stdout.write(f'Antonym not found: "{antonym_text}" for word "{word.word}"')
-        
+                            self.stdout.write(f'{relationship_type.title()} not found: "{related_text}" for word "{word}"')
+                        continue
+
+                    related_id, related_word = related
+                    pairs.setdefault((min(word_id, related_id), max(word_id, related_id), relationship_type), (word, related_word))
+
+        compute_time = time.perf_counter() - started
+
+        if dry_run:
+            # Report what the real run would insert: each pair once, minus the ones already stored
+            existing = set(WordRelationship.objects.values_list('word1_id', 'word2_id', 'relationship_type'))
+            new_pairs = [(pair, names) for pair, names in pairs.items() if pair not in existing]
+            for (_, _, relationship_type), (word, related_word) in new_pairs:
+                self.stdout.write(f'Would create {relationship_type}: {word} ↔ {related_word}')
+            created_synonyms = sum(1 for (_, _, relationship_type), _ in new_pairs if relationship_type == 'synonym')
+            created_antonyms = len(new_pairs) - created_synonyms
+            insert_time = 0
+        else:
+            insert_started = time.perf_counter()
+            created_synonyms, created_antonyms = self.insert_pairs(list(pairs), batch_size)
+            insert_time = time.perf_counter() - insert_started
+
         # Summary
         self.stdout.write('\n' + '='*50)
         self.stdout.write(self.style.SUCCESS(f'SUMMARY:'))
@@ -77,8 +76,37 @@ class Command(BaseCommand):
         self.stdout.write(f'Antonym relationships created: {created_antonyms}')
         self.stdout.write(f'Words not found (skipped): {skipped}')
         self.stdout.write(f'Total relationships: {created_synonyms + created_antonyms}')
-        
+
         if dry_run:
             self.stdout.write(self.style.WARNING('\nThis was a DRY RUN. Run without --dry-run to actually create relationships.'))
         else:
-            self.stdout.write(self.style.SUCCESS('\nWord relationships created successfully!'))
\ No newline at end of file
+            rate = len(pairs) / insert_time if insert_time else 0
+            self.stdout.write(f'Matched {len(pairs)} relationships in {compute_time:.2f}s')
+            self.stdout.write(f'Inserted in {insert_time:.2f}s ({rate:,.0f} rows/s)')
+            self.stdout.write(self.style.SUCCESS('\nWord relationships created successfully!'))
+
+    def insert_pairs(self, pairs, batch_size):
+        """Bulk insert canonical pairs, returning how many synonyms/antonyms were new"""
+        def counts():
+            return (
+                WordRelationship.objects.filter(relationship_type='synonym').count(),
+                WordRelationship.objects.filter(relationship_type='antonym').count(),
+            )
+
+        with transaction.atomic():
+            synonyms_before, antonyms_before = counts()
+            last_id = WordRelationship.objects.aggregate(last=Max('id'))['last'] or 0
+            for start in range(0, len(pairs), batch_size):
+                WordRelationship.objects.bulk_create(
+                    [
+                        WordRelationship(word1_id=word1_id, word2_id=word2_id, relationship_type=relationship_type)
+                        for word1_id, word2_id, relationship_type in pairs[start:start + batch_size]
+                    ],
+                    ignore_conflicts=True,
+                )
+            synonyms_after, antonyms_after = counts()
+            # bulk_create skips post_save, so invalidate the cached graph and log the new rows explicitly
+            transaction.on_commit(relationship_graph.invalidate)
+            changes.record(changes.RELATIONSHIP, WordRelationship.objects.filter(id__gt=last_id).values_list('id', flat=True))
+
+        return synonyms_after - synonyms_before, antonyms_after - antonyms_before
@@ -0,0 +1,42 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from vocabulary import review_counters
+
+
+class Command(BaseCommand):
+    help = 'Write buffered WordsBank review counters (times_reviewed, last_reviewed) to the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, default=0,
+                            help='Keep running and flush every N seconds (stops cleanly on SIGTERM/SIGINT)')
+
+    def handle(self, *args, **options):
+        interval = options['every']
+        if not interval:
+            self.flush()
+            return
+
+        stopping = []
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: stopping.append(True))
+
+        self.stdout.write(f'Flushing review counters every {interval:g}s')
+        while not stopping:
+            self.flush()
+            close_old_connections()
+            deadline = time.monotonic() + interval
+            while not stopping and time.monotonic() < deadline:
+                time.sleep(min(1.0, interval))
+        # One last pass so nothing counted before the signal is left behind
+        self.flush()
+
+    def flush(self):
+        started = time.perf_counter()
+        flushed = review_counters.flush()
+        if flushed:
+            self.stdout.write(self.style.SUCCESS(
+                f'Flushed counters for {flushed} words in {time.perf_counter() - started:.3f}s'
+            ))
@@ -0,0 +1,174 @@
+import csv
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from vocabulary.bulk import WordUpserter, chunked
+from vocabulary.models import WordList
+
+FORMATS = ('csv', 'jsonl', 'xlsx')
+
+
+def _normalize_header(name):
+    return str(name or '').strip().lower().replace(' ', '_')
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = [_normalize_header(h) for h in next(reader, [])]
+        for row in reader:
+            yield dict(zip(header, row))
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            # Bad rows are kept so row counting (and resuming) stays aligned with the file
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield {'word': None, '_error': f'invalid JSON on line {line_number}'}
+                continue
+            if isinstance(record, dict):
+                yield record
+            else:
+                yield {'word': None, '_error': f'expected a JSON object on line {line_number}'}
+
+
+def read_xlsx(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise CommandError('Reading .xlsx files requires openpyxl (pip install openpyxl)')
+
+    workbook = load_workbook(path, read_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_normalize_header(h) for h in next(rows, [])]
+        for row in rows:
+            if any(cell is not None for cell in row):
+                yield {key: '' if value is None else str(value) for key, value in zip(header, row)}
+    finally:
+        workbook.close()
+
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl, 'xlsx': read_xlsx}
+
+
+class Checkpoint:
+    """Rows of a file already committed, stored next to the file as JSON"""
+
+    def __init__(self, path, source):
+        self.path = path
+        stat = os.stat(source)
+        self.fingerprint = {'source': os.path.abspath(source), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if data.get('fingerprint') != self.fingerprint:
+            return 0
+        return data.get('rows_done', 0)
+
+    def save(self, rows_done):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'fingerprint': self.fingerprint, 'rows_done': rows_done}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Command(BaseCommand):
+    help = 'Stream vocabulary records from CSV, JSONL or XLSX files into the words bank'
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help='Files with one word per row (header row for CSV/XLSX)')
+        parser.add_argument('--format', choices=FORMATS, help='File format (default: from the file extension)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows inserted per transaction')
+        parser.add_argument('--word-list', help='Add newly created words to this word list (created if missing)')
+        parser.add_argument('--word-list-description', default='', help='Description used when creating --word-list')
+        parser.add_argument('--update-existing', action='store_true', help='Overwrite fields of words that already exist')
+        parser.add_argument('--no-resume', action='store_true', help='Ignore any checkpoint and start from the first row')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the files without writing anything')
+
+    def handle(self, *args, **options):
+        word_lists = []
+        if options['word_list'] and not options['dry_run']:
+            word_list, _ = WordList.objects.get_or_create(
+                word_list_name=options['word_list'],
+                defaults={'description': options['word_list_description']},
+            )
+            word_lists.append(word_list)
+
+        for path in options['files']:
+            if not os.path.exists(path):
+                raise CommandError(f'File not found: {path}')
+            file_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+            if file_format not in READERS:
+                raise CommandError(f'Unsupported format "{file_format}" for {path}; use --format')
+            self.load_file(path, READERS[file_format], word_lists, options)
+
+    def load_file(self, path, reader, word_lists, options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        checkpoint = Checkpoint(path + '.checkpoint.json', path)
+        if options['no_resume']:
+            checkpoint.clear()
+        skip = 0 if dry_run else checkpoint.load()
+
+        self.stdout.write(f'Loading {path}...')
+        if skip:
+            self.stdout.write(self.style.WARNING(f'Resuming after {skip} rows already loaded'))
+
+        upserter = WordUpserter(word_lists, update_existing=options['update_existing'])
+        rows_done = 0
+        started = time.perf_counter()
+
+        for batch in chunked(reader(path), batch_size):
+            batch_start = rows_done
+            rows_done += len(batch)
+            if rows_done <= skip:
+                continue
+            if batch_start < skip:
+                batch = batch[skip - batch_start:]
+
+            upserter.errors.extend((r.get('word'), r['_error']) for r in batch if r.get('_error'))
+            batch = [r for r in batch if not r.get('_error')]
+            if dry_run:
+                upserter.clean_batch(batch)
+            else:
+                upserter.save_batch(batch)
+                checkpoint.save(rows_done)
+
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'  {rows_done} rows | created {upserter.created}, updated {upserter.updated}, '
+                f'existing {upserter.existing}, invalid {len(upserter.errors)} | '
+                f'{(rows_done - skip) / elapsed:,.0f} rows/s'
+            )
+
+        for word, error in upserter.errors[:20]:
+            self.stdout.write(self.style.ERROR(f'  Skipped {word or "<row>"}: {error}'))
+        if len(upserter.errors) > 20:
+            self.stdout.write(self.style.ERROR(f'  ... and {len(upserter.errors) - 20} more invalid rows'))
+
+        elapsed = time.perf_counter() - started
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f'DRY RUN: {rows_done} rows checked, {len(upserter.errors)} invalid'))
+        else:
+            checkpoint.clear()
+            self.stdout.write(self.style.SUCCESS(
+                f'Finished {path}: {upserter.created} created, {upserter.updated} updated, '
+                f'{upserter.existing} already existed in {elapsed:.1f}s'
+            ))
@@ -0,0 +1,79 @@
+import json
+import os
+import platform
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from vocabulary import benchmarks, loadtest
+
+
+class Command(BaseCommand):
+    help = 'Compare WSGI and ASGI throughput and latency of the sync and async read endpoints under concurrent learners'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=benchmarks.SCALES, default='small',
+                            help='Synthetic data size: small (3.5k words), medium (50k) or large (500k)')
+        parser.add_argument('--concurrency', default='50,200,1000',
+                            help='Comma-separated numbers of concurrent learners')
+        parser.add_argument('--interfaces', default='wsgi,asgi', help='Comma-separated: wsgi, asgi')
+        parser.add_argument('--views', default='sync,async', help='Comma-separated: sync, async (see VOCABULARY_ASYNC_VIEWS)')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds of load per run')
+        parser.add_argument('--warmup', type=float, default=1.0, help='Untimed seconds of load before each run')
+        parser.add_argument('--wsgi-threads', type=int, default=32, help='Worker threads of the simulated WSGI server')
+        parser.add_argument('--db-file', help='SQLite file for the benchmark database, shared with `benchmark` '
+                                              '(default: .benchmarks/<scale>.sqlite3)')
+        parser.add_argument('--output', help='Where to write the results (default: .benchmarks/load-<scale>.json)')
+
+    def handle(self, *args, **options):
+        scale_name = options['scale']
+        try:
+            levels = [int(c) for c in options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError('--concurrency must be comma-separated integers')
+        interfaces = [i.strip() for i in options['interfaces'].split(',')]
+        unknown = set(interfaces) - {'wsgi', 'asgi'}
+        if unknown:
+            raise CommandError(f"Unknown interfaces: {', '.join(sorted(unknown))}")
+        views = [v.strip() for v in options['views'].split(',')]
+        unknown = set(views) - set(loadtest.VIEWS)
+        if unknown:
+            raise CommandError(f"Unknown views: {', '.join(sorted(unknown))}")
+        output = options['output'] or os.path.join(benchmarks.BENCHMARK_DIR, f'load-{scale_name}.json')
+
+        results = []
+        with benchmarks.benchmark_database(scale_name, options['db_file'], log=self.stdout.write):
+            cookies = loadtest.session_cookies(max(levels))
+            session = loadtest.study_session()
+            self.stdout.write(f'{len(cookies)} learner sessions, {len(session)} requests per study round')
+            self.stdout.write(f"{'interface':<10} {'views':<6} {'learners':>8} {'requests':>9} {'req/s':>9} "
+                              f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+            for concurrency in levels:
+                for interface in interfaces:
+                    for view_kind in views:
+                        r = loadtest.run(interface, concurrency, options['duration'], options['warmup'],
+                                         options['wsgi_threads'], cookies, session, view_kind)
+                        results.append(r)
+                        self.stdout.write(f"{interface:<10} {view_kind:<6} {concurrency:>8} {r['requests']:>9} "
+                                          f"{r['throughput_rps']:>9} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} "
+                                          f"{r['errors']:>7}")
+
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump({
+                'scale': scale_name,
+                'size': benchmarks.SCALES[scale_name],
+                'recorded_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'wsgi_threads': options['wsgi_threads'],
+                'duration': options['duration'],
+                'results': results,
+            }, f, indent=2)
+        self.stdout.write(f'Results written to {output}')
+
+        if any(r['errors'] for r in results):
+            raise CommandError('Some requests failed')
+        self.stdout.write(self.style.SUCCESS('Load test complete'))
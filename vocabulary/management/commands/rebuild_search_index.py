@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from vocabulary.models import WordsBank
+from vocabulary.search import SEARCH_TABLE, create_search_index
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over the words bank (run after migrations that rebuild it)'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('The full-text search index is only available on SQLite')
+
+        if SEARCH_TABLE not in connection.introspection.table_names():
+            self.stdout.write(self.style.WARNING('Search index missing - creating it'))
+
+        with connection.cursor() as cursor:
+            # Creates the table and triggers if needed, then repopulates it
+            create_search_index(cursor)
+
+        self.stdout.write(self.style.SUCCESS(f'Search index rebuilt for {WordsBank.objects.count()} words'))
@@ -0,0 +1,27 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from vocabulary import user_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-user learning statistics shown on the dashboard from UserProgress'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', default=[], help='Email or username to rebuild (repeatable; default: everyone with progress)')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            users = []
+            for name in options['user']:
+                user = User.objects.filter(email=name).first() or User.objects.filter(username=name).first()
+                if user is None:
+                    raise CommandError(f'No user with email or username "{name}"')
+                users.append(user)
+        else:
+            users = User.objects.filter(userprogress__isnull=False).distinct().order_by('id')
+
+        started = time.perf_counter()
+        rebuilt = user_stats.rebuild(users)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {rebuilt} users in {time.perf_counter() - started:.1f}s'))
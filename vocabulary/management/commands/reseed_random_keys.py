@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+from vocabulary import quiz, sampling
+
+
+class Command(BaseCommand):
+    help = 'Draw new random keys for all words, changing the order of shuffled decks and random draws, and rebuild quiz pools'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=sampling.RESEED_CHUNK, help='Words updated per transaction')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        reseeded = sampling.reseed(options['chunk_size'])
+        # Pools hold the lowest keys of each bucket, so they are redrawn with them
+        quiz.build_all()
+        self.stdout.write(self.style.SUCCESS(f'Reseeded {reseeded} words in {time.perf_counter() - started:.1f}s'))
@@ -0,0 +1,325 @@
+"""
+Per-request latency and SQL instrumentation.
+
+MetricsMiddleware times every request and, through
+connection.execute_wrapper, counts its SQL queries and the time spent in
+them. Totals are kept per view (the resolved URL name, so arbitrary paths
+cannot blow up the label set, and the method, with anything outside the
+standard HTTP methods reported as "other") as Prometheus-style histograms.
+Queries slower than VOCABULARY_SLOW_QUERY_MS are grouped by normalized SQL
+and the application line that issued them; the groups are capped at
+SLOW_QUERY_LIMIT, but the per-call-site totals exported to Prometheus are
+kept apart so they only ever grow.
+
+The query wrapper is installed on every connection for good and finds
+the current request's timer through a context variable. Django keeps
+connections per thread, and under ASGI this middleware runs on the event
+loop while views and the async ORM run on a worker thread, so a wrapper
+added to the middleware's connections for the request would miss them.
+
+Like caching.cache_stats, everything is per process: with several workers
+each one is scraped (or summarised) separately.
+"""
+
+import logging
+import re
+import threading
+import time
+import traceback
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from . import caching
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+SLOW_QUERY_LIMIT = 100
+HTTP_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE', 'CONNECT'}
+
+logger = logging.getLogger('vocabulary.slow_queries')
+
+PROJECT_DIR = str(Path(settings.BASE_DIR).resolve())
+THIS_FILE = str(Path(__file__).resolve())
+
+_lock = threading.Lock()
+_views = {}
+_statuses = defaultdict(int)
+_slow_queries = {}
+_slow_query_counts = defaultdict(int)
+_request_timer = ContextVar('vocabulary_request_timer', default=None)
+
+
+class _ViewStats:
+    def __init__(self):
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS)
+        self.query_buckets = [0] * len(QUERY_BUCKETS)
+        self.count = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.queries = 0
+        self.sql_seconds = 0.0
+
+
+def _observe(buckets, bounds, value):
+    for i, bound in enumerate(bounds):
+        if value <= bound:
+            buckets[i] += 1
+
+
+def normalize_sql(sql):
+    """SQL with literals and placeholders replaced by ? and IN lists collapsed, for grouping"""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'%s|(?<![\w".])-?\d+(?:\.\d+)?\b', '?', sql)
+    sql = re.sub(r'\(\s*\?(?:\s*,\s*\?)+\s*\)', '(...)', sql)
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def call_site(*skip_files):
+    """'path:line in function' of the innermost project frame outside this module and skip_files"""
+    skip = {THIS_FILE, *skip_files}
+    for frame in reversed(traceback.extract_stack()):
+        filename = str(Path(frame.filename).resolve())
+        if filename.startswith(PROJECT_DIR) and filename not in skip and 'site-packages' not in filename:
+            return f'{Path(filename).relative_to(PROJECT_DIR)}:{frame.lineno} in {frame.name}'
+    return 'unknown'
+
+
+def record_slow_query(sql, seconds):
+    normalized = normalize_sql(sql)
+    site = call_site()
+    logger.warning('Slow query (%.1f ms) at %s: %s', seconds * 1000, site, normalized)
+    with _lock:
+        _slow_query_counts[site] += 1
+        entry = _slow_queries.get((normalized, site))
+        if entry is None:
+            if len(_slow_queries) >= SLOW_QUERY_LIMIT:
+                # Make room by forgetting the entry that has cost the least so far
+                del _slow_queries[min(_slow_queries, key=lambda k: _slow_queries[k]['total_seconds'])]
+            entry = _slow_queries[(normalized, site)] = {
+                'sql': normalized, 'call_site': site, 'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0,
+            }
+        entry['count'] += 1
+        entry['total_seconds'] += seconds
+        entry['max_seconds'] = max(entry['max_seconds'], seconds)
+
+
+def record_request(view, method, status, seconds, queries, sql_seconds):
+    # Clients choose the method, so only the standard ones get a label of their own
+    method = method if method in HTTP_METHODS else 'other'
+    with _lock:
+        stats = _views.get((view, method))
+        if stats is None:
+            stats = _views[(view, method)] = _ViewStats()
+        stats.count += 1
+        stats.latency_sum += seconds
+        stats.latency_max = max(stats.latency_max, seconds)
+        stats.queries += queries
+        stats.sql_seconds += sql_seconds
+        _observe(stats.latency_buckets, LATENCY_BUCKETS, seconds)
+        _observe(stats.query_buckets, QUERY_BUCKETS, queries)
+        _statuses[(view, method, f'{status // 100}xx')] += 1
+
+
+def reset():
+    with _lock:
+        _views.clear()
+        _statuses.clear()
+        _slow_queries.clear()
+        _slow_query_counts.clear()
+
+
+class _QueryTimer:
+    """Counts and times the queries of one request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+        self.slow_ms = getattr(settings, 'VOCABULARY_SLOW_QUERY_MS', 100)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.seconds += elapsed
+            if elapsed * 1000 >= self.slow_ms:
+                record_slow_query(sql, elapsed)
+
+
+def install_query_wrapper(wrapper):
+    """Add an execute_wrapper to this thread's connections now and to every connection opened later"""
+    def add(connection):
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
+
+    def on_connect(sender, connection, **kwargs):
+        add(connection)
+
+    for connection in connections.all():
+        add(connection)
+    connection_created.connect(on_connect, weak=False, dispatch_uid=f'{wrapper.__module__}.{wrapper.__name__}')
+    return add
+
+
+def _time_query(execute, sql, params, many, context):
+    timer = _request_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+_add_wrapper = install_query_wrapper(_time_query)
+
+
+class MetricsMiddleware:
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        for connection in connections.all():
+            # A thread's connection may have been opened before the wrapper was installed
+            _add_wrapper(connection)
+        timer = _QueryTimer()
+        token = _request_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_timer.reset(token)
+        self._record(request, response, time.perf_counter() - started, timer)
+        return response
+
+    async def __acall__(self, request):
+        timer = _QueryTimer()
+        token = _request_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_timer.reset(token)
+        self._record(request, response, time.perf_counter() - started, timer)
+        return response
+
+    def _record(self, request, response, elapsed, timer):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        record_request(view, request.method, response.status_code, elapsed, timer.queries, timer.seconds)
+
+
+def _bucket_quantile_ms(buckets, bounds, count, q):
+    """Upper bound (ms) of the latency bucket holding the q-quantile; None past the last bound"""
+    target = q * count
+    for bound, cumulative in zip(bounds, buckets):
+        if cumulative >= target:
+            return bound * 1000
+    return None
+
+
+def summary():
+    """Per-view rows for the admin dashboard, slowest total time first"""
+    with _lock:
+        rows = [
+            {
+                'view': view,
+                'method': method,
+                'requests': s.count,
+                'mean_ms': s.latency_sum / s.count * 1000,
+                'p95_ms': _bucket_quantile_ms(s.latency_buckets, LATENCY_BUCKETS, s.count, 0.95),
+                'max_ms': s.latency_max * 1000,
+                'queries': s.queries / s.count,
+                'sql_ms': s.sql_seconds / s.count * 1000,
+                'errors': _statuses.get((view, method, '5xx'), 0),
+            }
+            for (view, method), s in _views.items()
+        ]
+    return sorted(rows, key=lambda r: r['mean_ms'] * r['requests'], reverse=True)
+
+
+def slow_queries(n=10):
+    """The n slow-query groups with the highest total time"""
+    with _lock:
+        entries = [dict(e) for e in _slow_queries.values()]
+    return sorted(entries, key=lambda e: e['total_seconds'], reverse=True)[:n]
+
+
+def _labels(**labels):
+    escape = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def _histogram(lines, name, labels, bounds, buckets, total, count):
+    for bound, value in zip(bounds, buckets):
+        lines.append(f'{name}_bucket{_labels(**labels, le=bound)} {value}')
+    lines.append(f'{name}_bucket{_labels(**labels, le="+Inf")} {count}')
+    lines.append(f'{name}_sum{_labels(**labels)} {total}')
+    lines.append(f'{name}_count{_labels(**labels)} {count}')
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format"""
+    with _lock:
+        views = {key: {k: list(v) if isinstance(v, list) else v for k, v in vars(s).items()} for key, s in _views.items()}
+        statuses = dict(_statuses)
+        slow_counts = dict(_slow_query_counts)
+
+    lines = [
+        '# HELP vocabulary_request_duration_seconds Request latency by view.',
+        '# TYPE vocabulary_request_duration_seconds histogram',
+    ]
+    for (view, method), s in sorted(views.items()):
+        _histogram(lines, 'vocabulary_request_duration_seconds', {'view': view, 'method': method},
+                   LATENCY_BUCKETS, s['latency_buckets'], s['latency_sum'], s['count'])
+
+    lines += [
+        '# HELP vocabulary_request_queries SQL queries per request by view.',
+        '# TYPE vocabulary_request_queries histogram',
+    ]
+    for (view, method), s in sorted(views.items()):
+        _histogram(lines, 'vocabulary_request_queries', {'view': view, 'method': method},
+                   QUERY_BUCKETS, s['query_buckets'], s['queries'], s['count'])
+
+    lines += [
+        '# HELP vocabulary_request_sql_seconds_total Time spent in SQL by view.',
+        '# TYPE vocabulary_request_sql_seconds_total counter',
+    ]
+    for (view, method), s in sorted(views.items()):
+        lines.append(f"vocabulary_request_sql_seconds_total{_labels(view=view, method=method)} {s['sql_seconds']}")
+
+    lines += [
+        '# HELP vocabulary_requests_total Requests by view and status class.',
+        '# TYPE vocabulary_requests_total counter',
+    ]
+    for (view, method, status), count in sorted(statuses.items()):
+        lines.append(f'vocabulary_requests_total{_labels(view=view, method=method, status=status)} {count}')
+
+    lines += [
+        '# HELP vocabulary_slow_queries_total Queries slower than VOCABULARY_SLOW_QUERY_MS by call site.',
+        '# TYPE vocabulary_slow_queries_total counter',
+    ]
+    for site, count in sorted(slow_counts.items()):
+        lines.append(f'vocabulary_slow_queries_total{_labels(call_site=site)} {count}')
+
+    lines += [
+        '# HELP vocabulary_cache_lookups_total Cache lookups by cached value and result.',
+        '# TYPE vocabulary_cache_lookups_total counter',
+    ]
+    for name, stats in caching.cache_stats().items():
+        lines.append(f"vocabulary_cache_lookups_total{_labels(cache=name, result='hit')} {stats['hits']}")
+        lines.append(f"vocabulary_cache_lookups_total{_labels(cache=name, result='miss')} {stats['misses']}")
+    return '\n'.join(lines) + '\n'
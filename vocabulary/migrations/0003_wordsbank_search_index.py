@@ -0,0 +1,28 @@
+from django.db import migrations
+
+from vocabulary.search import create_search_index, drop_search_index
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        create_search_index(cursor)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        drop_search_index(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vocabulary", "0002_wordrelationship"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
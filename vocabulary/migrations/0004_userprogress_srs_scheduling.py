@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:27
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vocabulary", "0003_wordsbank_search_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprogress",
+            name="due_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name="userprogress",
+            name="ease_factor",
+            field=models.FloatField(default=2.5),
+        ),
+        migrations.AddField(
+            model_name="userprogress",
+            name="interval_days",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userprogress",
+            name="repetitions",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="userprogress",
+            index=models.Index(fields=["user", "due_at"], name="vocabulary__user_id_b8540c_idx"),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vocabulary", "0004_userprogress_srs_scheduling"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserStats",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("words_studied", models.PositiveIntegerField(default=0)),
+                ("words_mastered", models.PositiveIntegerField(default=0)),
+                ("times_correct", models.PositiveIntegerField(default=0)),
+                ("times_incorrect", models.PositiveIntegerField(default=0)),
+                ("by_difficulty", models.JSONField(default=dict, help_text="level -> [times_correct, times_incorrect]")),
+                ("due_by_date", models.JSONField(default=dict, help_text="local ISO date -> words due that day")),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("user", models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name="learning_stats", to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "verbose_name_plural": "User stats",
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:38
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vocabulary", "0005_userstats"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="wordrelationship",
+            index=models.Index(fields=["created_at"], name="vocabulary__created_669cb7_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="wordsbank",
+            index=models.Index(django.db.models.functions.text.Lower("word"), name="wordsbank_word_lower_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="wordsbank",
+            index=models.Index(fields=["difficulty_level", "word"], name="vocabulary__difficu_afb99d_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="wordsbank",
+            index=models.Index(fields=["word_type", "word"], name="vocabulary__word_ty_27631f_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="wordsbank",
+            index=models.Index(fields=["created_at"], name="vocabulary__created_422210_idx"),
+        ),
+    ]
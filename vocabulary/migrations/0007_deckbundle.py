@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:51
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vocabulary", "0006_wordsbank_lookup_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeckBundle",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("key", models.CharField(help_text='"all" or "list-<id>"', max_length=50, unique=True)),
+                ("etag", models.CharField(help_text="Hash of content", max_length=64)),
+                ("fingerprint", models.CharField(help_text="Hash of the source rows the content was built from", max_length=64)),
+                ("content", models.BinaryField()),
+                ("word_count", models.PositiveIntegerField(default=0)),
+                ("size", models.PositiveIntegerField(default=0, help_text="Compressed size in bytes")),
+                ("built_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("word_list", models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name="deck_bundle", to="vocabulary.wordlist")),
+            ],
+        ),
+    ]
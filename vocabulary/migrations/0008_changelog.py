@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:56
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def seed_change_log(apps, schema_editor):
+    """One entry per existing word and relationship, so cursor 0 replays the current state"""
+    ChangeLog = apps.get_model("vocabulary", "ChangeLog")
+    for kind, model_name in [("word", "WordsBank"), ("relationship", "WordRelationship")]:
+        ids = apps.get_model("vocabulary", model_name).objects.order_by("id").values_list("id", flat=True)
+        ChangeLog.objects.bulk_create((ChangeLog(kind=kind, object_id=i) for i in ids.iterator()), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vocabulary", "0007_deckbundle"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeLog",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("kind", models.CharField(choices=[("word", "Word"), ("relationship", "Relationship")], max_length=20)),
+                ("object_id", models.PositiveBigIntegerField()),
+                ("deleted", models.BooleanField(default=False)),
+                ("changed_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "constraints": [models.UniqueConstraint(fields=("kind", "object_id"), name="changelog_kind_object_unique")],
+            },
+        ),
+        migrations.RunPython(seed_change_log, migrations.RunPython.noop),
+    ]
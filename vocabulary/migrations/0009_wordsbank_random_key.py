@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:17
+
+import random
+
+import vocabulary.models
+from django.db import migrations, models
+
+
+def seed_random_keys(apps, schema_editor):
+    """AddField gives every existing word the same default; draw one per word"""
+    WordsBank = apps.get_model("vocabulary", "WordsBank")
+    ids = list(WordsBank.objects.order_by("id").values_list("id", flat=True))
+    for start in range(0, len(ids), 1000):
+        WordsBank.objects.bulk_update(
+            [WordsBank(id=i, random_key=random.random()) for i in ids[start:start + 1000]], ["random_key"]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vocabulary", "0008_changelog"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="wordsbank",
+            name="random_key",
+            field=models.FloatField(default=vocabulary.models.new_random_key),
+        ),
+        migrations.RunPython(seed_random_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="wordsbank",
+            index=models.Index(fields=["random_key"], name="vocabulary__random__ace494_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="wordsbank",
+            index=models.Index(fields=["difficulty_level", "random_key"], name="vocabulary__difficu_71a9c9_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="wordsbank",
+            index=models.Index(fields=["word_type", "random_key"], name="vocabulary__word_ty_211a66_idx"),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def seed_distractor_pools(apps, schema_editor):
+    """A pool for every (word type, difficulty level) bucket that has words, as quiz.build_pool builds them"""
+    WordsBank = apps.get_model("vocabulary", "WordsBank")
+    DistractorPool = apps.get_model("vocabulary", "DistractorPool")
+    pool_size = getattr(settings, "VOCABULARY_QUIZ_POOL_SIZE", 50)
+    buckets = WordsBank.objects.order_by().values_list("word_type_id", "difficulty_level_id").distinct()
+    for word_type_id, difficulty_level_id in buckets:
+        entries = [list(row) for row in WordsBank.objects.filter(
+            word_type_id=word_type_id, difficulty_level_id=difficulty_level_id,
+        ).order_by("random_key").values_list("id", "word", "meaning_english")[:pool_size]]
+        DistractorPool.objects.create(
+            bucket=f"{word_type_id}-{difficulty_level_id or 0}",
+            word_type_id=word_type_id,
+            difficulty_level_id=difficulty_level_id,
+            entries=entries,
+            size=len(entries),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vocabulary", "0009_wordsbank_random_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DistractorPool",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("bucket", models.CharField(help_text='"<word type id>-<difficulty level id, 0 for none>"', max_length=50, unique=True)),
+                ("entries", models.JSONField(default=list, help_text="[[word id, word, meaning_english], ...]")),
+                ("size", models.PositiveIntegerField(default=0)),
+                ("built_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("difficulty_level", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to="vocabulary.difficultylevel")),
+                ("word_type", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="vocabulary.wordtype")),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="wordsbank",
+            index=models.Index(fields=["word_type", "difficulty_level", "random_key"], name="vocabulary__word_ty_03a824_idx"),
+        ),
+        migrations.RunPython(seed_distractor_pools, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from vocabulary.search import create_search_index
+
+
+def restore_index(apps, schema_editor):
+    """0009 rebuilt vocabulary_wordsbank on SQLite, which dropped the search index triggers"""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        create_search_index(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vocabulary", "0010_distractorpool"),
+    ]
+
+    operations = [
+        migrations.RunPython(restore_index, migrations.RunPython.noop),
+    ]
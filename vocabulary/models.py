@@ -1,4 +1,7 @@
+import random
+
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.contrib.auth.models import User
 
@@ -35,6 +38,9 @@ class DifficultyLevel(models.Model):
     def __str__(self):
         return self.get_level_display()
 
+def new_random_key():
+    return random.random()
+
 class WordsBank(models.Model):
     word = models.CharField(max_length=100, unique=True)
     word_type = models.ForeignKey(WordType, on_delete=models.CASCADE)
@@ -53,10 +59,37 @@ class WordsBank(models.Model):
     last_reviewed = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
+    # Position in the shuffled deck order (vocabulary/sampling.py); reseed_random_keys redraws it
+    random_key = models.FloatField(default=new_random_key)
     
     class Meta:
         ordering = ['word']
         verbose_name_plural = "Words Bank"
+        indexes = [
+            # Case-insensitive lookups written as Lower('word') = value
+            models.Index(Lower('word'), name='wordsbank_word_lower_idx'),
+            # Filtered deck/list pages ordered by word
+            models.Index(fields=['difficulty_level', 'word']),
+            models.Index(fields=['word_type', 'word']),
+            models.Index(fields=['created_at']),
+            # Shuffled and random draws, whole deck or filtered
+            models.Index(fields=['random_key']),
+            models.Index(fields=['difficulty_level', 'random_key']),
+            models.Index(fields=['word_type', 'random_key']),
+            # Quiz distractor pools, one (type, level) bucket each
+            models.Index(fields=['word_type', 'difficulty_level', 'random_key']),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Quiz bucket as loaded, so a change of type or level refreshes the pool it left
+        if 'word_type_id' in instance.__dict__ and 'difficulty_level_id' in instance.__dict__:
+            instance._loaded_bucket = (instance.word_type_id, instance.difficulty_level_id)
+        # Name as loaded, so a rename refreshes the cards of its related words
+        if 'word' in instance.__dict__:
+            instance._loaded_word = instance.word
+        return instance
         
     def __str__(self):
         return self.word
@@ -69,35 +102,19 @@ class WordsBank(models.Model):
     
     def get_related_synonyms(self):
         """Get all synonym words from WordRelationship model"""
-        from django.db.models import Q
-        synonym_relationships = WordRelationship.objects.filter(
-            Q(word1=self, relationship_type='synonym') |
-            Q(word2=self, relationship_type='synonym')
-        )
-        
-        synonyms = []
-        for rel in synonym_relationships:
-            if rel.word1 == self:
-                synonyms.append(rel.word2)
-            else:
-                synonyms.append(rel.word1)
-        return synonyms
+        return self._get_related_words('synonym')
     
     def get_related_antonyms(self):
         """Get all antonym words from WordRelationship model"""
-        from django.db.models import Q
-        antonym_relationships = WordRelationship.objects.filter(
-            Q(word1=self, relationship_type='antonym') |
-            Q(word2=self, relationship_type='antonym')
-        )
-        
-        antonyms = []
-        for rel in antonym_relationships:
-            if rel.word1 == self:
-                antonyms.append(rel.word2)
-            else:
-                antonyms.append(rel.word1)
-        return antonyms
+        return self._get_related_words('antonym')
+    
+    def _get_related_words(self, relationship_type):
+        # Pages of words are resolved in bulk by relationship_graph.attach_related
+        related = getattr(self, '_related_words', None)
+        if related is None:
+            from .relationship_graph import related_for
+            related = related_for([self.id])[self.id]
+        return related[relationship_type]
     
     def add_synonym(self, other_word):
         """Add bidirectional synonym relationship"""
@@ -153,6 +170,7 @@ class WordRelationship(models.Model):
         indexes = [
             models.Index(fields=['word1', 'relationship_type']),
             models.Index(fields=['word2', 'relationship_type']),
+            models.Index(fields=['created_at']),
         ]
     
     def save(self, *args, **kwargs):
@@ -171,9 +189,123 @@ class UserProgress(models.Model):
     times_correct = models.PositiveIntegerField(default=0)
     times_incorrect = models.PositiveIntegerField(default=0)
     last_attempt = models.DateTimeField(auto_now=True)
+    # Spaced repetition (SM-2) scheduling state, see vocabulary/srs.py
+    ease_factor = models.FloatField(default=2.5)
+    interval_days = models.PositiveIntegerField(default=0)
+    repetitions = models.PositiveIntegerField(default=0)
+    due_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
         unique_together = ['word', 'user']
+        indexes = [
+            models.Index(fields=['user', 'due_at']),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # State as loaded, so UserStats can apply the difference on save
+        instance._stats_snapshot = stats_snapshot(instance)
+        return instance
+    
+    def __str__(self):
+        return f"{self.word.word} - {self.user.email} - Level {self.mastery_level}"
+
+MASTERED_LEVEL = 5
+
+
+def stats_snapshot(progress):
+    """What one progress row contributes to UserStats, or None if it was never answered.
+
+    Returns None for deferred loads (values()/only()) that lack the fields.
+    """
+    loaded = progress.__dict__
+    if not all(f in loaded for f in ('mastery_level', 'times_correct', 'times_incorrect', 'due_at')):
+        return None
+    if not (progress.times_correct or progress.times_incorrect):
+        return None
+    return (progress.mastery_level >= MASTERED_LEVEL, progress.times_correct, progress.times_incorrect, progress.due_at)
+
+class UserStats(models.Model):
+    """Per-user learning totals, maintained incrementally from UserProgress (see vocabulary/user_stats.py)"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='learning_stats')
+    words_studied = models.PositiveIntegerField(default=0)
+    words_mastered = models.PositiveIntegerField(default=0)
+    times_correct = models.PositiveIntegerField(default=0)
+    times_incorrect = models.PositiveIntegerField(default=0)
+    by_difficulty = models.JSONField(default=dict, help_text="level -> [times_correct, times_incorrect]")
+    due_by_date = models.JSONField(default=dict, help_text="local ISO date -> words due that day")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = "User stats"
+    
+    @property
+    def words_learning(self):
+        return self.words_studied - self.words_mastered
+    
+    @property
+    def accuracy(self):
+        answered = self.times_correct + self.times_incorrect
+        return round(self.times_correct * 100 / answered) if answered else None
+    
+    def accuracy_by_difficulty(self):
+        return [
+            (level or 'unrated', round(correct * 100 / (correct + incorrect)) if correct + incorrect else None)
+            for level, (correct, incorrect) in sorted(self.by_difficulty.items())
+        ]
+    
+    def due_count(self, local_date):
+        """Words due on or before local_date (a datetime.date in the user's timezone)"""
+        today = local_date.isoformat()
+        return sum(count for day, count in self.due_by_date.items() if day <= today)
+    
+    def __str__(self):
+        return f"{self.user.email} stats"
+
+class DeckBundle(models.Model):
+    """Precompiled gzip JSON deck of a word list, or of the whole bank (see vocabulary/deck_bundles.py)"""
+    key = models.CharField(max_length=50, unique=True, help_text='"all" or "list-<id>"')
+    word_list = models.OneToOneField(WordList, on_delete=models.CASCADE, null=True, blank=True, related_name='deck_bundle')
+    etag = models.CharField(max_length=64, help_text="Hash of content")
+    fingerprint = models.CharField(max_length=64, help_text="Hash of the source rows the content was built from")
+    content = models.BinaryField()
+    word_count = models.PositiveIntegerField(default=0)
+    size = models.PositiveIntegerField(default=0, help_text="Compressed size in bytes")
+    built_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.key} deck ({self.word_count} words)"
+
+class DistractorPool(models.Model):
+    """Candidate wrong answers for quiz questions about one word type and difficulty (see vocabulary/quiz.py)"""
+    bucket = models.CharField(max_length=50, unique=True, help_text='"<word type id>-<difficulty level id, 0 for none>"')
+    word_type = models.ForeignKey(WordType, on_delete=models.CASCADE)
+    difficulty_level = models.ForeignKey(DifficultyLevel, on_delete=models.CASCADE, null=True, blank=True)
+    entries = models.JSONField(default=list, help_text="[[word id, word, meaning_english], ...]")
+    size = models.PositiveIntegerField(default=0)
+    built_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.word_type} / {self.difficulty_level or 'no level'} pool ({self.size} words)"
+
+class ChangeLog(models.Model):
+    """Latest change of each word and relationship, for the change feed (see vocabulary/changes.py)"""
+    KINDS = [
+        ('word', 'Word'),
+        ('relationship', 'Relationship'),
+    ]
+    
+    kind = models.CharField(max_length=20, choices=KINDS)
+    object_id = models.PositiveBigIntegerField()
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        # The id is the feed sequence; an object's older entry is replaced by its newest
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='changelog_kind_object_unique'),
+        ]
     
     def __str__(self):
-        return f"{self.word.word} - {self.user.email} - Level {self.mastery_level}"
\ No newline at end of file
+        return f"#{self.id} {self.kind} {self.object_id}{' deleted' if self.deleted else ''}"
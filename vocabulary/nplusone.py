@@ -0,0 +1,152 @@
+"""
+N+1 query detection for requests and tests.
+
+Inside a detection scope every SELECT is normalized (metrics.normalize_sql)
+and counted by shape. When one shape runs more than the threshold times,
+which is almost always a lazy relation load inside a loop, the detector
+logs a warning or raises NPlusOneError. The report names the project line
+that issued the query and, when it came from a template, the template and
+line.
+
+Scopes nest and queries count towards the innermost one only, so each
+request made by a test is judged on its own. NPlusOneMiddleware opens a
+scope per request and the test runner (vocabulary.test_runner) one per
+test. The stack of scopes lives in a context variable, so concurrent ASGI
+requests keep theirs apart and queries made on the worker thread that
+runs the view still count. Settings, in VOCABULARY_NPLUSONE:
+- ACTION: "off", "log" or "raise" for requests outside tests
+- THRESHOLD: allowed repetitions of one query shape per scope
+"""
+
+import logging
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.template.base import Node
+
+from .metrics import call_site, install_query_wrapper, normalize_sql
+
+logger = logging.getLogger('vocabulary.nplusone')
+
+THIS_FILE = str(Path(__file__).resolve())
+
+# Innermost scope last; a tuple, so a task's changes never leak into another's
+_scopes = ContextVar('vocabulary_nplusone_scopes', default=())
+
+
+class NPlusOneError(AssertionError):
+    pass
+
+
+def _config():
+    config = getattr(settings, 'VOCABULARY_NPLUSONE', {})
+    return config.get('ACTION', 'off'), config.get('THRESHOLD', 5)
+
+
+def active():
+    """Whether the current thread or task is inside a detection scope"""
+    return bool(_scopes.get())
+
+
+def template_location():
+    """'template:line' of the innermost template node being rendered, or None"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        node = frame.f_locals.get('self')
+        if isinstance(node, Node) and getattr(node, 'token', None) and getattr(node, 'origin', None):
+            return f'{node.origin.template_name or node.origin.name}:{node.token.lineno}'
+        frame = frame.f_back
+    return None
+
+
+class _Scope:
+    def __init__(self, label, action, threshold):
+        self.label = label
+        self.action = action
+        self.threshold = threshold
+        self.counts = {}
+
+    def record(self, sql):
+        if self.threshold is None:
+            return
+        shape = normalize_sql(sql)
+        count = self.counts.get(shape, 0) + 1
+        self.counts[shape] = count
+        if count != self.threshold + 1:
+            return
+
+        where = call_site(THIS_FILE)
+        template = template_location()
+        if template:
+            where += f' (template {template})'
+        message = f'{self.label}: the same query ran more than {self.threshold} times, at {where}: {shape}'
+        if self.action == 'raise':
+            raise NPlusOneError(message)
+        logger.warning(message)
+
+
+def _wrapper(execute, sql, params, many, context):
+    scopes = _scopes.get()
+    if scopes and sql.lstrip()[:6].upper() == 'SELECT':
+        scopes[-1].record(sql)
+    return execute(sql, params, many, context)
+
+
+_add_wrapper = install_query_wrapper(_wrapper)
+
+
+@contextmanager
+def _pushed(scope):
+    token = _scopes.set(_scopes.get() + (scope,))
+    try:
+        yield scope
+    finally:
+        _scopes.reset(token)
+
+
+@contextmanager
+def detect(label, action=None, threshold=None):
+    """Count repeated queries in the block; action and threshold default to the enclosing scope, then settings"""
+    scopes = _scopes.get()
+    default_action, default_threshold = (scopes[-1].action, scopes[-1].threshold) if scopes else _config()
+    scope = _Scope(label, action or default_action, threshold if threshold is not None else default_threshold)
+    for connection in connections.all():
+        # A thread's connection may have been opened before the wrapper was installed
+        _add_wrapper(connection)
+    with _pushed(scope):
+        yield scope
+
+
+def allow_repeated_queries():
+    """Suspend detection for a block whose repetition is intended (usable as a decorator too)"""
+    return _pushed(_Scope('allowed', 'off', None))
+
+
+class NPlusOneMiddleware:
+    """Opens a detection scope per request when enabled or when running under a detecting test"""
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not active() and _config()[0] == 'off':
+            return self.get_response(request)
+        with detect(f'{request.method} {request.path}'):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if not active() and _config()[0] == 'off':
+            return await self.get_response(request)
+        with detect(f'{request.method} {request.path}'):
+            return await self.get_response(request)
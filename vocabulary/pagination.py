@@ -0,0 +1,218 @@
+"""
+Keyset (cursor) pagination and cached row counts.
+
+Pages are addressed by the ordering values of a boundary row instead of an
+OFFSET, so every page - however deep - is one indexed range scan. Cursors
+are opaque base64 JSON; datetimes survive the round trip because values
+are converted back with the model field's to_python.
+
+Totals come from count_rows, which caches the COUNT per filter in the
+caching namespaces of the data and, for unfiltered queries on very large
+tables, answers with the database's own row estimate instead.
+"""
+
+import base64
+import datetime
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connection
+from django.db.models import Max, Q
+
+from . import caching
+
+ESTIMATE_THRESHOLD = getattr(settings, 'VOCABULARY_COUNT_ESTIMATE_THRESHOLD', 100000)
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder, but datetimes keep their microseconds so cursors compare exactly"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values, before=False):
+    """Encode the ordering values of a boundary row into an opaque cursor string.
+
+    A plain cursor continues after the row; before=True pages backwards.
+    """
+    payload = {'before': values} if before else values
+    raw = json.dumps(payload, separators=(',', ':'), cls=CursorEncoder).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor string into (values, before); values is None if missing or malformed"""
+    if not cursor:
+        return None, False
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError):
+        return None, False
+    if isinstance(payload, dict) and isinstance(payload.get('before'), list):
+        return payload['before'], True
+    return (payload, False) if isinstance(payload, list) else (None, False)
+
+
+def _coerce(model, ordering, values):
+    """Turn JSON cursor values back into Python values of the ordering fields"""
+    coerced = []
+    for field, value in zip(ordering, values):
+        try:
+            model_field = model._meta.get_field(field.lstrip('-'))
+        except FieldDoesNotExist:
+            # Annotations such as search_rank are plain JSON numbers already
+            coerced.append(value)
+            continue
+        coerced.append(model_field.to_python(value))
+    return coerced
+
+
+def _reverse(ordering):
+    return [f[1:] if f.startswith('-') else f'-{f}' for f in ordering]
+
+
+def _after(fields, values):
+    """Build the row-value comparison (f1, f2, ...) > (v1, v2, ...) as a Q object.
+
+    The expanded OR is wrapped in a plain f1 >= v1 bound, which the
+    database can turn into an index range seek; the OR alone would make
+    it walk the index from the start.
+    """
+    condition = Q()
+    for i, field in enumerate(fields):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[i]})
+        for prev_field, prev_value in zip(fields[:i], values[:i]):
+            step &= Q(**{prev_field.lstrip('-'): prev_value})
+        condition |= step
+    first = fields[0]
+    bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": values[0]})
+    return bound & condition
+
+
+class KeysetPage:
+    """One page of rows plus cursors to its neighbours; iterable like a Paginator page"""
+
+    def __init__(self, rows, ordering, has_next, has_previous, count=None, count_is_estimate=False):
+        self.object_list = rows
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.count = count
+        self.count_is_estimate = count_is_estimate
+        boundary = lambda row: [getattr(row, f.lstrip('-')) for f in ordering]
+        self.next_cursor = encode_cursor(boundary(rows[-1])) if has_next and rows else None
+        self.previous_cursor = encode_cursor(boundary(rows[0]), before=True) if has_previous and rows else None
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def paginate(queryset, ordering, cursor=None, limit=20, count=None, count_is_estimate=False):
+    """Return the KeysetPage at cursor (the first page without one).
+
+    ordering must be a list of fields that uniquely orders the queryset;
+    the last one is normally the primary key.
+    """
+    window, values, before = _window(queryset, ordering, cursor, limit)
+    return _page(list(window), ordering, limit, values, before, count, count_is_estimate)
+
+
+def _window(queryset, ordering, cursor, limit):
+    """(queryset of up to limit + 1 rows past cursor, cursor values or None, whether it points backwards)"""
+    values, before = decode_cursor(cursor)
+    if values is not None:
+        try:
+            values = _coerce(queryset.model, ordering, values) if len(values) == len(ordering) else None
+        except ValidationError:
+            values = None
+
+    if values is not None and before:
+        reverse = _reverse(ordering)
+        return queryset.filter(_after(reverse, values)).order_by(*reverse)[:limit + 1], values, True
+    if values is not None:
+        queryset = queryset.filter(_after(ordering, values))
+    return queryset.order_by(*ordering)[:limit + 1], values, False
+
+
+def _page(rows, ordering, limit, values, before, count=None, count_is_estimate=False):
+    if before:
+        has_previous = len(rows) > limit
+        rows = rows[:limit][::-1]
+        has_next = True
+    else:
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+        has_previous = values is not None
+    return KeysetPage(rows, ordering, has_next, has_previous, count, count_is_estimate)
+
+
+def keyset_page(queryset, ordering, cursor=None, limit=20):
+    """Return (rows, next_cursor) for the page after cursor"""
+    page = paginate(queryset, ordering, cursor, limit)
+    return page.object_list, page.next_cursor
+
+
+async def akeyset_page(queryset, ordering, cursor=None, limit=20):
+    """keyset_page() for async views"""
+    window, values, before = _window(queryset, ordering, cursor, limit)
+    page = _page([row async for row in window], ordering, limit, values, before)
+    return page.object_list, page.next_cursor
+
+
+def estimated_count(model):
+    """The database's cheap row-count estimate for model's table, or None"""
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+                row = cursor.fetchone()
+                if row and row[0] > 0:
+                    return row[0]
+            elif connection.vendor == 'sqlite':
+                # Populated by ANALYZE; the first number of stat is the table's row count
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+                row = cursor.fetchone()
+                if row:
+                    return int(row[0].split()[0])
+    except (DatabaseError, ValueError):
+        pass
+    # The highest primary key is an index lookup and an upper bound after deletes
+    return model._default_manager.aggregate(n=Max('pk'))['n']
+
+
+def count_rows(queryset, name, namespaces, *parts, filtered=False):
+    """(count, is_estimate) for queryset, cached per name/parts in the given caching namespaces.
+
+    Unfiltered counts of tables above VOCABULARY_COUNT_ESTIMATE_THRESHOLD
+    rows use estimated_count instead of a full COUNT(*).
+    """
+    def compute():
+        if not filtered:
+            estimate = estimated_count(queryset.model)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                return (estimate, True)
+        return (queryset.count(), False)
+
+    return caching.get_or_set(name, namespaces, compute, *parts)
+
+
+def querystring_without(params, *names):
+    """URL-encoded copy of request.GET without the given parameters (for page links)"""
+    params = params.copy()
+    for name in names:
+        params.pop(name, None)
+    return params.urlencode()
@@ -0,0 +1,161 @@
+"""
+Multiple-choice quiz questions with precomputed distractor pools.
+
+Two kinds of question show a word: "meaning" asks for its meaning and
+"synonym" asks which option is a synonym. The wrong options (distractors)
+are words of the same WordType and DifficultyLevel, so they are plausible,
+and never true synonyms from WordRelationship of the word or the answer.
+
+The candidates of each (type, level) bucket are precomputed in
+DistractorPool: the bucket's POOL_SIZE words with the lowest random_key
+(a random sample, see sampling.py) with the text the options show. A quiz
+of n questions costs three queries whatever n and the size of the bank:
+an indexed random draw of the words asked about, their buckets' pools and,
+for synonym questions, the answer words. The synonym graph is in memory
+(relationship_graph.py) and each question only filters its pool.
+
+Pools follow the words. Saving or deleting a word refreshes the pools of
+its old and new bucket when the transaction commits, with one indexed
+query of POOL_SIZE rows per bucket. Bulk paths that skip signals call
+refresh_on_commit() themselves; `manage.py build_quiz_pools` (also run by
+reseed_random_keys) rebuilds every pool.
+"""
+
+import random
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from . import relationship_graph, sampling
+from .models import DistractorPool, WordRelationship, WordsBank
+from .nplusone import allow_repeated_queries
+
+MEANING = 'meaning'
+SYNONYM = 'synonym'
+KINDS = (MEANING, SYNONYM)
+CHOICES = 4
+POOL_SIZE = getattr(settings, 'VOCABULARY_QUIZ_POOL_SIZE', 50)
+
+# Position of the option text in a pool entry [id, word, meaning_english]
+OPTION_TEXT = {MEANING: 2, SYNONYM: 1}
+
+_pending = threading.local()
+
+
+def bucket_key(word_type_id, difficulty_level_id):
+    return f'{word_type_id}-{difficulty_level_id or 0}'
+
+
+def build_pool(word_type_id, difficulty_level_id):
+    """Recompute one bucket's pool from its words; returns its size"""
+    entries = [list(row) for row in WordsBank.objects.filter(
+        word_type_id=word_type_id, difficulty_level_id=difficulty_level_id,
+    ).order_by('random_key').values_list('id', 'word', 'meaning_english')[:POOL_SIZE]]
+    key = bucket_key(word_type_id, difficulty_level_id)
+    if not entries:
+        DistractorPool.objects.filter(bucket=key).delete()
+        return 0
+    DistractorPool.objects.update_or_create(bucket=key, defaults={
+        'word_type_id': word_type_id,
+        'difficulty_level_id': difficulty_level_id,
+        'entries': entries,
+        'size': len(entries),
+        'built_at': timezone.now(),
+    })
+    return len(entries)
+
+
+@allow_repeated_queries()
+def refresh(buckets):
+    """Recompute the pools of these (word_type_id, difficulty_level_id) buckets"""
+    for word_type_id, difficulty_level_id in sorted(buckets, key=lambda b: (b[0], b[1] or 0)):
+        build_pool(word_type_id, difficulty_level_id)
+
+
+def word_buckets(words):
+    """Buckets whose pools saving these words can change: where each word is and where it was loaded from"""
+    buckets = set()
+    for word in words:
+        buckets.add((word.word_type_id, word.difficulty_level_id))
+        if '_loaded_bucket' in word.__dict__:
+            buckets.add(word._loaded_bucket)
+    return buckets
+
+
+def refresh_on_commit(buckets):
+    """Refresh these buckets' pools once the current transaction commits, each once"""
+    pending = _pending.__dict__.setdefault('buckets', set())
+    pending.update(b for b in buckets if b[0] is not None)
+    transaction.on_commit(_refresh_pending)
+
+
+def _refresh_pending():
+    # The first callback of a transaction refreshes every bucket it touched; the rest find nothing to do
+    buckets = _pending.__dict__.pop('buckets', set())
+    if buckets:
+        refresh(buckets)
+
+
+def build_all():
+    """Rebuild every pool; returns the number of pools"""
+    buckets = set(WordsBank.objects.order_by().values_list('word_type_id', 'difficulty_level_id').distinct())
+    DistractorPool.objects.exclude(bucket__in=[bucket_key(*b) for b in buckets]).delete()
+    refresh(buckets)
+    return len(buckets)
+
+
+def _has_synonym():
+    synonyms = WordRelationship.objects.filter(relationship_type='synonym')
+    return Exists(synonyms.filter(word1=OuterRef('pk'))) | Exists(synonyms.filter(word2=OuterRef('pk')))
+
+
+def questions(words, count=10, kind=MEANING):
+    """Up to count questions about random words of the words queryset.
+
+    Each question is {'word_id', 'kind', 'prompt', 'options': [{'word_id',
+    'text'}], 'answer': index of the correct option}. Words whose bucket
+    has no usable distractor are skipped.
+    """
+    if kind == SYNONYM:
+        words = words.filter(_has_synonym())
+    words = words.select_related(None).only('word', 'meaning_english', 'word_type', 'difficulty_level', 'random_key')
+    targets = sampling.sample(words, count)
+    if not targets:
+        return []
+
+    graph = relationship_graph.get_graph()
+    synonyms = {w.id: set(graph.neighbours(w.id, 'synonym')) for w in targets}
+    pools = dict(DistractorPool.objects.filter(
+        bucket__in={bucket_key(w.word_type_id, w.difficulty_level_id) for w in targets},
+    ).values_list('bucket', 'entries'))
+
+    if kind == SYNONYM:
+        picked = {w.id: random.choice(sorted(synonyms[w.id])) for w in targets if synonyms[w.id]}
+        answer_words = dict(WordsBank.objects.filter(id__in=set(picked.values())).values_list('id', 'word'))
+        answers = {w: (a, answer_words[a]) for w, a in picked.items() if a in answer_words}
+    else:
+        answers = {w.id: (w.id, w.meaning_english) for w in targets}
+
+    text = OPTION_TEXT[kind]
+    result = []
+    for word in targets:
+        if word.id not in answers:
+            continue
+        answer_id, answer_text = answers[word.id]
+        excluded = {word.id, answer_id} | synonyms[word.id] | set(graph.neighbours(answer_id, 'synonym'))
+        # One candidate per text, so no two options read the same
+        candidates = list({
+            e[text]: e for e in pools.get(bucket_key(word.word_type_id, word.difficulty_level_id), [])
+            if e[0] not in excluded and e[text] != answer_text
+        }.values())
+        distractors = random.sample(candidates, min(CHOICES - 1, len(candidates)))
+        if not distractors:
+            continue
+        options = [{'word_id': e[0], 'text': e[text]} for e in distractors]
+        answer = random.randrange(len(options) + 1)
+        options.insert(answer, {'word_id': answer_id, 'text': answer_text})
+        result.append({'word_id': word.id, 'kind': kind, 'prompt': word.word, 'options': options, 'answer': answer})
+    return result
@@ -0,0 +1,130 @@
+"""
+In-process synonym/antonym graph built from WordRelationship.
+
+The whole graph is loaded with one query and stored in compressed sparse
+row form: a sorted array of word ids, an array of offsets into a flat
+neighbour array, one pair per relationship type. Lookups are a binary
+search, so resolving the relationships of a page of words costs no queries
+beyond the single one that loads the related WordsBank rows.
+
+The graph is tied to the version of the "relationships" cache namespace
+(see caching.py), which is bumped whenever a relationship changes, so
+every process that shares the cache rebuilds its copy on next use. With a
+per-process cache (LocMemCache) only the process that made the change
+does; the others keep their copy until they restart, as versions never
+expire.
+"""
+
+import threading
+from array import array
+from bisect import bisect_left
+
+from . import caching
+
+RELATIONSHIP_TYPES = ('synonym', 'antonym')
+
+
+class _Adjacency:
+    """Compressed sparse row adjacency for one relationship type"""
+
+    def __init__(self, edges):
+        neighbours = {}
+        for a, b in edges:
+            neighbours.setdefault(a, []).append(b)
+            neighbours.setdefault(b, []).append(a)
+
+        self.nodes = array('q', sorted(neighbours))
+        self.offsets = array('q', [0])
+        self.targets = array('q')
+        for node in self.nodes:
+            self.targets.extend(sorted(set(neighbours[node])))
+            self.offsets.append(len(self.targets))
+
+    def neighbours(self, word_id):
+        i = bisect_left(self.nodes, word_id)
+        if i == len(self.nodes) or self.nodes[i] != word_id:
+            return ()
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+
+class RelationshipGraph:
+    def __init__(self, rows):
+        edges = {kind: [] for kind in RELATIONSHIP_TYPES}
+        for word1_id, word2_id, relationship_type in rows:
+            if relationship_type in edges:
+                edges[relationship_type].append((word1_id, word2_id))
+        self.adjacency = {kind: _Adjacency(pairs) for kind, pairs in edges.items()}
+
+    def neighbours(self, word_id, relationship_type):
+        return self.adjacency[relationship_type].neighbours(word_id)
+
+
+_lock = threading.Lock()
+_graph = None
+_graph_version = None
+
+
+def _current_version():
+    return caching.versions(caching.RELATIONSHIPS)[caching.RELATIONSHIPS]
+
+
+def invalidate():
+    """Mark every process's copy of the graph as stale"""
+    caching.bump(caching.RELATIONSHIPS)
+
+
+def get_graph():
+    """Return the graph for the current version, building it if needed"""
+    global _graph, _graph_version
+    from .models import WordRelationship
+
+    version = _current_version()
+    if _graph is not None and _graph_version == version:
+        return _graph
+
+    with _lock:
+        if _graph is None or _graph_version != version:
+            rows = WordRelationship.objects.values_list('word1_id', 'word2_id', 'relationship_type')
+            _graph = RelationshipGraph(rows.iterator())
+            _graph_version = version
+        return _graph
+
+
+def related_ids_for(word_ids):
+    """Map each word id to {'synonym': [ids], 'antonym': [ids]} without touching WordsBank"""
+    graph = get_graph()
+    return {
+        word_id: {kind: list(graph.neighbours(word_id, kind)) for kind in RELATIONSHIP_TYPES}
+        for word_id in word_ids
+    }
+
+
+def related_for(word_ids):
+    """Map each word id to {'synonym': [WordsBank], 'antonym': [WordsBank]}.
+
+    All related words for all ids are loaded with a single query (none at
+    all when no word has relationships).
+    """
+    from .models import WordsBank
+
+    related_ids = related_ids_for(word_ids)
+    wanted = {i for kinds in related_ids.values() for ids in kinds.values() for i in ids}
+    words = WordsBank.objects.only('id', 'word').in_bulk(wanted) if wanted else {}
+
+    return {
+        word_id: {
+            kind: sorted((words[i] for i in ids if i in words), key=lambda w: w.word)
+            for kind, ids in kinds.items()
+        }
+        for word_id, kinds in related_ids.items()
+    }
+
+
+def attach_related(words):
+    """Resolve relationships for a page of words so templates can call
+    get_related_synonyms/get_related_antonyms without further queries"""
+    words = list(words)
+    related = related_for([w.id for w in words])
+    for word in words:
+        word._related_words = related[word.id]
+    return words
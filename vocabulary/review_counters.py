@@ -0,0 +1,298 @@
+"""
+Write-behind buffer for WordsBank.times_reviewed and last_reviewed.
+
+Every learner reviews the same popular words, so bumping the shared word
+row on each review turns it into a hot row (and on SQLite every write takes
+the database-wide lock). Reviews are counted in a buffer instead and the
+coalesced deltas are written periodically with a single CASE UPDATE.
+
+Backends, chosen with settings.VOCABULARY_REVIEW_COUNTERS['BACKEND']:
+- "local" (default): an in-process dict, flushed every FLUSH_INTERVAL
+  seconds by a daemon thread, once FLUSH_THRESHOLD words are pending, and
+  at interpreter exit (graceful worker shutdown runs atexit handlers)
+- "cache": counters live in the Django cache so every process shares them;
+  run `flush_review_counters --every 30` (or from cron) to write them out.
+  Needs a cache that all processes share and whose incr/decr are atomic:
+  Redis or Memcached. LocMem is per process (the flush command would never
+  see the web workers' counters), and the file, database and dummy caches
+  are not atomic or keep nothing, so get_buffer() refuses them.
+
+The cache backend keeps a journal of the words with pending counts: the
+review that takes a word's counter off zero appends the word id to a
+numbered slot, and a flush reads only the slots written since the last
+one. A flush holds a short cache lock, so the command and a worker
+flushing at exit never write the same counts twice.
+
+Counter keys are stored without a timeout, but a cache under memory
+pressure may still evict them, and the increments they held are lost with
+no error. Give the counters a cache that does not evict (Redis with
+maxmemory-policy noeviction, or an instance of its own) if exact counts
+matter; times_reviewed is a popularity signal, so most deployments can
+live with the rare loss.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections, transaction
+from django.db.models import Case, DateTimeField, F, IntegerField, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import WordsBank
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {'BACKEND': 'local', 'FLUSH_INTERVAL': 30, 'FLUSH_THRESHOLD': 500}
+CACHE_PREFIX = 'vocabulary:review_counter'
+# Journal of words with pending counts (see CacheCounterBuffer)
+SEQUENCE_KEY = f'{CACHE_PREFIX}:dirty_sequence'
+FLUSHED_KEY = f'{CACHE_PREFIX}:dirty_flushed'
+RETRY_KEY = f'{CACHE_PREFIX}:dirty_retry'
+FLUSH_LOCK_KEY = f'{CACHE_PREFIX}:flush_lock'
+CACHE_READ_CHUNK = 1000
+FLUSH_LOCK_TIMEOUT = 300
+
+# Caches that are per process, keep nothing, or increment with a non-atomic get and set
+UNSHARED_CACHES = (LocMemCache, DummyCache, FileBasedCache, DatabaseCache)
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'VOCABULARY_REVIEW_COUNTERS', {})}
+
+
+def apply_deltas(deltas):
+    """Write {word_id: (count, last_reviewed)} to WordsBank with one UPDATE; returns rows updated"""
+    if not deltas:
+        return 0
+    return WordsBank.objects.filter(id__in=list(deltas)).update(
+        times_reviewed=F('times_reviewed') + Case(
+            *[When(id=word_id, then=Value(count)) for word_id, (count, _) in deltas.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+        # Greatest keeps last_reviewed monotonic when flushes arrive out of order
+        last_reviewed=Case(
+            *[
+                When(id=word_id, then=Greatest(Coalesce('last_reviewed', Value(last)), Value(last)))
+                for word_id, (_, last) in deltas.items()
+            ],
+            default=F('last_reviewed'),
+            output_field=DateTimeField(),
+        ),
+    )
+
+
+def _merge(target, word_id, count, last):
+    old_count, old_last = target.get(word_id, (0, last))
+    target[word_id] = (old_count + count, max(old_last, last))
+
+
+class LocalCounterBuffer:
+    """Per-process buffer of review deltas"""
+
+    def __init__(self, flush_interval=30, flush_threshold=500):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def add(self, deltas):
+        with self.lock:
+            for word_id, (count, last) in deltas.items():
+                _merge(self.pending, word_id, count, last)
+            size = len(self.pending)
+        self._start_thread()
+        if size >= self.flush_threshold:
+            self.flush()
+
+    def flush(self):
+        """Write out everything pending; returns the number of words flushed"""
+        with self.flush_lock:
+            with self.lock:
+                deltas, self.pending = self.pending, {}
+            if not deltas:
+                return 0
+            try:
+                with transaction.atomic():
+                    apply_deltas(deltas)
+            except Exception:
+                # Put the deltas back so a failed flush loses nothing
+                with self.lock:
+                    for word_id, (count, last) in deltas.items():
+                        _merge(self.pending, word_id, count, last)
+                raise
+            return len(deltas)
+
+    def _start_thread(self):
+        if self.thread is not None or not self.flush_interval:
+            return
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='review-counter-flush', daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while not self.stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Flushing review counters failed; will retry')
+            finally:
+                close_old_connections()
+
+    def shutdown(self):
+        self.stopped.set()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Could not flush %d pending review counters at shutdown', len(self.pending))
+
+
+class CacheCounterBuffer:
+    """Review deltas kept in the shared Django cache"""
+
+    def __init__(self, cache_backend=cache):
+        self.cache = cache_backend
+
+    @staticmethod
+    def _count_key(word_id):
+        return f'{CACHE_PREFIX}:count:{word_id}'
+
+    @staticmethod
+    def _last_key(word_id):
+        return f'{CACHE_PREFIX}:last:{word_id}'
+
+    @staticmethod
+    def _slot_key(slot):
+        return f'{CACHE_PREFIX}:dirty:{slot}'
+
+    def _mark_dirty(self, word_id):
+        self.cache.add(SEQUENCE_KEY, 0, timeout=None)
+        self.cache.set(self._slot_key(self.cache.incr(SEQUENCE_KEY)), word_id, timeout=None)
+
+    def add(self, deltas):
+        for word_id, (count, last) in deltas.items():
+            key = self._count_key(word_id)
+            self.cache.add(key, 0, timeout=None)
+            self.cache.set(self._last_key(word_id), last.timestamp(), timeout=None)
+            # Only the review that makes the counter pending journals the word
+            if self.cache.incr(key, count) == count:
+                self._mark_dirty(word_id)
+
+    def _read_slots(self, slots):
+        found = {}
+        for start in range(0, len(slots), CACHE_READ_CHUNK):
+            keys = {self._slot_key(n): n for n in slots[start:start + CACHE_READ_CHUNK]}
+            found.update({keys[key]: word_id for key, word_id in self.cache.get_many(list(keys)).items()})
+        return found
+
+    def _flush_words(self, word_ids):
+        flushed = 0
+        for start in range(0, len(word_ids), CACHE_READ_CHUNK):
+            chunk = word_ids[start:start + CACHE_READ_CHUNK]
+            counts = self.cache.get_many([self._count_key(i) for i in chunk])
+            counts = {int(key.rsplit(':', 1)[1]): value for key, value in counts.items() if value}
+            if not counts:
+                continue
+            lasts = self.cache.get_many([self._last_key(i) for i in counts])
+            now = timezone.now().timestamp()
+            deltas = {
+                word_id: (count, datetime.fromtimestamp(lasts.get(self._last_key(word_id), now), tz=dt_timezone.utc))
+                for word_id, count in counts.items()
+            }
+            with transaction.atomic():
+                apply_deltas(deltas)
+            # decr rather than delete, so increments made since the read survive; those
+            # did not journal the word (its counter was not zero), so journal it again
+            for word_id, count in counts.items():
+                if self.cache.decr(self._count_key(word_id), count) > 0:
+                    self._mark_dirty(word_id)
+            flushed += len(deltas)
+        return flushed
+
+    def flush(self):
+        """Write out the counters of the words journaled since the last flush"""
+        if not self.cache.add(FLUSH_LOCK_KEY, 1, timeout=FLUSH_LOCK_TIMEOUT):
+            return 0
+        try:
+            flushed_upto = self.cache.get(FLUSHED_KEY, 0)
+            last = self.cache.get(SEQUENCE_KEY, 0)
+            retry = self.cache.get(RETRY_KEY, [])
+            new_slots = list(range(flushed_upto + 1, last + 1))
+            found = self._read_slots(retry + new_slots)
+            # A slot can be numbered but not written yet; look again next time, then give up on it
+            missing = [n for n in new_slots if n not in found]
+            lost = [n for n in retry if n not in found]
+            if lost:
+                logger.warning('%d review counter journal slots were never written or were evicted', len(lost))
+
+            flushed = self._flush_words(sorted(set(found.values())))
+            self.cache.delete_many([self._slot_key(n) for n in found])
+            self.cache.set_many({FLUSHED_KEY: last, RETRY_KEY: missing}, timeout=None)
+            return flushed
+        finally:
+            self.cache.delete(FLUSH_LOCK_KEY)
+
+    def shutdown(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Could not flush pending review counters at shutdown')
+
+
+def check_shared_cache(cache_backend):
+    """ImproperlyConfigured unless every process sees the same counters in cache_backend"""
+    if isinstance(cache_backend, UNSHARED_CACHES):
+        raise ImproperlyConfigured(
+            f'The "cache" review counter backend needs a shared cache with atomic incr (Redis or Memcached), '
+            f'not {type(cache_backend).__name__}; set CACHE_BACKEND=redis or REVIEW_COUNTER_BACKEND=local'
+        )
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                config = _config()
+                if config['BACKEND'] == 'cache':
+                    # cache is a proxy; the check needs the backend it stands for
+                    check_shared_cache(caches['default'])
+                    _buffer = CacheCounterBuffer()
+                else:
+                    _buffer = LocalCounterBuffer(config['FLUSH_INTERVAL'], config['FLUSH_THRESHOLD'])
+                atexit.register(_buffer.shutdown)
+    return _buffer
+
+
+def record_reviews(deltas):
+    """Buffer {word_id: (count, last_reviewed)} once the current transaction commits"""
+    if deltas:
+        transaction.on_commit(lambda: get_buffer().add(deltas))
+
+
+def flush():
+    """Write out this process's (or the shared cache's) pending counters"""
+    started = time.perf_counter()
+    flushed = get_buffer().flush()
+    if flushed:
+        logger.info('Flushed review counters for %d words in %.3fs', flushed, time.perf_counter() - started)
+    return flushed
@@ -0,0 +1,168 @@
+"""
+Random draws and shuffled decks without ORDER BY RANDOM().
+
+Every word carries a random_key, drawn uniformly from [0, 1) when it is
+created and redrawn for all words by `manage.py reseed_random_keys`.
+Ordering by (random_key, id) is a random permutation of the words that
+an index can walk, alone or after a difficulty or type filter (word list
+filters are a correlated EXISTS checked during the walk, as for the word
+ordered deck).
+
+A shuffled deck is that permutation rotated to start at a pivot: the
+words with random_key >= pivot in key order, then the rest from the
+start. The pivot comes from the learner and a seed, so a session keeps
+its order while paging and two learners (or two seeds) start at
+different places. Pages are keyset pages on (random_key, id), so
+a page of k words costs an index seek plus k steps, whatever the offset.
+
+Only the starting point depends on the learner and seed, not the order:
+every shuffled deck is a rotation of the same permutation, so word X is
+followed by word Y for every learner until the next reseed. A learner
+who reshuffles sees the same sequence again, entered at another word.
+
+A random draw of k words (sample()) is k independent seeks instead, one
+per random pivot, sent as one query of k scalar subqueries, then one
+query for the words drawn. A word is drawn with probability proportional
+to the key gap before it, which is uniform on average since the keys are.
+
+Reseeding changes the permutation. A session resumed across a reseed
+continues after its cursor's key in the new order, so it may repeat or
+skip some words; run it rarely (nightly or weekly).
+"""
+
+import hashlib
+import random
+import secrets
+
+from django.db import connections, transaction
+from django.db.models import Q
+
+from .models import WordsBank
+from .pagination import decode_cursor, encode_cursor
+
+ORDERING = ['random_key', 'id']
+RESEED_CHUNK = 1000
+# Rounds of sample() drawing again when too many draws landed on words already drawn
+SAMPLE_ROUNDS = 3
+PIVOT_PLACEHOLDER = -0.5
+
+
+def new_seed():
+    """A seed for a new shuffled session"""
+    return secrets.randbelow(2 ** 31)
+
+
+def parse_seed(value):
+    """Seed from a query parameter; ValueError if malformed"""
+    seed = int(value)
+    if seed < 0:
+        raise ValueError(value)
+    return seed
+
+
+def pivot(seed, user_id=None):
+    """Where the shuffled deck of this learner and seed starts, in [0, 1)"""
+    digest = hashlib.blake2b(f'{user_id}:{seed}'.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') / 2 ** 64
+
+
+def _after(values):
+    random_key, word_id = values
+    return Q(random_key__gt=random_key) | Q(random_key=random_key, id__gt=word_id)
+
+
+def _windows(queryset, start, cursor, limit):
+    """(first window, head or None): the rows after cursor, then the head when the first runs short"""
+    values, _ = decode_cursor(cursor)
+    try:
+        values = [float(values[0]), int(values[1])] if values and len(values) == 2 else None
+    except (TypeError, ValueError):
+        values = None
+
+    # Rows past the wrap-around come from the head, the words before the pivot
+    tail = queryset.filter(random_key__gte=start)
+    head = queryset.filter(random_key__lt=start).order_by(*ORDERING)
+    if values is not None and values[0] < start:
+        return head.filter(_after(values))[:limit + 1], None
+    if values is not None:
+        tail = tail.filter(_after(values))
+    return tail.order_by(*ORDERING)[:limit + 1], head
+
+
+def _shuffled_result(rows, limit):
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor([rows[-1].random_key, rows[-1].id]) if has_next else None
+    return rows, next_cursor
+
+
+def shuffled_page(queryset, start, cursor=None, limit=20):
+    """Return (rows, next_cursor) of the deck shuffled from pivot start, after cursor"""
+    window, head = _windows(queryset, start, cursor, limit)
+    rows = list(window)
+    if head is not None and len(rows) <= limit:
+        rows += head[:limit + 1 - len(rows)]
+    return _shuffled_result(rows, limit)
+
+
+async def ashuffled_page(queryset, start, cursor=None, limit=20):
+    """shuffled_page() for async views"""
+    window, head = _windows(queryset, start, cursor, limit)
+    rows = [row async for row in window]
+    if head is not None and len(rows) <= limit:
+        rows += [row async for row in head[:limit + 1 - len(rows)]]
+    return _shuffled_result(rows, limit)
+
+
+def _draw(queryset, pivots):
+    """Id of the first word at or after each pivot in key order (the first word overall past the end)"""
+    ordered = queryset.order_by(*ORDERING).values('pk')
+    # The ORM takes milliseconds to compile a subquery per pivot, so one is compiled with a
+    # placeholder pivot (keys are never negative) and every pivot is bound into a copy of it
+    pick_sql, pick_params = ordered.filter(random_key__gte=PIVOT_PLACEHOLDER)[:1].query.sql_with_params()
+    first_sql, first_params = ordered[:1].query.sql_with_params()
+    slot = list(pick_params).index(PIVOT_PLACEHOLDER)
+    pick = f'COALESCE(({pick_sql}), ({first_sql}))'
+    params = []
+    for p in pivots:
+        params += [*pick_params[:slot], p, *pick_params[slot + 1:], *first_params]
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join([pick] * len(pivots))}", params)
+        return cursor.fetchone()
+
+
+def sample(queryset, k):
+    """k distinct random words of queryset (fewer if it has fewer), in the order drawn.
+
+    Each word is drawn on its own: a pivot per draw and the first word
+    whose key follows it, so neighbours in key order are no likelier to
+    come together than any other words. Draws that land on a word already
+    drawn are skipped; a short round draws again among the words not
+    drawn yet.
+    """
+    drawn = []
+    for _ in range(SAMPLE_ROUNDS):
+        wanted = k - len(drawn)
+        if wanted <= 0:
+            break
+        # Twice the pivots needed, so a round rarely comes back short
+        remaining = queryset.exclude(pk__in=drawn) if drawn else queryset
+        ids = _draw(remaining, [random.random() for _ in range(2 * wanted)])
+        new = [i for i in dict.fromkeys(ids) if i is not None and i not in drawn]
+        if not new:
+            break
+        drawn += new[:wanted]
+    rows = queryset.order_by().in_bulk(drawn)
+    return [rows[i] for i in drawn if i in rows]
+
+
+def reseed(chunk_size=RESEED_CHUNK):
+    """Draw a new random_key for every word; returns how many were reseeded"""
+    ids = list(WordsBank.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(ids), chunk_size):
+        with transaction.atomic():
+            WordsBank.objects.bulk_update(
+                [WordsBank(id=i, random_key=random.random()) for i in ids[start:start + chunk_size]],
+                ['random_key'],
+            )
+    return len(ids)
@@ -0,0 +1,152 @@
+"""
+Word search: an FTS5 trigram index over WordsBank on SQLite, LIKE elsewhere.
+
+The index is an external-content table kept in sync by three triggers on
+vocabulary_wordsbank. SQLite drops a table's triggers whenever a migration
+rebuilds it (adding a column with a callable default, changing a column
+type, ...), so such a migration must be followed by RunPython calling
+create_search_index (see migration 0011), or `manage.py
+rebuild_search_index` run after it. Until then search_index_available()
+reports the index as unusable and searches fall back to LIKE.
+"""
+
+import logging
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+
+SEARCH_TABLE = 'vocabulary_wordsbank_fts'
+SEARCH_COLUMNS = ['word', 'meaning_english', 'meaning_urdu', 'example_sentence', 'synonyms']
+SEARCH_TRIGGERS = [f'{SEARCH_TABLE}_{suffix}' for suffix in ('ai', 'ad', 'au')]
+
+# The trigram tokenizer cannot match anything shorter than one trigram
+MIN_INDEXED_QUERY_LENGTH = 3
+
+_index_available = None
+
+logger = logging.getLogger(__name__)
+
+
+def create_search_index(cursor):
+    """Create the FTS5 index over WordsBank and the triggers that keep it in sync"""
+    columns = ', '.join(SEARCH_COLUMNS)
+    new_columns = ', '.join(f'new.{c}' for c in SEARCH_COLUMNS)
+    old_columns = ', '.join(f'old.{c}' for c in SEARCH_COLUMNS)
+
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+        f"{columns}, content='vocabulary_wordsbank', content_rowid='id', tokenize='trigram')"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ai AFTER INSERT ON vocabulary_wordsbank BEGIN "
+        f"INSERT INTO {SEARCH_TABLE}(rowid, {columns}) VALUES (new.id, {new_columns}); END"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ad AFTER DELETE ON vocabulary_wordsbank BEGIN "
+        f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_columns}); END"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_au AFTER UPDATE ON vocabulary_wordsbank BEGIN "
+        f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_columns}); "
+        f"INSERT INTO {SEARCH_TABLE}(rowid, {columns}) VALUES (new.id, {new_columns}); END"
+    )
+    rebuild_search_index(cursor)
+
+
+def drop_search_index(cursor):
+    for trigger in SEARCH_TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+def rebuild_search_index(cursor):
+    """Repopulate the index from the current contents of WordsBank"""
+    cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+
+
+def missing_search_triggers(cursor):
+    """Names of the sync triggers that do not exist (all of them without the index)"""
+    cursor.execute(
+        f"SELECT name FROM sqlite_master WHERE type = 'trigger' AND name IN ({', '.join(['%s'] * len(SEARCH_TRIGGERS))})",
+        SEARCH_TRIGGERS,
+    )
+    present = {name for (name,) in cursor.fetchall()}
+    return [trigger for trigger in SEARCH_TRIGGERS if trigger not in present]
+
+
+def search_index_available():
+    """Check (once per process) whether the FTS5 index exists and is kept in sync on this database"""
+    global _index_available
+    if _index_available is None:
+        _index_available = False
+        if connection.vendor == 'sqlite' and SEARCH_TABLE in connection.introspection.table_names():
+            with connection.cursor() as cursor:
+                missing = missing_search_triggers(cursor)
+            if missing:
+                # A stale index would silently miss new and edited words; LIKE is slower but right
+                logger.warning('Search index triggers %s are missing; searching without the index. '
+                               'Run manage.py rebuild_search_index.', ', '.join(missing))
+            else:
+                _index_available = True
+    return _index_available
+
+
+async def asearch_index_available():
+    """search_index_available() for async views, which must call it before search_words()"""
+    if _index_available is None:
+        await sync_to_async(search_index_available)()
+    return _index_available
+
+
+def _match_expression(query):
+    # Quote the whole query as one phrase so user input is never parsed as FTS5 syntax
+    return '"' + query.replace('"', '""') + '"'
+
+
+def search_words(queryset, query):
+    """Filter a WordsBank queryset by query and order it by relevance.
+
+    Exact word matches come first, then words starting with the query, then
+    words containing it, then matches in meanings, examples or synonyms.
+    """
+    query = query.strip()
+    if not query:
+        return queryset
+
+    if search_index_available() and len(query) >= MIN_INDEXED_QUERY_LENGTH:
+        queryset = queryset.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s",
+            [_match_expression(query)],
+        ))
+    else:
+        queryset = queryset.filter(
+            Q(word__icontains=query) |
+            Q(meaning_english__icontains=query) |
+            Q(meaning_urdu__icontains=query)
+        )
+
+    return queryset.annotate(search_rank=Case(
+        When(word__iexact=query, then=Value(0)),
+        When(word__istartswith=query, then=Value(1)),
+        When(word__icontains=query, then=Value(2)),
+        default=Value(3),
+        output_field=IntegerField(),
+    )).order_by('search_rank', 'word')
+
+
+def find_word(text):
+    """The WordsBank row spelled like text ignoring case, or None.
+
+    Written as Lower('word') = value (not word__iexact, which SQLite runs as
+    a LIKE scan) so it is a lookup on the lower(word) index.
+    """
+    from .models import WordsBank
+
+    text = (text or '').strip().lower()
+    if not text:
+        return None
+    matches = list(WordsBank.objects.alias(word_lower=Lower('word')).filter(word_lower=text).order_by()[:1])
+    return matches[0] if matches else None
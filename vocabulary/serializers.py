@@ -0,0 +1,33 @@
+def split_terms(text):
+    """Comma-separated synonyms/antonyms as a list"""
+    return [t.strip() for t in text.split(',') if t.strip()]
+
+
+def serialize_word(word):
+    """Plain dict of the fields a flashcard needs, ready for JSON"""
+    return {
+        'id': word.id,
+        'word': word.word,
+        'pronunciation': word.pronunciation,
+        'word_type': str(word.word_type),
+        'difficulty_level': str(word.difficulty_level) if word.difficulty_level_id else None,
+        'meaning_english': word.meaning_english,
+        'meaning_urdu': word.meaning_urdu,
+        'example_sentence': word.example_sentence,
+        'synonyms': word.get_synonyms_list(),
+        'antonyms': word.get_antonyms_list(),
+    }
+
+
+def serialize_progress(progress):
+    """Scheduling state of one UserProgress row"""
+    return {
+        'word_id': progress.word_id,
+        'mastery_level': progress.mastery_level,
+        'times_correct': progress.times_correct,
+        'times_incorrect': progress.times_incorrect,
+        'ease_factor': round(progress.ease_factor, 2),
+        'interval_days': progress.interval_days,
+        'repetitions': progress.repetitions,
+        'due_at': progress.due_at.isoformat(),
+    }
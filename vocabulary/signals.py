@@ -0,0 +1,108 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import caching, changes, quiz, relationship_graph, user_stats
+from .models import DifficultyLevel, UserProgress, WordList, WordRelationship, WordsBank, WordType, stats_snapshot
+
+CHANGE_KINDS = {WordsBank: changes.WORD, WordRelationship: changes.RELATIONSHIP}
+
+
+@receiver([post_save, post_delete], sender=WordsBank)
+@receiver([post_save, post_delete], sender=WordType)
+@receiver([post_save, post_delete], sender=DifficultyLevel)
+@receiver([post_save, post_delete], sender=WordList)
+@receiver([post_save, post_delete], sender=WordRelationship)
+def bump_cache_namespaces(sender, raw=False, **kwargs):
+    # Also invalidates the relationship graph, which follows the "relationships" namespace
+    if not raw:
+        caching.bump_on_commit(*caching.MODEL_NAMESPACES[sender.__name__])
+
+
+@receiver([post_save, post_delete], sender=User)
+def bump_user_namespace(sender, raw=False, update_fields=None, **kwargs):
+    # Logins only touch last_login, which nothing cached depends on
+    if not raw and update_fields != frozenset({'last_login'}):
+        caching.bump_on_commit(caching.USERS)
+
+
+@receiver(m2m_changed, sender=WordsBank.word_lists.through)
+def bump_word_list_membership(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        caching.bump_on_commit(caching.WORDS)
+
+
+@receiver(post_save, sender=WordsBank)
+def bump_relationships_on_rename(sender, instance, created, raw=False, **kwargs):
+    # Word cards show the names of their related words and are keyed on the relationships namespace
+    if raw or created or instance.__dict__.get('_loaded_word', None) == instance.word:
+        return
+    instance._loaded_word = instance.word
+    related = relationship_graph.related_ids_for([instance.pk])[instance.pk]
+    if any(related.values()):
+        caching.bump_on_commit(caching.RELATIONSHIPS)
+
+
+@receiver(post_save, sender=WordsBank)
+@receiver(post_save, sender=WordRelationship)
+def log_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        changes.record(CHANGE_KINDS[sender], [instance.pk])
+
+
+@receiver(post_delete, sender=WordsBank)
+@receiver(post_delete, sender=WordRelationship)
+def log_deletion(sender, instance, **kwargs):
+    changes.record(CHANGE_KINDS[sender], [instance.pk], deleted=True)
+
+
+@receiver(m2m_changed, sender=WordsBank.word_lists.through)
+def log_membership_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # The words are only known before the clear
+        instance._cleared_word_ids = list(instance.wordsbank_set.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            word_ids = [instance.pk]
+        elif action == 'post_clear':
+            word_ids = instance.__dict__.pop('_cleared_word_ids', [])
+        else:
+            word_ids = pk_set
+        changes.record(changes.WORD, word_ids)
+
+
+@receiver(pre_delete, sender=WordList)
+@receiver(pre_delete, sender=DifficultyLevel)
+def log_cascaded_word_changes(sender, instance, **kwargs):
+    # List memberships are deleted and levels set to NULL without saving the words
+    words = instance.wordsbank_set.order_by().values_list('id', flat=True)
+    changes.record(changes.WORD, list(words))
+
+
+@receiver([post_save, post_delete], sender=WordsBank)
+def refresh_quiz_pools(sender, instance, raw=False, **kwargs):
+    if not raw:
+        quiz.refresh_on_commit(quiz.word_buckets([instance]))
+
+
+@receiver(pre_delete, sender=DifficultyLevel)
+def refresh_quiz_pools_of_level(sender, instance, **kwargs):
+    # The level's words move to the "no level" buckets without being saved
+    word_types = instance.wordsbank_set.order_by().values_list('word_type_id', flat=True).distinct()
+    quiz.refresh_on_commit({(word_type_id, None) for word_type_id in word_types})
+
+
+@receiver(post_save, sender=UserProgress)
+def update_user_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else getattr(instance, '_stats_snapshot', None)
+    new = stats_snapshot(instance)
+    user_stats.apply_changes(instance.user, [(instance.word_id, old, new)])
+    instance._stats_snapshot = new
+
+
+@receiver(post_delete, sender=UserProgress)
+def update_user_stats_on_delete(sender, instance, **kwargs):
+    old = getattr(instance, '_stats_snapshot', None)
+    user_stats.apply_changes(instance.user, [(instance.word_id, old, None)], create=False)
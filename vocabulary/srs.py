@@ -0,0 +1,195 @@
+"""
+SM-2 spaced repetition scheduling for UserProgress.
+
+Each progress row carries its own ease factor, interval and due date.
+Selecting what a user should review next is a single range scan on the
+(user, due_at) index, so it stays cheap however many rows exist.
+"""
+
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import review_counters, user_stats
+from .models import UserProfile, UserProgress, UserStats, stats_snapshot
+
+MIN_EASE = 1.3
+PASSING_QUALITY = 3
+MAX_MASTERY = 5
+# Repeated correct answers grow the interval geometrically; past this it would overflow due_at
+MAX_INTERVAL_DAYS = 3650
+
+
+def user_timezone(user):
+    """The learner's timezone from UserProfile.user_timezone, else the site default"""
+    try:
+        name = user.userprofile.user_timezone
+    except UserProfile.DoesNotExist:
+        name = ''
+    try:
+        return ZoneInfo(name or settings.TIME_ZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(settings.TIME_ZONE)
+
+
+def end_of_local_day(user, now=None):
+    """The first instant of tomorrow in the user's timezone"""
+    tz = user_timezone(user)
+    local_now = (now or timezone.now()).astimezone(tz)
+    tomorrow = local_now.date() + timedelta(days=1)
+    return datetime.combine(tomorrow, time.min, tzinfo=tz)
+
+
+def apply_review(progress, quality, now=None):
+    """Update progress in place for a review graded 0 (blackout) to 5 (perfect).
+
+    Does not save; callers decide how to persist (single save or bulk).
+    """
+    now = now or timezone.now()
+    quality = max(0, min(5, int(quality)))
+
+    if quality >= PASSING_QUALITY:
+        if progress.repetitions == 0:
+            progress.interval_days = 1
+        elif progress.repetitions == 1:
+            progress.interval_days = 6
+        else:
+            progress.interval_days = min(round(progress.interval_days * progress.ease_factor), MAX_INTERVAL_DAYS)
+        progress.repetitions += 1
+        progress.times_correct += 1
+    else:
+        progress.repetitions = 0
+        progress.interval_days = 1
+        progress.times_incorrect += 1
+
+    progress.ease_factor = max(
+        MIN_EASE,
+        progress.ease_factor + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02),
+    )
+    progress.mastery_level = min(progress.repetitions, MAX_MASTERY)
+    progress.due_at = now + timedelta(days=progress.interval_days)
+    return progress
+
+
+def record_review(user, word, quality, now=None):
+    """Grade one review and save the updated progress row"""
+    progress, _ = UserProgress.objects.get_or_create(user=user, word=word)
+    apply_review(progress, quality, now)
+    progress.save()
+    return progress
+
+
+def next_due(user, n=20, now=None):
+    """Up to n progress rows due by the end of the user's local day, most overdue first"""
+    return (
+        UserProgress.objects
+        .filter(user=user, due_at__lt=end_of_local_day(user, now))
+        .select_related('word', 'word__word_type', 'word__difficulty_level')
+        .order_by('due_at')[:n]
+    )
+
+
+OUTCOME_QUALITY = {'incorrect': 1, 'correct': 4}
+MAX_REVIEW_BATCH = 200
+PROGRESS_STATE_FIELDS = [
+    'mastery_level', 'times_correct', 'times_incorrect',
+    'ease_factor', 'interval_days', 'repetitions', 'due_at', 'last_attempt',
+]
+
+
+def parse_review_events(items, now=None):
+    """Validate raw client review events into (word_id, quality, reviewed_at) tuples.
+
+    Each item needs a word_id and either an integer quality (0-5) or an
+    outcome of "correct"/"incorrect". reviewed_at is an optional ISO
+    timestamp; missing or future timestamps are replaced with now.
+    Returns (events, errors) where errors lists the indexes of bad items.
+    """
+    now = now or timezone.now()
+    events, errors = [], []
+    for i, item in enumerate(items):
+        try:
+            word_id = int(item['word_id'])
+            if 'quality' in item:
+                quality = int(item['quality'])
+                if not 0 <= quality <= 5:
+                    raise ValueError
+            else:
+                quality = OUTCOME_QUALITY[item['outcome']]
+            reviewed_at = parse_datetime(item['reviewed_at']) if item.get('reviewed_at') else None
+        except (KeyError, TypeError, ValueError):
+            errors.append(i)
+            continue
+        if reviewed_at is not None and timezone.is_naive(reviewed_at):
+            reviewed_at = timezone.make_aware(reviewed_at)
+        if reviewed_at is None or reviewed_at > now:
+            reviewed_at = now
+        events.append((word_id, quality, reviewed_at))
+    return events, errors
+
+
+def ingest_reviews(user, events, now=None):
+    """Apply a batch of (word_id, quality, reviewed_at) events in one transaction.
+
+    The statement count does not depend on the batch size:
+    - the user's UserStats row is created if missing and locked, so batches
+      for the same user run one at a time
+    - INSERT ... ON CONFLICT DO NOTHING creates missing progress rows
+    - one SELECT reads the current scheduling state
+    - one INSERT ... ON CONFLICT DO UPDATE writes every new state back
+    - the user's UserStats row is adjusted by the difference (user_stats)
+
+    WordsBank.times_reviewed/last_reviewed are not touched here; the counts
+    go to the write-behind buffer in review_counters once the batch commits.
+
+    The new state is computed in Python from the state read, since SM-2
+    depends on the previous ease and interval and cannot be written as F()
+    expressions; that read-modify-write is safe because of the lock above.
+    SQLite ignores SELECT ... FOR UPDATE, but the first INSERT takes its
+    database-wide write lock, which serializes the batches just the same.
+
+    Returns the updated UserProgress rows.
+    """
+    now = now or timezone.now()
+    events = sorted(events, key=lambda e: e[2])
+    word_ids = sorted({word_id for word_id, _, _ in events})
+    if not word_ids:
+        return []
+
+    with transaction.atomic():
+        # A write first: on SQLite it waits for the write lock instead of failing to upgrade a read
+        UserStats.objects.bulk_create([UserStats(user=user)], ignore_conflicts=True)
+        UserStats.objects.select_for_update().filter(user=user).values_list('pk', flat=True).get()
+        UserProgress.objects.bulk_create(
+            [UserProgress(user=user, word_id=word_id, due_at=now) for word_id in word_ids],
+            ignore_conflicts=True,
+        )
+        progress = {
+            p.word_id: p
+            for p in UserProgress.objects.select_for_update().filter(user=user, word_id__in=word_ids)
+        }
+
+        reviews = {}
+        for word_id, quality, reviewed_at in events:
+            apply_review(progress[word_id], quality, reviewed_at)
+            count, last = reviews.get(word_id, (0, reviewed_at))
+            reviews[word_id] = (count + 1, max(last, reviewed_at))
+
+        UserProgress.objects.bulk_create(
+            list(progress.values()),
+            update_conflicts=True,
+            unique_fields=['word', 'user'],
+            update_fields=PROGRESS_STATE_FIELDS,
+        )
+        # bulk_create skips post_save, so apply the stats difference here
+        user_stats.apply_changes(user, [
+            (word_id, getattr(p, '_stats_snapshot', None), stats_snapshot(p)) for word_id, p in progress.items()
+        ])
+
+        review_counters.record_reviews(reviews)
+
+    return [progress[word_id] for word_id in word_ids]
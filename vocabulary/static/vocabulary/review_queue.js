@@ -0,0 +1,47 @@
+// Review results queued by the flashcard and quiz pages and sent to the
+// review API in batches: once batchSize are waiting and when the page is hidden.
+//
+// Batches that fail for a reason that may pass (network errors, 429, 5xx) go
+// back to the front of the queue for the next flush. Any other error status
+// (a 400 for a malformed batch, a 403 after the CSRF token changed) would fail
+// the same way every time, so that batch is dropped instead of blocking the
+// reviews queued after it.
+
+// At most this many reviews per request (srs.MAX_REVIEW_BATCH)
+const REVIEW_MAX_BATCH = 200;
+
+function isRetryableStatus(status) {
+    return status === 429 || status >= 500;
+}
+
+function createReviewQueue(url, csrfToken, batchSize) {
+    let queue = [];
+
+    function flush() {
+        if (queue.length === 0) return;
+        const reviews = queue.splice(0, REVIEW_MAX_BATCH);
+        const keep = () => { queue = reviews.concat(queue); };
+        fetch(url, {
+            method: 'POST',
+            credentials: 'same-origin',
+            keepalive: true,
+            headers: {'Content-Type': 'application/json', 'X-CSRFToken': csrfToken},
+            body: JSON.stringify({reviews}),
+        }).then(response => {
+            if (response.ok) return;
+            if (isRetryableStatus(response.status)) {
+                keep();
+            } else {
+                console.warn(`Dropped ${reviews.length} reviews: the review API answered ${response.status}`);
+            }
+        }, keep);
+    }
+
+    function push(review) {
+        queue.push(review);
+        if (queue.length >= batchSize) flush();
+    }
+
+    window.addEventListener('pagehide', flush);
+    return {push, flush};
+}
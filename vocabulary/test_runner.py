@@ -0,0 +1,31 @@
+"""
+Test runner that runs every test inside an N+1 detection scope.
+
+Each test (and, through NPlusOneMiddleware, each request it makes) fails
+with NPlusOneError as soon as one query shape repeats more than
+VOCABULARY_NPLUSONE['THRESHOLD'] times. Wrap intended repetition in
+nplusone.allow_repeated_queries().
+"""
+
+import unittest
+
+from django.test.runner import DiscoverRunner
+
+from . import nplusone
+
+
+class DetectingTestResult(unittest.TextTestResult):
+    def startTest(self, test):
+        self._detection = nplusone.detect(test.id(), action='raise')
+        self._detection.__enter__()
+        super().startTest(test)
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        self._detection.__exit__(None, None, None)
+
+
+class DetectingTestRunner(DiscoverRunner):
+    def get_resultclass(self):
+        # --debug-sql and --pdb bring their own result classes
+        return super().get_resultclass() or DetectingTestResult
@@ -1,3 +1,1493 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from contextlib import redirect_stdout
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection
+from django.db.models import Q
+from django.contrib import admin
+from django.contrib.staticfiles import finders
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.template import Context, Template
+from django.db.utils import ConnectionHandler
+from django.http import QueryDict
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from . import benchmarks, caching, changes, database, deck_bundles, loadtest, metrics, nplusone, quiz, relationship_graph, review_counters, sampling, search, user_stats, views
+from .bulk import WordUpserter
+from .fragments import render_word_cards, serialize_cards
+from .models import ChangeLog, DeckBundle, DifficultyLevel, DistractorPool, UserProgress, UserStats, WordList, WordRelationship, WordsBank, WordType
+from .pagination import encode_cursor, paginate
+from .search import find_word, search_words
+from .serializers import serialize_word
+from .srs import MAX_REVIEW_BATCH, ingest_reviews, next_due, record_review
+from .views import _deck_queryset
+
+try:
+    # The generators' own requirements (ai_tools/requirements.txt)
+    from ai_tools import pipeline, response_cache, stub_server, word_generator
+except ImportError:
+    pipeline = None
+
+# Tables whose size grows with content or users; reading them without an index is a regression
+HOT_TABLES = {
+    'vocabulary_wordsbank',
+    'vocabulary_wordsbank_word_lists',
+    'vocabulary_wordrelationship',
+    'vocabulary_userprogress',
+    'vocabulary_userstats',
+}
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+class QueryPlanTests(TestCase):
+    """EXPLAIN QUERY PLAN over the hot queries of the views and commands.
+
+    Each test runs the real code path, captures its SELECTs and fails if any
+    of them reads a hot table without an index or sorts in a temporary
+    B-tree. The planner's choices depend on statistics, so the fixture is
+    realistically shaped and ANALYZEd. Search (ordered by a computed rank)
+    and whole-table loads such as the relationship graph are out of scope.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        types = WordType.objects.bulk_create(
+            [WordType(word_type=t) for t in ('noun', 'verb', 'adjective', 'adverb')]
+        )
+        levels = DifficultyLevel.objects.bulk_create(
+            [DifficultyLevel(level=level) for level, _ in DifficultyLevel.LEVEL_CHOICES]
+        )
+        words = WordsBank.objects.bulk_create([
+            WordsBank(
+                word=f'Word{i:04d}',
+                word_type=types[i % len(types)],
+                difficulty_level=levels[i % len(levels)],
+                meaning_english=f'meaning {i}',
+                meaning_urdu=f'urdu {i}',
+                example_sentence=f'example {i}',
+            )
+            for i in range(2000)
+        ])
+        cls.full_list, cls.half_list = WordList.objects.bulk_create(
+            [WordList(word_list_name='Full'), WordList(word_list_name='Half')]
+        )
+        Through = WordsBank.word_lists.through
+        Through.objects.bulk_create(
+            [Through(wordsbank_id=w.id, wordlist_id=cls.full_list.id) for w in words]
+            + [Through(wordsbank_id=w.id, wordlist_id=cls.half_list.id) for w in words[::2]]
+        )
+        WordRelationship.objects.bulk_create([
+            WordRelationship(word1=words[i], word2=words[i + 1], relationship_type='synonym')
+            for i in range(0, 1000, 2)
+        ])
+        cls.user = User.objects.create_user('learner', 'learner@example.com', 'pw')
+        UserProgress.objects.bulk_create([UserProgress(user=cls.user, word=w) for w in words[:300]])
+        cls.difficulty = levels[1]
+        cls.word_type = types[2]
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def explain(self, run):
+        with CaptureQueriesContext(connection) as ctx:
+            run()
+        plans = []
+        for query in ctx.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                plans.append((query['sql'], [row[-1] for row in cursor.fetchall()]))
+        return plans
+
+    def assertIndexed(self, run):
+        plans = self.explain(run)
+        self.assertTrue(plans, 'no SELECT was captured')
+        for sql, plan in plans:
+            for step in plan:
+                scan = FULL_SCAN.match(step)
+                self.assertFalse(scan and scan.group(1) in HOT_TABLES, f'full scan of {step[5:]}:\n{sql}\n{plan}')
+                self.assertNotIn('TEMP B-TREE', step, f'sort without an index:\n{sql}\n{plan}')
+
+    def assertPagesIndexed(self, queryset, ordering):
+        first = paginate(queryset, ordering, limit=20)
+        second = paginate(queryset, ordering, first.next_cursor, limit=20)
+        self.assertIndexed(lambda: paginate(queryset, ordering, limit=20))
+        self.assertIndexed(lambda: paginate(queryset, ordering, first.next_cursor, limit=20))
+        self.assertIndexed(lambda: paginate(queryset, ordering, second.previous_cursor, limit=20))
+
+    def test_word_pages(self):
+        self.assertPagesIndexed(*_deck_queryset({}))
+
+    def test_word_pages_by_difficulty(self):
+        self.assertPagesIndexed(*_deck_queryset({'difficulty': str(self.difficulty.id)}))
+
+    def test_word_pages_by_type(self):
+        self.assertPagesIndexed(*_deck_queryset({'type': str(self.word_type.id)}))
+
+    def test_word_pages_by_word_list(self):
+        self.assertPagesIndexed(*_deck_queryset({'list': str(self.full_list.id)}))
+        self.assertPagesIndexed(*_deck_queryset({'list': str(self.half_list.id)}))
+
+    def test_shuffled_pages(self):
+        for params in ({}, {'difficulty': str(self.difficulty.id)}, {'type': str(self.word_type.id)},
+                       {'list': str(self.half_list.id)}):
+            words, _ = _deck_queryset(params)
+            for pivot in (0.5, 0.99):
+                _, cursor = sampling.shuffled_page(words, pivot, limit=20)
+                self.assertIndexed(lambda: sampling.shuffled_page(words, pivot, limit=20))
+                self.assertIndexed(lambda: sampling.shuffled_page(words, pivot, cursor, limit=20))
+
+    def test_quiz_pool_build(self):
+        self.assertIndexed(lambda: quiz.build_pool(self.word_type.id, self.difficulty.id))
+
+    def test_random_draws(self):
+        for params in ({}, {'difficulty': str(self.difficulty.id)}, {'type': str(self.word_type.id)},
+                       {'list': str(self.half_list.id)}):
+            words, _ = _deck_queryset(params)
+            self.assertIndexed(lambda: sampling.sample(words, 10))
+
+    def test_relationship_pages(self):
+        relationships = WordRelationship.objects.select_related('word1__word_type', 'word2__word_type')
+        self.assertPagesIndexed(relationships, ['-created_at', '-id'])
+
+    def test_case_insensitive_word_lookup(self):
+        self.assertIndexed(lambda: self.assertIsNotNone(find_word('word0042')))
+
+    def test_due_reviews(self):
+        self.assertIndexed(lambda: list(next_due(self.user)))
+
+    def test_review_ingestion(self):
+        now = timezone.now()
+        events = [(word_id, 4, now) for word_id in WordsBank.objects.values_list('id', flat=True)[:50]]
+        self.assertIndexed(lambda: ingest_reviews(self.user, events, now))
+
+    def test_bulk_upsert_existing_lookup(self):
+        records = [
+            {'word': f'Word{i:04d}', 'word_type': 'noun', 'meaning_english': 'm',
+             'meaning_urdu': 'm', 'example_sentence': 'e'}
+            for i in range(100)
+        ]
+        upserter = WordUpserter()
+        self.assertIndexed(lambda: upserter.save_batch(records))
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.noun = WordType.objects.create(word_type='noun')
+
+    def add(self, word, **fields):
+        return WordsBank.objects.create(word=word, word_type=self.noun, **{
+            'meaning_english': f'{word} meaning', 'meaning_urdu': 'x', 'example_sentence': 'x', **fields,
+        })
+
+    def search(self, query):
+        return [word.word for word in search_words(WordsBank.objects.all(), query)]
+
+    def test_words_saved_after_migrating_are_indexed(self):
+        # Rebuilding vocabulary_wordsbank in a migration drops the index triggers
+        self.add('happy')
+        self.assertEqual(self.search('happ'), ['happy'])
+
+    def test_the_migrated_schema_keeps_the_index_in_sync(self):
+        with connection.cursor() as cursor:
+            self.assertEqual(search.missing_search_triggers(cursor), [])
+        self.assertTrue(search.search_index_available())
+
+    def test_ranking_exact_then_prefix_then_substring_then_meanings(self):
+        for word in ['unhappy', 'happy', 'happ', 'happening']:
+            self.add(word)
+        self.add('glad', meaning_english='feeling happy')
+        self.add('joyful', synonyms='happy, cheerful')
+        self.add('sad')
+        self.assertEqual(self.search('happ'), ['happ', 'happening', 'happy', 'unhappy', 'glad', 'joyful'])
+        self.assertEqual(self.search('HAPPY'), ['happy', 'unhappy', 'glad', 'joyful'])
+
+    @nplusone.allow_repeated_queries()
+    def test_inserts_updates_and_deletes_reach_the_index(self):
+        glad = self.add('glad', meaning_english='feeling happy')
+        unhappy = self.add('unhappy', meaning_english='sad')
+        self.assertEqual(self.search('happ'), ['unhappy', 'glad'])
+
+        glad.meaning_english = 'content'
+        glad.save()
+        unhappy.word = 'sorrowful'
+        unhappy.save()
+        self.assertEqual(self.search('happ'), [])
+        self.assertEqual(self.search('sorrow'), ['sorrowful'])
+        self.assertEqual(self.search('content'), ['glad'])
+
+        WordsBank.objects.filter(id=glad.id).update(meaning_english='cheerful')
+        self.assertEqual(self.search('cheer'), ['glad'])
+        glad.delete()
+        self.assertEqual(self.search('cheer'), [])
+        self.add('cheery')
+        self.assertEqual(self.search('cheer'), ['cheery'])
+
+    def test_short_queries_fall_back_to_like(self):
+        self.add('ox')
+        self.add('box')
+        self.add('lucid', meaning_english='clear to the eye, like an ox')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.search('ox'), ['ox', 'box', 'lucid'])
+        self.assertNotIn(search.SEARCH_TABLE, queries[0]['sql'])
+
+    @nplusone.allow_repeated_queries()
+    def test_fts_syntax_in_queries_is_matched_literally(self):
+        self.add('either', meaning_english='one or the other: "this OR that"')
+        self.add('this')
+        for query in ['"', '"this', 'this OR that', 'this AND', 'NEAR(this', 'thi*', 'a"b"c', '-this', 'this:x']:
+            self.search(query)
+        self.assertEqual(self.search('this OR that'), ['either'])
+        self.assertEqual(self.search('"this OR'), ['either'])
+        self.assertEqual(self.search('thi*'), [])
+
+    def test_missing_triggers_fall_back_to_like(self):
+        self.add('happy')
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TRIGGER {search.SEARCH_TRIGGERS[0]}')
+        # The test transaction rolls the DROP back; nothing to restore
+        with mock.patch.object(search, '_index_available', None), self.assertLogs('vocabulary.search', 'WARNING'):
+            self.assertFalse(search.search_index_available())
+            self.add('happier')
+            self.assertEqual(self.search('happ'), ['happier', 'happy'])
+
+
+class LoadVocabularyTests(TestCase):
+    def load(self, lines, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'words.jsonl')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+            out = io.StringIO()
+            call_command('load_vocabulary', path, stdout=out, **options)
+        return out.getvalue()
+
+    def record(self, word, **fields):
+        return json.dumps({'word': word, 'word_type': 'noun', 'meaning_english': f'{word} meaning',
+                           'meaning_urdu': 'x', 'example_sentence': 'x', **fields})
+
+    def test_rows_that_are_not_objects_are_reported_and_skipped(self):
+        output = self.load([self.record('first'), '[1, 2]', '"just a string"', '{not json', self.record('second')])
+        self.assertEqual(set(WordsBank.objects.values_list('word', flat=True)), {'first', 'second'})
+        self.assertIn('expected a JSON object on line 2', output)
+        self.assertIn('expected a JSON object on line 3', output)
+        self.assertIn('invalid JSON on line 4', output)
+
+    def test_fields_that_are_not_text_are_rejected(self):
+        output = self.load([self.record(123), self.record('typed', word_type=['noun']), self.record('kept')])
+        self.assertEqual(list(WordsBank.objects.values_list('word', flat=True)), ['kept'])
+        self.assertIn('Skipped 123: word must be text', output)
+        self.assertIn('Skipped typed: word_type must be text', output)
+
+
+class CreateWordRelationshipsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        noun = WordType.objects.create(word_type='noun')
+        lines = {
+            'happy': ('glad, cheerful, Joyful', 'sad'),
+            'glad': ('happy', 'sad, gloomy'),
+            'cheerful': ('happy, glad, happy', ''),
+            'joyful': ('', 'unheard-of'),
+            'sad': ('gloomy', 'happy, glad'),
+            'gloomy': ('sad', 'cheerful'),
+        }
+        words = {
+            word: WordsBank.objects.create(word=word, word_type=noun, synonyms=synonyms, antonyms=antonyms,
+                                           meaning_english='m', meaning_urdu='m', example_sentence='e')
+            for word, (synonyms, antonyms) in lines.items()
+        }
+        # Already stored, so neither run counts it
+        WordRelationship.objects.create(word1=words['happy'], word2=words['glad'], relationship_type='synonym')
+
+    def run_command(self, *args):
+        out = io.StringIO()
+        call_command('create_word_relationships', *args, stdout=out)
+        self.output = out.getvalue()
+        return {
+            label: int(number) for label, number in re.findall(r'^(Synonym|Antonym|Words not found).*: (\d+)$', self.output, re.M)
+        }
+
+    def test_dry_run_reports_the_counts_of_a_real_run_and_writes_nothing(self):
+        relationships = set(WordRelationship.objects.values_list('word1_id', 'word2_id', 'relationship_type'))
+        change_count = ChangeLog.objects.count()
+        dry = self.run_command('--dry-run')
+        # One line per relationship counted: not happy-glad (stored) nor the reverse mentions
+        would_create = re.findall(r'^Would create (\w+): (\S+) ↔ (\S+)$', self.output, re.M)
+        self.assertEqual(len(would_create), 8)
+        self.assertNotIn(('synonym', 'happy', 'glad'), would_create)
+        self.assertNotIn(('synonym', 'glad', 'happy'), would_create)
+        self.assertEqual([line for line in would_create if {'happy', 'cheerful'} == set(line[1:])],
+                         [('synonym', 'cheerful', 'happy')])
+        self.assertEqual(set(WordRelationship.objects.values_list('word1_id', 'word2_id', 'relationship_type')), relationships)
+        self.assertEqual(ChangeLog.objects.count(), change_count)
+
+        real = self.run_command()
+        self.assertEqual(dry, real)
+        self.assertEqual(real, {'Synonym': 4, 'Antonym': 4, 'Words not found': 1})
+        self.assertEqual(WordRelationship.objects.count(), len(relationships) + 8)
+        self.assertEqual(self.run_command('--dry-run'), {'Synonym': 0, 'Antonym': 0, 'Words not found': 1})
+
+
+class ReviewCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        noun = WordType.objects.create(word_type='noun')
+        cls.words = WordsBank.objects.bulk_create([
+            WordsBank(word=f'counted{i}', word_type=noun, meaning_english='m', meaning_urdu='m', example_sentence='e')
+            for i in range(30)
+        ])
+
+    def setUp(self):
+        # Stands in for a shared cache; one process is all a test has
+        self.buffer = review_counters.CacheCounterBuffer(LocMemCache('review-counter-tests', {}))
+
+    def test_flush_writes_only_journaled_words(self):
+        now = timezone.now()
+        first, second = self.words[:2]
+        self.buffer.add({first.id: (2, now), second.id: (1, now)})
+        self.buffer.add({first.id: (3, now)})
+        with self.assertNumQueries(3):  # the UPDATE inside its savepoint
+            self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(self.buffer.flush(), 0)
+
+        self.buffer.add({second.id: (4, now)})
+        self.buffer.shutdown()
+        counts = dict(WordsBank.objects.filter(id__in=[first.id, second.id]).values_list('id', 'times_reviewed'))
+        self.assertEqual(counts, {first.id: 5, second.id: 5})
+
+    def test_counts_added_during_a_flush_are_kept(self):
+        word = self.words[0]
+        apply_deltas = review_counters.apply_deltas
+
+        def add_while_flushing(deltas):
+            self.buffer.add({word.id: (1, timezone.now())})
+            return apply_deltas(deltas)
+
+        self.buffer.add({word.id: (2, timezone.now())})
+        with mock.patch.object(review_counters, 'apply_deltas', add_while_flushing):
+            self.buffer.flush()
+        self.buffer.flush()
+        word.refresh_from_db()
+        self.assertEqual(word.times_reviewed, 3)
+
+    def test_unshared_caches_are_refused(self):
+        with self.assertRaises(ImproperlyConfigured):
+            review_counters.check_shared_cache(LocMemCache('review-counter-tests', {}))
+        with override_settings(VOCABULARY_REVIEW_COUNTERS={'BACKEND': 'cache'}), \
+                mock.patch.object(review_counters, '_buffer', None):
+            with self.assertRaises(ImproperlyConfigured):
+                review_counters.get_buffer()
+
+
+class ReviewApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        noun = WordType.objects.create(word_type='noun')
+        cls.words = WordsBank.objects.bulk_create([
+            WordsBank(word=f'reviewed{i}', word_type=noun, meaning_english='m', meaning_urdu='m', example_sentence='e')
+            for i in range(3)
+        ])
+        cls.user = User.objects.create_user('reviewer', password='x')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def post(self, reviews):
+        return self.client.post(reverse('vocabulary:review_api'), {'reviews': reviews}, content_type='application/json')
+
+    def test_batch_schedules_each_word_from_its_previous_state(self):
+        first, second, _ = self.words
+        start = timezone.now() - timedelta(days=2)
+        at = [(start + timedelta(minutes=i)).isoformat() for i in range(4)]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post([
+                # Out of order on purpose: events apply in reviewed_at order
+                {'word_id': first.id, 'outcome': 'correct', 'reviewed_at': at[2]},
+                {'word_id': first.id, 'outcome': 'correct', 'reviewed_at': at[0]},
+                {'word_id': first.id, 'outcome': 'correct', 'reviewed_at': at[1]},
+                {'word_id': second.id, 'outcome': 'incorrect', 'reviewed_at': at[3]},
+                {'word_id': 999999, 'outcome': 'correct'},
+                {'word_id': second.id, 'quality': 9},
+            ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['accepted'], 4)
+        self.assertEqual(response.json()['rejected'], [4, 5])
+
+        progress = {p.word_id: p for p in UserProgress.objects.filter(user=self.user)}
+        # SM-2 with quality 4 keeps the ease at 2.5: intervals 1, 6, then 6 * 2.5
+        self.assertEqual((progress[first.id].repetitions, progress[first.id].interval_days), (3, 15))
+        self.assertEqual(progress[first.id].due_at, datetime.fromisoformat(at[2]) + timedelta(days=15))
+        self.assertEqual(progress[first.id].times_correct, 3)
+        self.assertEqual((progress[second.id].repetitions, progress[second.id].interval_days), (0, 1))
+        self.assertEqual(progress[second.id].due_at, datetime.fromisoformat(at[3]) + timedelta(days=1))
+        self.assertEqual(progress[second.id].times_incorrect, 1)
+
+        # A later batch continues from the stored state
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post([{'word_id': first.id, 'outcome': 'correct'}])
+        progress[first.id].refresh_from_db()
+        self.assertEqual((progress[first.id].repetitions, progress[first.id].interval_days), (4, 38))
+        self.assertEqual(progress[first.id].times_correct, 4)
+        self.assertEqual(UserStats.objects.get(user=self.user).times_correct, 4)
+        review_counters.flush()
+        self.assertEqual(WordsBank.objects.get(id=first.id).times_reviewed, 4)
+
+    def test_malformed_bodies_are_rejected(self):
+        self.assertEqual(self.client.post(reverse('vocabulary:review_api'), 'nope', content_type='application/json').status_code, 400)
+        self.assertEqual(self.post({'word_id': self.words[0].id}).status_code, 400)
+        self.assertFalse(UserProgress.objects.filter(user=self.user).exists())
+
+    def test_review_queue_script_stays_within_the_batch_limit(self):
+        # The pages drop batches the API answers with a 4xx, so an oversized one would be lost
+        with open(finders.find('vocabulary/review_queue.js')) as f:
+            script = f.read()
+        self.assertIn(f'const REVIEW_MAX_BATCH = {MAX_REVIEW_BATCH};', script)
+        self.assertEqual(self.post([{'word_id': self.words[0].id}] * (MAX_REVIEW_BATCH + 1)).status_code, 400)
+
+
+class UserStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        noun = WordType.objects.create(word_type='noun')
+        easy, hard = DifficultyLevel.objects.create(level='easy'), DifficultyLevel.objects.create(level='hard')
+        cls.words = WordsBank.objects.bulk_create([
+            WordsBank(word=f'tracked{i}', word_type=noun, difficulty_level=[easy, hard, None][i % 3],
+                      meaning_english='m', meaning_urdu='m', example_sentence='e')
+            for i in range(6)
+        ])
+        cls.user = User.objects.create_user('tracked', password='x')
+
+    def assertMatchesRecompute(self):
+        fields = ['words_studied', 'words_mastered', 'times_correct', 'times_incorrect', 'by_difficulty', 'due_by_date']
+        maintained = UserStats.objects.filter(user=self.user).values(*fields).get()
+        user_stats.rebuild([self.user])
+        self.assertEqual(maintained, UserStats.objects.filter(user=self.user).values(*fields).get())
+
+    @nplusone.allow_repeated_queries()
+    def test_incremental_stats_match_a_recompute(self):
+        # Reviews buffer word counters; write them out before the test database goes
+        self.addCleanup(review_counters.flush)
+        now = timezone.now()
+        first, second, third = self.words[:3]
+        record_review(self.user, first, 4, now)
+        record_review(self.user, second, 1, now)
+        self.assertMatchesRecompute()
+
+        # Edits: another review, and a row mastered directly
+        record_review(self.user, first, 1, now + timedelta(days=1))
+        progress = UserProgress.objects.get(user=self.user, word=second)
+        progress.mastery_level = 5
+        progress.times_correct = 7
+        progress.due_at = now + timedelta(days=40)
+        progress.save()
+        self.assertMatchesRecompute()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_reviews(self.user, [(word.id, quality, now) for word in self.words for quality in (4, 5)], now)
+        self.assertMatchesRecompute()
+
+        UserProgress.objects.get(user=self.user, word=first).delete()
+        self.assertMatchesRecompute()
+        # Deleting a word deletes its progress rows through the cascade
+        third.delete()
+        self.assertMatchesRecompute()
+        self.assertEqual(UserStats.objects.get(user=self.user).words_studied, len(self.words) - 2)
+
+
+class RelationshipGraphTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        noun = WordType.objects.create(word_type='noun')
+        cls.happy, cls.glad, cls.sad = [
+            WordsBank.objects.create(word=word, word_type=noun, synonyms=synonyms, antonyms=antonyms,
+                                     meaning_english='m', meaning_urdu='m', example_sentence='e')
+            for word, synonyms, antonyms in [('happy', 'glad', 'sad'), ('glad', '', ''), ('sad', '', '')]
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def assertRelated(self, word, synonyms, antonyms):
+        self.assertEqual(relationship_graph.related_ids_for([word.id])[word.id], {
+            'synonym': [w.id for w in synonyms], 'antonym': [w.id for w in antonyms],
+        })
+
+    def test_lookups_follow_saves_and_deletes(self):
+        self.assertRelated(self.happy, [], [])
+        with self.captureOnCommitCallbacks(execute=True):
+            relationship = WordRelationship.objects.create(word1=self.happy, word2=self.glad, relationship_type='synonym')
+        # The change is seen by rebuilding the graph: one query, then none while it is current
+        with self.assertNumQueries(1):
+            self.assertRelated(self.happy, [self.glad], [])
+        with self.assertNumQueries(0):
+            self.assertRelated(self.glad, [self.happy], [])
+
+        # A page of words resolves its related words in one query
+        with self.assertNumQueries(1):
+            happy, glad, sad = relationship_graph.attach_related([self.happy, self.glad, self.sad])
+        with self.assertNumQueries(0):
+            self.assertEqual([w.word for w in happy.get_related_synonyms()], ['glad'])
+            self.assertEqual([w.word for w in glad.get_related_synonyms()], ['happy'])
+            self.assertEqual((sad.get_related_synonyms(), sad.get_related_antonyms()), ([], []))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            relationship.delete()
+        with self.assertNumQueries(1):
+            self.assertRelated(self.happy, [], [])
+
+    def test_create_word_relationships_invalidates_the_graph(self):
+        self.assertRelated(self.happy, [], [])
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('create_word_relationships', stdout=io.StringIO())
+        with self.assertNumQueries(1):
+            self.assertRelated(self.happy, [self.glad], [self.sad])
+        self.assertEqual(
+            {w.id: (w.get_related_synonyms(), w.get_related_antonyms())
+             for w in relationship_graph.attach_related([self.glad, self.sad])},
+            {self.glad.id: ([self.happy], []), self.sad.id: ([], [self.happy])},
+        )
+
+
+class FragmentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        benchmarks.seed({'words': 12, 'users': 1, 'progress_per_user': 0})
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self):
+        """Misses of one render of every word card and flashcard"""
+        caching.reset_stats()
+        words = WordsBank.objects.select_related('word_type', 'difficulty_level').order_by('id')
+        with self.captureOnCommitCallbacks(execute=True):
+            render_word_cards(words)
+            serialize_cards(words)
+        stats = caching.cache_stats()
+        return stats['word_card']['misses'], stats['flashcard']['misses']
+
+    def test_saving_a_word_only_rebuilds_its_own_cards(self):
+        self.assertEqual(self.render(), (12, 12))
+        self.assertEqual(self.render(), (0, 0))
+        word = WordsBank.objects.order_by('id').first()
+        word.meaning_english = 'Edited'
+        with self.captureOnCommitCallbacks(execute=True):
+            word.save()
+        self.assertEqual(self.render(), (1, 1))
+
+    def test_renaming_a_related_word_rebuilds_the_cards_that_show_it(self):
+        WordRelationship.objects.all().delete()
+        happy, glad, lonely = WordsBank.objects.order_by('id')[:3]
+        with self.captureOnCommitCallbacks(execute=True):
+            WordRelationship.objects.create(word1=happy, word2=glad, relationship_type='synonym')
+        card = lambda: render_word_cards(WordsBank.objects.select_related('word_type', 'difficulty_level').filter(id=happy.id))[0]
+        self.assertIn(glad.word, card())
+
+        glad = WordsBank.objects.get(id=glad.id)
+        glad.word = 'cheerful-renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            glad.save()
+        self.assertIn('cheerful-renamed', card())
+
+        # Renaming a word without relationships leaves the other cards cached
+        self.render()
+        lonely = WordsBank.objects.get(id=lonely.id)
+        lonely.word = 'lonely-renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            lonely.save()
+        self.assertEqual(self.render(), (1, 1))
+
+    def test_renaming_a_word_type_rebuilds_the_cards_that_show_it(self):
+        self.render()
+        word_type = WordsBank.objects.order_by('id').first().word_type
+        with self.captureOnCommitCallbacks(execute=True):
+            WordType.objects.filter(id=word_type.id).update(word_type='renamed')
+        shown = WordsBank.objects.filter(word_type=word_type).count()
+        self.assertEqual(self.render(), (shown, shown))
+
+
+class CacheVersionTests(SimpleTestCase):
+    def test_per_process_cache_is_flagged_outside_debug(self):
+        with override_settings(DEBUG=False):
+            self.assertEqual([w.id for w in caching.check_shared_versions()], ['vocabulary.W001'])
+        with override_settings(DEBUG=True):
+            self.assertEqual(caching.check_shared_versions(), [])
+
+
+class KeysetPaginationTests(TestCase):
+    ordering = ['-created_at', '-id']
+
+    @classmethod
+    def setUpTestData(cls):
+        noun = WordType.objects.create(word_type='noun')
+        start = timezone.now().replace(microsecond=123456)
+        # Groups of four words share a created_at, so pages end inside runs of equal keys
+        WordsBank.objects.bulk_create([
+            WordsBank(word=f'paged{i:02}', word_type=noun, created_at=start - timedelta(seconds=i // 4),
+                      meaning_english='m', meaning_urdu='m', example_sentence='e')
+            for i in range(23)
+        ])
+        cls.expected = list(WordsBank.objects.order_by(*cls.ordering).values_list('id', flat=True))
+
+    def walk(self, queryset, limit):
+        """Pages from the first to the last, following next cursors"""
+        pages = [paginate(queryset, self.ordering, limit=limit)]
+        while pages[-1].has_next:
+            pages.append(paginate(queryset, self.ordering, pages[-1].next_cursor, limit=limit))
+        return pages
+
+    def ids(self, page):
+        return [word.id for word in page]
+
+    def test_pages_cover_duplicate_keys_once_in_both_directions(self):
+        pages = self.walk(WordsBank.objects.all(), limit=5)
+        self.assertEqual([len(page) for page in pages], [5, 5, 5, 5, 3])
+        self.assertEqual([word_id for page in pages for word_id in self.ids(page)], self.expected)
+        self.assertEqual([page.has_previous for page in pages], [False, True, True, True, True])
+
+        # Walking back from the last page gives the same pages
+        page = pages[-1]
+        for expected in reversed(pages[:-1]):
+            page = paginate(WordsBank.objects.all(), self.ordering, page.previous_cursor, limit=5)
+            self.assertEqual(self.ids(page), self.ids(expected))
+            self.assertTrue(page.has_next)
+        self.assertFalse(page.has_previous)
+        self.assertIsNone(page.previous_cursor)
+
+    def test_a_last_page_that_ends_on_the_boundary_has_no_next(self):
+        words = WordsBank.objects.filter(id__in=self.expected[:20])
+        pages = self.walk(words, limit=5)
+        self.assertEqual([len(page) for page in pages], [5, 5, 5, 5])
+        self.assertIsNone(pages[-1].next_cursor)
+
+    @nplusone.allow_repeated_queries()
+    def test_invalid_cursors_start_from_the_first_page(self):
+        first = self.ids(paginate(WordsBank.objects.all(), self.ordering, limit=5))
+        valid = paginate(WordsBank.objects.all(), self.ordering, limit=5).next_cursor
+        for cursor in ['not base64!', 'bm90IGpzb24', encode_cursor({'a': 1}), encode_cursor(['2024-01-01T00:00:00']),
+                       encode_cursor(['yesterday', 5]), valid[:-3]]:
+            page = paginate(WordsBank.objects.all(), self.ordering, cursor, limit=5)
+            self.assertEqual(self.ids(page), first, cursor)
+            self.assertFalse(page.has_previous)
+
+        self.client.force_login(User.objects.create_user('pager', password='x'))
+        response = self.client.get(reverse('vocabulary:word_list'), {'cursor': 'not base64!', 'per_page': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['page_obj'].has_previous)
+
+
+class DeckApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        benchmarks.seed({'words': 130, 'users': 1, 'progress_per_user': 0})
+        cls.learner = User.objects.get(is_staff=False)
+        cls.word_list = WordList.objects.get(word_list_name='Benchmark - every third word')
+        cls.level = DifficultyLevel.objects.order_by('id').first()
+        cls.noun = WordType.objects.get(word_type='noun')
+
+    def setUp(self):
+        self.client.force_login(self.learner)
+
+    def get(self, **params):
+        response = self.client.get(reverse('vocabulary:deck_api'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def walk(self, limit, **params):
+        """Card ids of every page from the first to the last, following next cursors"""
+        ids, cursor = [], None
+        while True:
+            page = self.get(limit=limit, **({'cursor': cursor} if cursor else {}), **params)
+            self.assertEqual(set(page), {'cards', 'next_cursor'})
+            self.assertLessEqual(len(page['cards']), limit)
+            ids += [card['id'] for card in page['cards']]
+            cursor = page['next_cursor']
+            if cursor is None:
+                return ids
+
+    @nplusone.allow_repeated_queries()
+    def test_walks_each_filtered_deck_once_in_order(self):
+        words = WordsBank.objects.order_by('word', 'id')
+        decks = [
+            ({}, words),
+            ({'list': self.word_list.id}, words.filter(word_lists=self.word_list)),
+            ({'difficulty': self.level.id}, words.filter(difficulty_level=self.level)),
+            ({'type': self.noun.id}, words.filter(word_type=self.noun)),
+            ({'list': self.word_list.id, 'type': self.noun.id}, words.filter(word_lists=self.word_list, word_type=self.noun)),
+            # Searches come in relevance order, ties in word order
+            ({'q': 'cor'}, search_words(WordsBank.objects.all(), 'cor').order_by('search_rank', 'word', 'id')),
+        ]
+        for params, expected in decks:
+            with self.subTest(**params):
+                expected = list(expected.values_list('id', flat=True))
+                self.assertTrue(expected)
+                self.assertEqual(self.walk(7, **params), expected)
+
+        # Malformed filters are ignored rather than rejected
+        self.assertEqual(self.walk(50, list='x', difficulty='', type='-1'), list(words.values_list('id', flat=True)))
+
+    def test_limit_is_clamped_and_cards_are_serialized(self):
+        self.assertEqual(len(self.get(limit=0)['cards']), 1)
+        self.assertEqual(len(self.get(limit=1000)['cards']), 100)
+        self.assertEqual(len(self.get(limit='x')['cards']), 20)
+
+        first = WordsBank.objects.select_related('word_type', 'difficulty_level').order_by('word', 'id').first()
+        page = self.get(limit=1)
+        self.assertEqual(page['cards'], [json.loads(json.dumps(serialize_word(first)))])
+        self.assertIsInstance(page['next_cursor'], str)
+        # An unreadable cursor starts from the first page
+        self.assertEqual(self.get(limit=1, cursor='not a cursor!'), page)
+
+
+class SamplingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        benchmarks.seed({'words': 60, 'users': 3, 'progress_per_user': 0})
+        cls.learner, cls.other = User.objects.filter(is_staff=False).order_by('id')[:2]
+        cls.level = DifficultyLevel.objects.order_by('id').first()
+        # Fixed keys keep the orders compared below the same on every run
+        words = list(WordsBank.objects.order_by('id'))
+        for word, key in zip(words, random.Random(7).sample(range(len(words)), len(words))):
+            word.random_key = key / len(words)
+        WordsBank.objects.bulk_update(words, ['random_key'])
+
+    def walk(self, words, pivot, limit=7):
+        seen, cursor = [], None
+        while True:
+            rows, cursor = sampling.shuffled_page(words, pivot, cursor, limit)
+            seen += [w.id for w in rows]
+            if cursor is None:
+                return seen
+
+    @nplusone.allow_repeated_queries()
+    def test_shuffled_deck_visits_every_word_once_in_a_stable_order(self):
+        words = WordsBank.objects.filter(difficulty_level=self.level)
+        pivot = sampling.pivot(42, self.learner.id)
+        order = self.walk(words, pivot)
+        self.assertEqual(sorted(order), sorted(words.values_list('id', flat=True)))
+        self.assertEqual(self.walk(words, pivot, limit=3), order)
+        self.assertNotEqual(order, list(words.order_by('word').values_list('id', flat=True)))
+        self.assertNotEqual(self.walk(words, sampling.pivot(42, self.other.id)), order)
+
+    def test_sample(self):
+        words = WordsBank.objects.filter(difficulty_level=self.level)
+        with CaptureQueriesContext(connection) as ctx:
+            drawn = sampling.sample(words, 5)
+        self.assertEqual(len({w.id for w in drawn}), 5)
+        self.assertTrue(all(w.difficulty_level_id == self.level.id for w in drawn))
+        self.assertFalse(any('RANDOM()' in q['sql'] for q in ctx.captured_queries))
+        self.assertEqual(len(sampling.sample(words, 1000)), words.count())
+
+    def test_sample_draws_each_word_independently(self):
+        words = WordsBank.objects.all()
+        ordered = list(words.order_by('random_key', 'id').values_list('id', flat=True))
+        rank = {word_id: i for i, word_id in enumerate(ordered)}
+        draws = dict.fromkeys(ordered, 0)
+        windows = 0
+        with mock.patch.object(sampling, 'random', random.Random(3)), nplusone.allow_repeated_queries():
+            for _ in range(300):
+                picked = [word.id for word in sampling.sample(words, 4)]
+                self.assertEqual(len(set(picked)), 4)
+                for word_id in picked:
+                    draws[word_id] += 1
+                # A single random window would always pick 4 neighbours in key order, wrapping at the end
+                ranks = {rank[word_id] for word_id in picked}
+                windows += any(ranks == {(start + i) % len(ordered) for i in range(4)} for start in range(len(ordered)))
+        self.assertLess(windows, 15)
+        # 1200 draws over 60 words is 20 per word on average
+        self.assertGreater(min(draws.values()), 5)
+        self.assertLess(max(draws.values()), 45)
+
+    def test_shuffled_flashcards_and_deck_api(self):
+        self.client.force_login(self.learner)
+        response = self.client.get(reverse('vocabulary:flashcards'), {'shuffle': ''})
+        params = QueryDict(response.context['deck_params'])
+        seed = sampling.parse_seed(params['shuffle'])
+        self.assertEqual(response.context['bundle_url'], '')
+
+        first = response.context['first_page']
+        page = self.client.get(reverse('vocabulary:deck_api'), {'shuffle': seed}).json()
+        self.assertEqual([c['id'] for c in page['cards']], [c['id'] for c in first['cards']])
+        following = self.client.get(reverse('vocabulary:deck_api'), {'shuffle': seed, 'cursor': page['next_cursor']}).json()
+        self.assertFalse({c['id'] for c in page['cards']} & {c['id'] for c in following['cards']})
+        self.assertEqual(self.client.get(reverse('vocabulary:deck_api'), {'shuffle': 'x'}).status_code, 400)
+
+    def test_reseed(self):
+        before = dict(WordsBank.objects.values_list('id', 'random_key'))
+        self.assertEqual(sampling.reseed(chunk_size=25), len(before))
+        after = dict(WordsBank.objects.values_list('id', 'random_key'))
+        self.assertNotEqual(before, after)
+        self.assertEqual(len(set(after.values())), len(after))
+
+
+class QuizTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        benchmarks.seed({'words': 120, 'users': 1, 'progress_per_user': 0})
+        cls.user = User.objects.get(username='learner0')
+        # A synonym inside one bucket, which must never be offered as a wrong option
+        cls.word, cls.synonym = WordsBank.objects.filter(
+            word_type=WordType.objects.get(word_type='noun'),
+            difficulty_level=DifficultyLevel.objects.get(level='beginner'),
+        ).order_by('random_key')[:2]
+        pair = [cls.word, cls.synonym]
+        WordRelationship.objects.filter(Q(word1__in=pair) | Q(word2__in=pair)).delete()
+        WordRelationship.objects.create(word1=cls.word, word2=cls.synonym, relationship_type='synonym')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def pool_ids(self, word):
+        pool = DistractorPool.objects.filter(bucket=quiz.bucket_key(word.word_type_id, word.difficulty_level_id)).first()
+        return [entry[0] for entry in pool.entries] if pool else []
+
+    @nplusone.allow_repeated_queries()
+    def test_pools_hold_the_lowest_keys_of_each_bucket(self):
+        buckets = set(WordsBank.objects.values_list('word_type_id', 'difficulty_level_id'))
+        self.assertEqual(DistractorPool.objects.count(), len(buckets))
+        for pool in DistractorPool.objects.all():
+            expected = WordsBank.objects.filter(word_type_id=pool.word_type_id, difficulty_level_id=pool.difficulty_level_id)
+            expected = list(expected.order_by('random_key').values_list('id', flat=True)[:quiz.POOL_SIZE])
+            self.assertEqual([entry[0] for entry in pool.entries], expected)
+            self.assertEqual(pool.size, len(expected))
+
+    @nplusone.allow_repeated_queries()
+    def test_distractors_share_the_bucket_and_are_never_synonyms(self):
+        synonyms = {}
+        for a, b in WordRelationship.objects.filter(relationship_type='synonym').values_list('word1_id', 'word2_id'):
+            synonyms.setdefault(a, set()).add(b)
+            synonyms.setdefault(b, set()).add(a)
+        words = {w.id: w for w in WordsBank.objects.all()}
+        for kind in quiz.KINDS:
+            questions = quiz.questions(WordsBank.objects.all(), 30, kind)
+            self.assertTrue(questions)
+            for question in questions:
+                target = words[question['word_id']]
+                answer = question['options'][question['answer']]
+                texts = [option['text'] for option in question['options']]
+                self.assertEqual(len(set(texts)), len(texts))
+                if kind == quiz.MEANING:
+                    self.assertEqual(answer['word_id'], target.id)
+                else:
+                    self.assertIn(answer['word_id'], synonyms[target.id])
+                for option in question['options']:
+                    if option is answer:
+                        continue
+                    distractor = words[option['word_id']]
+                    self.assertEqual((distractor.word_type_id, distractor.difficulty_level_id),
+                                     (target.word_type_id, target.difficulty_level_id))
+                    self.assertNotIn(distractor.id, synonyms.get(target.id, set()) | synonyms.get(answer['word_id'], set()))
+                    self.assertNotIn(distractor.id, (target.id, answer['word_id']))
+
+        questions = quiz.questions(WordsBank.objects.filter(id=self.word.id), 1, quiz.SYNONYM)
+        self.assertEqual(questions[0]['options'][questions[0]['answer']]['word_id'], self.synonym.id)
+        for _ in range(10):
+            question, = quiz.questions(WordsBank.objects.filter(id=self.word.id), 1, quiz.MEANING)
+            self.assertNotIn(self.synonym.id, [option['word_id'] for option in question['options']])
+
+    def test_question_queries_do_not_grow_with_the_round(self):
+        words = WordsBank.objects.all()
+        quiz.questions(words, 1, quiz.SYNONYM)  # loads the relationship graph
+        # The draw takes a second query when it wraps around the pivot
+        for kind, queries in ((quiz.MEANING, 3), (quiz.SYNONYM, 4)):
+            for count in (1, 25):
+                with CaptureQueriesContext(connection) as ctx:
+                    quiz.questions(words, count, kind)
+                self.assertLessEqual(len(ctx.captured_queries), queries)
+
+    def test_word_changes_refresh_their_old_and_new_buckets(self):
+        word = WordsBank.objects.exclude(difficulty_level__level='advanced').order_by('random_key').first()
+        old_level = word.difficulty_level
+        word.difficulty_level = DifficultyLevel.objects.get(level='advanced')
+        word.random_key = 0
+        with self.captureOnCommitCallbacks(execute=True):
+            word.save()
+        self.assertIn(word.id, self.pool_ids(word))
+        self.assertNotIn(word.id, self.pool_ids(WordsBank(word_type=word.word_type, difficulty_level=old_level)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            WordUpserter(update_existing=True).save_batch([{
+                'word': word.word, 'word_type': word.word_type.word_type, 'difficulty_level': old_level.level,
+                'meaning_english': 'Updated in bulk', 'meaning_urdu': 'x', 'example_sentence': 'x',
+            }])
+        word.refresh_from_db()
+        self.assertEqual(word.difficulty_level, old_level)
+        self.assertIn([word.id, word.word, 'Updated in bulk'],
+                      DistractorPool.objects.get(bucket=quiz.bucket_key(word.word_type_id, old_level.id)).entries)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            word.delete()
+        self.assertFalse(any(word.id in [e[0] for e in pool.entries] for pool in DistractorPool.objects.all()))
+
+    def test_quiz_page_and_api(self):
+        response = self.client.get(reverse('vocabulary:quiz'), {'kind': 'bogus'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['first_round']['kind'], quiz.MEANING)
+        self.assertEqual(len(response.context['first_round']['questions']), 10)
+
+        level = DifficultyLevel.objects.get(level='beginner')
+        data = self.client.get(reverse('vocabulary:quiz_api'), {'kind': 'synonym', 'count': 5, 'difficulty': level.id}).json()
+        self.assertEqual(data['kind'], quiz.SYNONYM)
+        self.assertTrue(data['questions'])
+        self.assertFalse(WordsBank.objects.filter(id__in=[q['word_id'] for q in data['questions']]).exclude(difficulty_level=level).exists())
+        self.assertEqual(self.client.get(reverse('vocabulary:quiz_api'), {'kind': 'bogus'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('vocabulary:quiz_api'), {'count': 'x'}).status_code, 400)
+
+
+class BenchmarkHarnessTests(TestCase):
+    """The benchmark harness at a tiny scale; timings themselves are not asserted"""
+
+    @classmethod
+    def setUpTestData(cls):
+        benchmarks.seed({'words': 60, 'users': 3, 'progress_per_user': 20})
+
+    def test_every_url_is_benchmarked(self):
+        self.assertEqual(benchmarks.uncovered_urls(benchmarks.view_cases()), [])
+
+    def test_views_respond(self):
+        results = benchmarks.run_views(repeat=2, warmup=0)
+        for name, result in results.items():
+            self.assertLess(result['status'], 400, name)
+            self.assertEqual(result['runs'], 2)
+            self.assertGreater(result['queries'], 0, name)
+
+    def test_commands_leave_the_seeded_data(self):
+        words = WordsBank.objects.count()
+        results = benchmarks.run_commands(repeat=1, import_size=10)
+        self.assertIn('commands.create_word_relationships', results)
+        self.assertIn('commands.load_vocabulary', results)
+        self.assertEqual(WordsBank.objects.count(), words)
+
+    def test_compare(self):
+        baseline = {'views.a': {'p95_ms': 10.0, 'queries': 4}, 'views.b': {'p95_ms': 10.0, 'queries': 4}}
+        current = {
+            'views.a': {'p95_ms': 14.0, 'queries': 5},
+            'views.b': {'p95_ms': 20.0, 'queries': 4},
+            'views.new': {'p95_ms': 99.0, 'queries': 99},
+        }
+        self.assertEqual(benchmarks.compare(current, baseline), [
+            'views.a: 4 -> 5 queries',
+            'views.b: p95 10.0ms -> 20.0ms',
+        ])
+        self.assertEqual(benchmarks.compare(current, baseline, latency_tolerance=1.5, query_tolerance=1), [])
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', 'staff@example.com', 'pw', is_staff=True)
+        cls.learner = User.objects.create_user('learner', 'learner@example.com', 'pw')
+
+    def setUp(self):
+        metrics.reset()
+
+    def test_requests_are_recorded_per_view(self):
+        self.client.force_login(self.learner)
+        self.client.get(reverse('vocabulary:word_list'))
+        self.client.get(reverse('vocabulary:word_list'))
+        self.client.get('/no-such-page/')
+
+        rows = {(r['view'], r['method']): r for r in metrics.summary()}
+        word_list = rows[('vocabulary:word_list', 'GET')]
+        self.assertEqual(word_list['requests'], 2)
+        self.assertGreater(word_list['queries'], 0)
+        self.assertIn(('unresolved', 'GET'), rows)
+
+        text = metrics.render_prometheus()
+        self.assertIn('vocabulary_request_duration_seconds_count{view="vocabulary:word_list",method="GET"} 2', text)
+        self.assertIn('vocabulary_requests_total{view="unresolved",method="GET",status="4xx"} 1', text)
+
+    async def test_async_requests_count_their_queries(self):
+        await self.async_client.aforce_login(self.learner)
+        response = await self.async_client.get(reverse('vocabulary:word_list'))
+        self.assertEqual(response.status_code, 200)
+
+        rows = {(r['view'], r['method']): r for r in metrics.summary()}
+        self.assertGreater(rows[('vocabulary:word_list', 'GET')]['queries'], 0)
+
+    def test_metrics_endpoint_is_staff_only(self):
+        self.assertEqual(self.client.get(reverse('vocabulary:metrics')).status_code, 302)
+        self.client.force_login(self.learner)
+        self.assertEqual(self.client.get(reverse('vocabulary:metrics')).status_code, 302)
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('vocabulary:metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        self.assertIn(b'# TYPE vocabulary_request_duration_seconds histogram', response.content)
+
+    @override_settings(VOCABULARY_SLOW_QUERY_MS=0)
+    def test_slow_queries_are_grouped_by_sql_and_call_site(self):
+        self.client.force_login(self.staff)
+        with self.assertLogs('vocabulary.slow_queries', 'WARNING'):
+            self.client.get(reverse('vocabulary:user_management'))
+        slow = metrics.slow_queries(100)
+        self.assertTrue(slow)
+        self.assertTrue(any(e['call_site'].startswith('vocabulary/') for e in slow))
+
+    def test_non_standard_methods_share_one_label(self):
+        self.client.force_login(self.learner)
+        self.client.generic('PURGE', reverse('vocabulary:word_list'))
+        self.client.generic('X-RANDOM-1', reverse('vocabulary:word_list'))
+        methods = {r['method'] for r in metrics.summary()}
+        self.assertEqual(methods, {'other'})
+
+    def test_slow_query_totals_survive_evicted_groups(self):
+        with mock.patch.object(metrics, 'SLOW_QUERY_LIMIT', 1), self.assertLogs('vocabulary.slow_queries', 'WARNING'):
+            for sql in ['SELECT 1', 'SELECT 2 FROM t', 'SELECT 3 FROM u']:
+                metrics.record_slow_query(sql, 0.5)
+        self.assertEqual(len(metrics.slow_queries()), 1)
+        site = metrics.slow_queries()[0]['call_site']
+        self.assertIn(f'vocabulary_slow_queries_total{{call_site="{site}"}} 3', metrics.render_prometheus())
+
+    def test_normalize_sql(self):
+        self.assertEqual(
+            metrics.normalize_sql(
+                'SELECT "t"."id" FROM "t" WHERE "t"."id" IN (%s, %s, %s)\n  AND "t"."name" = \'it\'\'s\' LIMIT 21'
+            ),
+            'SELECT "t"."id" FROM "t" WHERE "t"."id" IN (...) AND "t"."name" = ? LIMIT ?',
+        )
+
+
+class NPlusOneTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        benchmarks.seed({'words': 30, 'users': 12, 'progress_per_user': 10})
+        cls.staff = User.objects.get(username=benchmarks.STAFF_USERNAME)
+
+    def test_lazy_loads_in_a_loop_raise(self):
+        with self.assertRaises(nplusone.NPlusOneError) as raised:
+            [r.word1.word for r in WordRelationship.objects.all()]
+        self.assertIn('vocabulary/tests.py', str(raised.exception))
+        self.assertIn('FROM "vocabulary_wordsbank" WHERE "vocabulary_wordsbank"."id" = ?', str(raised.exception))
+
+    def test_template_line_is_reported(self):
+        template = Template('{% for r in relationships %}\n{{ r.word2.word }}\n{% endfor %}')
+        with self.assertRaises(nplusone.NPlusOneError) as raised:
+            template.render(Context({'relationships': WordRelationship.objects.all()}))
+        self.assertIn(':2)', str(raised.exception))
+
+    def test_log_action_and_threshold(self):
+        with nplusone.detect('loop', action='log', threshold=20):
+            with nplusone.allow_repeated_queries():
+                [r.word1.word for r in WordRelationship.objects.all()]
+        with self.assertLogs('vocabulary.nplusone', 'WARNING'):
+            with nplusone.detect('loop', action='log', threshold=2):
+                [r.word1.word for r in WordRelationship.objects.all()]
+
+    def test_requests_are_scoped_separately(self):
+        self.client.force_login(self.staff)
+        for _ in range(10):
+            self.assertEqual(self.client.get(reverse('vocabulary:user_management')).status_code, 200)
+            self.assertEqual(self.client.get(reverse('vocabulary:word_relationships')).status_code, 200)
+
+    async def test_async_requests_are_scoped_separately(self):
+        await self.async_client.aforce_login(self.staff)
+        for _ in range(10):
+            response = await self.async_client.get(reverse('vocabulary:user_management'))
+            self.assertEqual(response.status_code, 200)
+        with nplusone.detect('test', threshold=0):
+            with self.assertRaises(nplusone.NPlusOneError):
+                await self.async_client.get(reverse('vocabulary:user_management'))
+
+    def test_admin_change_lists(self):
+        self.client.force_login(self.staff)
+        for model in admin.site._registry:
+            if model._meta.app_label != 'vocabulary':
+                continue
+            url = reverse(f'admin:vocabulary_{model._meta.model_name}_changelist')
+            self.assertEqual(self.client.get(url).status_code, 200, url)
+
+
+class DeckBundleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        benchmarks.seed({'words': 40, 'users': 1, 'progress_per_user': 5})
+        cls.user = User.objects.get(username='learner0')
+        cls.word_list = WordList.objects.get(word_list_name='Benchmark - every third word')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def fetch(self, key, **headers):
+        return self.client.get(reverse('vocabulary:deck_bundle', args=[key]), headers={'Accept-Encoding': 'gzip', **headers})
+
+    def test_bundle_holds_the_deck_in_word_order(self):
+        response = self.fetch(f'list-{self.word_list.id}')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        bundle = json.loads(gzip.decompress(response.content))
+        members = list(self.word_list.wordsbank_set.order_by('word', 'id').values_list('id', flat=True))
+        self.assertEqual([row[0] for row in bundle['words']], members)
+        self.assertEqual(bundle['fields'][3], 'word_type')
+        self.assertEqual(bundle['word_types'][bundle['words'][0][3]][0], WordsBank.objects.get(id=members[0]).word_type_id)
+
+    def test_revalidation_and_caching_headers(self):
+        first = self.fetch('all')
+        self.assertEqual(first['Cache-Control'], 'private, no-cache')
+        with self.assertNumQueries(3):
+            # session, user and the bundle row without its content; the fingerprint is cached
+            again = self.fetch('all', **{'If-None-Match': first['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+        etag = first['ETag'].strip('"')
+        versioned = self.client.get(reverse('vocabulary:deck_bundle', args=['all']) + f'?v={etag}',
+                                    headers={'Accept-Encoding': 'gzip'})
+        self.assertIn('immutable', versioned['Cache-Control'])
+
+        plain = self.client.get(reverse('vocabulary:deck_bundle', args=['all']))
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertNotEqual(plain['ETag'], first['ETag'])
+        self.assertEqual(len(json.loads(plain.content)['words']), WordsBank.objects.count())
+
+    def test_word_changes_rebuild_the_bundle(self):
+        key = f'list-{self.word_list.id}'
+        etag = self.fetch(key)['ETag']
+        word = self.word_list.wordsbank_set.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            word.meaning_english = 'A changed meaning'
+            word.save()
+        changed = self.fetch(key, **{'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertIn('A changed meaning', gzip.decompress(changed.content).decode())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.word_list.wordsbank_set.remove(word)
+        removed = json.loads(gzip.decompress(self.fetch(key).content))
+        self.assertNotIn(word.id, [row[0] for row in removed['words']])
+
+    def test_swapping_members_with_the_same_id_sum_rebuilds_the_bundle(self):
+        key = f'list-{self.word_list.id}'
+        WordsBank.objects.update(updated_at=timezone.now())
+        caching.bump(caching.WORDS)
+        self.fetch(key)
+        built = DeckBundle.objects.get(key=key)
+        ids = sorted(self.word_list.wordsbank_set.values_list('id', flat=True))
+        outside = set(WordsBank.objects.exclude(id__in=ids).values_list('id', flat=True))
+        # Replace members a and b by two outsiders with the same id total; count and newest stay put
+        a, b = ids[0], ids[-1]
+        c = next(i for i in sorted(outside) if a + b - i in outside and a + b - i != i)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.word_list.wordsbank_set.remove(a, b)
+            self.word_list.wordsbank_set.add(c, a + b - c)
+        rebuilt = json.loads(gzip.decompress(self.fetch(key).content))
+        self.assertIn(c, [row[0] for row in rebuilt['words']])
+        self.assertNotEqual(DeckBundle.objects.get(key=key).fingerprint, built.fingerprint)
+
+    def test_build_stale_and_flashcard_link(self):
+        lists = WordList.objects.order_by('id').values_list('id', flat=True)
+        self.assertEqual(deck_bundles.build_stale(), ['all'] + [f'list-{i}' for i in lists])
+        self.assertEqual(deck_bundles.build_stale(), [])
+        etag, _ = deck_bundles.current_version(self.word_list.id)
+        response = self.client.get(reverse('vocabulary:flashcards'), {'list': self.word_list.id})
+        self.assertTrue(response.context['bundle_url'].endswith(f'/api/decks/list-{self.word_list.id}/?v={etag}'))
+
+    def test_unknown_decks_are_404(self):
+        self.assertEqual(self.fetch('list-abc').status_code, 404)
+        self.assertEqual(self.fetch('list-999999').status_code, 404)
+
+
+class ChangeFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        benchmarks.seed({'words': 30, 'users': 1, 'progress_per_user': 5})
+        cls.user = User.objects.get(username='learner0')
+        cls.word_list = WordList.objects.get(word_list_name='Benchmark - every third word')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def sync(self, cursor, limit=changes.PAGE_SIZE):
+        """Words and deleted ids after following the feed from cursor to its end"""
+        words, deleted = {}, set()
+        while True:
+            page = self.client.get(reverse('vocabulary:changes_api'), {'since': cursor, 'limit': limit}).json()
+            for row in page['words']:
+                words[row[0]] = dict(zip(page['word_fields'], row))
+            deleted.update(page['deleted']['words'])
+            cursor = page['cursor']
+            if not page['has_more']:
+                return words, deleted, cursor
+
+    def test_full_sync_matches_the_bank(self):
+        words, deleted, cursor = self.sync(0, limit=7)
+        self.assertEqual(set(words), set(WordsBank.objects.values_list('id', flat=True)))
+        self.assertEqual(deleted, set())
+        self.assertEqual(cursor, changes.current_cursor())
+        member = self.word_list.wordsbank_set.first()
+        self.assertIn(self.word_list.id, words[member.id]['word_lists'])
+
+    def test_edits_and_deletions_since_a_cursor(self):
+        cursor = changes.current_cursor()
+        edited, removed = WordsBank.objects.order_by('id')[:2]
+        relationship_ids = set(WordRelationship.objects.filter(Q(word1=removed) | Q(word2=removed)).values_list('id', flat=True))
+        edited.meaning_english = 'Edited'
+        edited.save()
+        edited.save()
+        removed_id = removed.id
+        removed.delete()
+
+        page = changes.feed(cursor)
+        self.assertEqual([row[0] for row in page['words']], [edited.id])
+        self.assertEqual(page['words'][0][5], 'Edited')
+        self.assertEqual(page['deleted']['words'], [removed_id])
+        self.assertEqual(set(page['deleted']['relationships']), relationship_ids)
+        # Saving twice leaves one entry, and the log holds one row per object
+        self.assertEqual(ChangeLog.objects.filter(id__gt=cursor, kind=changes.WORD, object_id=edited.id).count(), 1)
+        self.assertEqual(changes.feed(page['cursor'])['words'], [])
+
+    def test_membership_and_bulk_changes(self):
+        cursor = changes.current_cursor()
+        outsider = WordsBank.objects.exclude(word_lists=self.word_list).first()
+        self.word_list.wordsbank_set.add(outsider)
+        members = set(self.word_list.wordsbank_set.values_list('id', flat=True))
+        WordUpserter().save_batch([{
+            'word': 'zzfeedword', 'word_type': 'noun', 'difficulty_level': 'beginner',
+            'meaning_english': 'A new word', 'meaning_urdu': 'x', 'example_sentence': 'x',
+        }])
+        self.word_list.delete()
+
+        words, _, _ = self.sync(cursor)
+        self.assertEqual(set(words), members | {WordsBank.objects.get(word='zzfeedword').id})
+        self.assertTrue(all(self.word_list.id not in w['word_lists'] for w in words.values()))
+
+    def test_bundles_carry_the_cursor_and_bad_cursors_are_rejected(self):
+        bundle = json.loads(gzip.decompress(deck_bundles.get_bundle().content))
+        self.assertEqual(bundle['changes_cursor'], changes.current_cursor())
+        response = self.client.get(reverse('vocabulary:changes_api'), {'since': '-1'})
+        self.assertEqual(response.status_code, 400)
+
+
+class AsyncViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        benchmarks.seed({'words': 40, 'users': 1, 'progress_per_user': 10})
+        cls.learner = User.objects.get(username='learner0')
+        cls.word_list = WordList.objects.get(word_list_name='Benchmark - every third word')
+
+    def setUp(self):
+        self.client.force_login(self.learner)
+
+    def get(self, kind, name, params):
+        """Response of the kind of views ('sync' or 'async') with an empty cache, then with the cache warm"""
+        with loadtest.read_views(kind):
+            view = resolve(reverse(f'vocabulary:{name}')).func
+            self.assertEqual(view.__module__, f'vocabulary.{"async_views" if kind == "async" else "views"}')
+            cache.clear()
+            responses = [self.client.get(reverse(f'vocabulary:{name}'), params) for _ in range(2)]
+        self.assertEqual(responses[0].status_code, responses[1].status_code)
+        return responses[0]
+
+    @nplusone.allow_repeated_queries()
+    def test_async_read_endpoints_answer_like_the_sync_ones(self):
+        second_page = self.client.get(reverse('vocabulary:deck_api'), {'limit': 5}).json()['next_cursor']
+        requests = [
+            ('deck_api', {}),
+            ('deck_api', {'list': self.word_list.id, 'limit': 5}),
+            ('deck_api', {'limit': 5, 'cursor': second_page}),
+            ('deck_api', {'q': 'cor'}),
+            ('deck_api', {'shuffle': 42, 'limit': 30}),
+            ('deck_api', {'shuffle': 'x'}),
+            ('changes_api', {'since': 0, 'limit': 25}),
+            ('changes_api', {'since': -1}),
+        ]
+        for name, params in requests:
+            with self.subTest(name, **params):
+                expected = self.get('sync', name, params)
+                response = self.get('async', name, params)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response.json(), expected.json())
+
+        expected = self.get('sync', 'dashboard', {}).context
+        context = self.get('async', 'dashboard', {}).context
+        self.assertGreater(context['learning']['words_studied'], 0)
+        for key in ['total_words', 'word_types', 'difficulty_levels', 'recent_words', 'learning', 'progress_percent']:
+            self.assertEqual(context[key], expected[key], key)
+        self.assertEqual(context['user'], self.learner)
+
+    def test_async_views_are_off_by_default(self):
+        self.assertIs(resolve(reverse('vocabulary:deck_api')).func, views.deck_api)
+
+
+class SQLiteProfileTests(SimpleTestCase):
+    # The tests open their own connections to a temporary file, never the test database
+    databases = '__all__'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        # A page cache this small makes the import below spill mid-transaction, as a large import does
+        self.connections = ConnectionHandler(database.sqlite_databases(
+            os.path.join(directory.name, 'db.sqlite3'), 'production', {'cache_size': 50},
+        ))
+        self.addCleanup(self.connections.close_all)
+        with self.connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute('CREATE TABLE word (id INTEGER PRIMARY KEY, word TEXT)')
+            cursor.executemany('INSERT INTO word (word) VALUES (%s)', [(f'w{i}',) for i in range(100)])
+
+    def count(self):
+        with self.connections[database.READ_ALIAS].cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM word')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_and_read_only_replica(self):
+        writer = self.connections[DEFAULT_DB_ALIAS].cursor()
+        reader = self.connections[database.READ_ALIAS].cursor()
+        self.assertEqual(writer.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        self.assertEqual(reader.execute('PRAGMA synchronous').fetchone()[0], 1)
+        self.assertEqual(reader.execute('PRAGMA busy_timeout').fetchone()[0], database.PRAGMAS['busy_timeout'])
+        with self.assertRaises(OperationalError):
+            reader.execute('DELETE FROM word')
+
+    @nplusone.allow_repeated_queries()
+    def test_readers_are_not_blocked_by_a_long_import(self):
+        importing = threading.Event()
+        committing = threading.Event()
+
+        def long_import():
+            writer = self.connections[DEFAULT_DB_ALIAS]
+            try:
+                with writer.cursor() as cursor:
+                    cursor.execute('BEGIN IMMEDIATE')
+                    for batch in range(20):
+                        cursor.executemany('INSERT INTO word (word) VALUES (%s)', [(f'new{batch}-{i}' * 20,) for i in range(500)])
+                        importing.set()
+                        time.sleep(0.02)
+                    committing.set()
+                    cursor.execute('COMMIT')
+            finally:
+                committing.set()
+                writer.close()
+
+        thread = threading.Thread(target=long_import)
+        thread.start()
+        importing.wait(5)
+        counts, slowest = set(), 0
+        while True:
+            started = time.perf_counter()
+            count = self.count()
+            slowest = max(slowest, time.perf_counter() - started)
+            if committing.is_set():
+                break
+            counts.add(count)
+        thread.join()
+
+        # Readers kept seeing the last committed state, without waiting for the writer's lock
+        self.assertEqual(counts, {100})
+        self.assertLess(slowest, 0.2)
+        self.assertEqual(self.count(), 100 + 20 * 500)
+
+
+@skipUnless(pipeline, 'ai_tools requirements are not installed')
+class AiPipelineTests(SimpleTestCase):
+    def start_stub(self, **options):
+        server = stub_server.start_stub_server(**options)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server, f'http://127.0.0.1:{server.server_port}/v1'
+
+    def ask(self, base_url, **options):
+        payload = {'messages': [{'role': 'user', 'content': 'Generate vocabulary data for "lucid"'}]}
+        return pipeline.post_json(f'{base_url}/chat/completions', payload, **options)
+
+    def test_rate_limited_requests_are_retried(self):
+        server, base_url = self.start_stub(fail_first=2)
+        stats = pipeline.ThroughputStats()
+        response = self.ask(base_url, stats=stats, max_retries=3)
+        self.assertEqual(json.loads(response['choices'][0]['message']['content'])['word'], 'lucid')
+        self.assertEqual(stats.retries, 2)
+        self.assertEqual(server.RequestHandlerClass.requests_seen, 3)
+
+    def test_retry_after_is_capped_at_max_delay(self):
+        server, base_url = self.start_stub(fail_first=10, retry_after='3600')
+        stats = pipeline.ThroughputStats()
+        started = time.monotonic()
+        with self.assertRaises(pipeline.RetryableError):
+            self.ask(base_url, stats=stats, max_retries=2, max_delay=0.05)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(stats.retries, 2)
+        self.assertEqual(server.RequestHandlerClass.requests_seen, 3)
+
+    def test_words_that_keep_failing_are_counted_and_skipped(self):
+        server, base_url = self.start_stub(fail_first=1)
+        generator = word_generator.VocabularyGenerator(
+            concurrency=1, requests_per_minute=0, tokens_per_minute=0, max_retries=0, base_url=base_url,
+        )
+        generator.openai_api_key = 'stub'
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'words.xlsx')
+            word_generator.pd.DataFrame({'Word': ['aberrant', 'lucid', 'terse']}).to_excel(path, index=False)
+            with redirect_stdout(io.StringIO()):
+                generated = generator.process_excel_file(path)
+        self.assertEqual((generator.stats.completed, generator.stats.failed), (2, 1))
+        # The failed word is left out rather than saved with placeholder data
+        self.assertEqual(len(generated), 2)
+        self.assertTrue(all(data['meaning_english'].startswith('stub meaning of') for data in generated))
+
+
+@skipUnless(pipeline, 'ai_tools requirements are not installed')
+class ResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1_000_000.0
+        clock = mock.patch.object(response_cache, 'time', mock.Mock(time=lambda: self.now))
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def make_cache(self, **options):
+        cache = response_cache.ResponseCache(':memory:', **options)
+        cache.EVICT_EVERY = 1
+        self.addCleanup(cache.conn.close)
+        return cache
+
+    def store(self, cache, *words):
+        for word in words:
+            cache.set('openai', 'model', 'prompt', word, {'word': word})
+            self.now += 1
+
+    def cached_words(self, cache):
+        return {word for (word,) in cache.conn.execute('SELECT word FROM responses')}
+
+    def test_entries_expire_after_the_ttl(self):
+        cache = self.make_cache(ttl_seconds=60)
+        self.store(cache, 'lucid')
+        self.now += 30
+        self.assertEqual(cache.get('openai', 'model', 'prompt', 'LUCID'), {'word': 'lucid'})
+        self.now += 60
+        self.assertIsNone(cache.get('openai', 'model', 'prompt', 'lucid'))
+        self.assertEqual(cache.get_or_fetch('openai', 'model', 'prompt', 'lucid', lambda: {'word': 'fresh'}), {'word': 'fresh'})
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+        # Expired rows are deleted at the next eviction pass
+        self.store(cache, 'terse')
+        self.now += 120
+        self.store(cache, 'aberrant')
+        self.assertEqual(self.cached_words(cache), {'aberrant'})
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = self.make_cache(max_entries=3, ttl_seconds=None)
+        self.store(cache, 'first', 'second', 'third')
+        # Reading keeps an entry: the oldest untouched one goes instead
+        self.assertIsNotNone(cache.get('openai', 'model', 'prompt', 'first'))
+        self.now += 1
+        self.store(cache, 'fourth')
+        self.assertEqual(self.cached_words(cache), {'first', 'third', 'fourth'})
+        self.store(cache, 'fifth')
+        self.assertEqual(self.cached_words(cache), {'first', 'fourth', 'fifth'})
+        self.assertEqual(cache.evictions, 2)
@@ -1,13 +1,23 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'vocabulary'
 
+# The read endpoints with an async version (see async_views.py) use it when VOCABULARY_ASYNC_VIEWS is on
+read_views = async_views if getattr(settings, 'VOCABULARY_ASYNC_VIEWS', False) else views
+
 urlpatterns = [
     path('', views.home, name='home'),
     path('words/', views.word_list, name='word_list'),
     path('flashcards/', views.flashcard_view, name='flashcards'),
-    path('dashboard/', views.dashboard, name='dashboard'),
+    path('quiz/', views.quiz_view, name='quiz'),
+    path('api/deck/', read_views.deck_api, name='deck_api'),
+    path('api/quiz/', views.quiz_api, name='quiz_api'),
+    path('api/decks/<str:key>/', views.deck_bundle, name='deck_bundle'),
+    path('api/changes/', read_views.changes_api, name='changes_api'),
+    path('api/reviews/', views.review_api, name='review_api'),
+    path('dashboard/', read_views.dashboard, name='dashboard'),
     path('admin-dashboard/', views.admin_dashboard, name='admin_dashboard'),
     path('add-word/', views.add_word, name='add_word'),
     path('edit-word/<int:word_id>/', views.edit_word, name='edit_word'),
@@ -20,4 +30,5 @@ urlpatterns = [
     path('add-word-list/', views.add_word_list, name='add_word_list'),
     path('word-relationships/', views.word_relationships, name='word_relationships'),
     path('add-relationship/', views.add_relationship, name='add_relationship'),
+    path('metrics', views.metrics_view, name='metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""
+Incremental maintenance of the per-user UserStats row.
+
+Every change to a UserProgress row is applied to its user's stats as the
+difference between the row's old and new snapshot (see
+models.stats_snapshot), so the dashboard reads one row instead of
+aggregating over everything the user has studied. "Due today" is kept as
+a histogram of due dates in the user's local timezone and summed up to
+today on read.
+
+Single saves and deletes are handled by signals; bulk paths such as
+srs.ingest_reviews call apply_changes themselves. Changes the increments
+cannot see (a word moving to another difficulty level, a user changing
+timezone, raw SQL) are corrected by `manage.py rebuild_user_stats`.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import srs
+from .models import UserProgress, UserStats, WordsBank, stats_snapshot
+
+
+def _local_day(value, tz):
+    return value.astimezone(tz).date().isoformat()
+
+
+def _add(stats, snapshot, level, tz, sign):
+    mastered, correct, incorrect, due_at = snapshot
+    stats.words_studied += sign
+    stats.words_mastered += sign * mastered
+    stats.times_correct += sign * correct
+    stats.times_incorrect += sign * incorrect
+
+    key = level or ''
+    level_counts = stats.by_difficulty.get(key, [0, 0])
+    level_counts = [level_counts[0] + sign * correct, level_counts[1] + sign * incorrect]
+    if any(level_counts):
+        stats.by_difficulty[key] = level_counts
+    else:
+        stats.by_difficulty.pop(key, None)
+
+    day = _local_day(due_at, tz)
+    count = stats.due_by_date.get(day, 0) + sign
+    if count:
+        stats.due_by_date[day] = count
+    else:
+        stats.due_by_date.pop(day, None)
+
+
+def apply_changes(user, changes, levels=None, create=True):
+    """Apply [(word_id, old_snapshot, new_snapshot)] for one user to their UserStats row.
+
+    levels maps word_id to the difficulty level name; missing entries are
+    looked up with one query. With create=False a missing stats row is left
+    alone (used for deletes, which may be part of deleting the user).
+    """
+    changes = [(word_id, old, new) for word_id, old, new in changes if old != new]
+    if not changes:
+        return None
+
+    levels = dict(levels or {})
+    missing = {word_id for word_id, _, _ in changes} - set(levels)
+    if missing:
+        levels.update(
+            WordsBank.objects.filter(id__in=missing).order_by().values_list('id', 'difficulty_level__level')
+        )
+
+    tz = srs.user_timezone(user)
+    with transaction.atomic():
+        if create:
+            UserStats.objects.get_or_create(user=user)
+        stats = UserStats.objects.select_for_update().filter(user=user).first()
+        if stats is None:
+            return None
+        for word_id, old, new in changes:
+            if old is not None:
+                _add(stats, old, levels.get(word_id), tz, -1)
+            if new is not None:
+                _add(stats, new, levels.get(word_id), tz, 1)
+        stats.save()
+    return stats
+
+
+def get_stats(user):
+    """The user's stats row, or an unsaved empty one if they have not studied yet"""
+    try:
+        return UserStats.objects.get(user=user)
+    except UserStats.DoesNotExist:
+        return UserStats(user=user)
+
+
+async def aget_stats(user):
+    """get_stats() for async views"""
+    try:
+        return await UserStats.objects.aget(user=user)
+    except UserStats.DoesNotExist:
+        return UserStats(user=user)
+
+
+def rebuild(users):
+    """Recompute stats from scratch for the given users; returns the number rebuilt"""
+    rebuilt = 0
+    for user in users:
+        tz = srs.user_timezone(user)
+        stats = UserStats(user=user)
+        rows = (
+            UserProgress.objects.filter(user=user)
+            .select_related('word__difficulty_level')
+            .only('mastery_level', 'times_correct', 'times_incorrect', 'due_at', 'word__difficulty_level__level')
+            .iterator(chunk_size=2000)
+        )
+        for progress in rows:
+            snapshot = stats_snapshot(progress)
+            if snapshot is not None:
+                level = progress.word.difficulty_level.level if progress.word.difficulty_level else None
+                _add(stats, snapshot, level, tz, 1)
+
+        with transaction.atomic():
+            UserStats.objects.filter(user=user).delete()
+            stats.save()
+        rebuilt += 1
+    return rebuilt
+
+
+def today_for(user, now=None):
+    return (now or timezone.now()).astimezone(srs.user_timezone(user)).date()
+
+
+def summarize(stats, user, now=None):
+    """Template-friendly numbers for the dashboard"""
+    return {
+        'words_studied': stats.words_studied,
+        'words_mastered': stats.words_mastered,
+        'words_learning': stats.words_learning,
+        'due_today': stats.due_count(today_for(user, now)),
+        'accuracy': stats.accuracy,
+        'accuracy_by_difficulty': stats.accuracy_by_difficulty(),
+    }
+
@@ -1,11 +1,23 @@
+import gzip
+import json
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.db.models import Q
-from django.core.paginator import Paginator
+from django.db.models import Exists, OuterRef, Q
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse
+from django.urls import reverse
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_POST
 from .models import WordsBank, WordType, DifficultyLevel, WordList, UserProfile, WordRelationship
 from .forms import WordForm
+from .pagination import count_rows, keyset_page, paginate, querystring_without
+from .fragments import render_word_cards, serialize_cards
+from .search import find_word, search_words
+from .serializers import serialize_progress
+from .srs import MAX_REVIEW_BATCH, ingest_reviews, parse_review_events
+from . import caching, changes, deck_bundles, metrics, quiz, sampling, user_stats
 
 def home(request):
     if request.user.is_authenticated:
@@ -18,13 +30,11 @@ def word_list(request):
     words = WordsBank.objects.select_related('word_type', 'difficulty_level').all()
     
     if query:
-        words = words.filter(
-            Q(word__icontains=query) |
-            Q(meaning_english__icontains=query) |
-            Q(meaning_urdu__icontains=query)
-        )
+        words = search_words(words, query)
+        ordering = ['search_rank', 'word', 'id']
+    else:
+        ordering = ['word', 'id']
     
-    words = words.order_by('word')
     per_page = request.GET.get('per_page', 10)
     try:
         per_page = int(per_page)
@@ -33,63 +43,260 @@ def word_list(request):
     except (ValueError, TypeError):
         per_page = 10
     
-    paginator = Paginator(words, per_page)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    total_words, estimated = count_rows(words, 'word_count', (caching.WORDS,), query.lower(), filtered=bool(query))
+    page_obj = paginate(words, ordering, request.GET.get('cursor'), per_page, total_words, estimated)
     
     return render(request, 'vocabulary/word_list.html', {
         'page_obj': page_obj,
+        'cards': render_word_cards(page_obj.object_list),
         'query': query,
-        'total_words': words.count(),
-        'per_page': per_page
+        'total_words': total_words,
+        'per_page': per_page,
+        'page_params': querystring_without(request.GET, 'cursor', 'page'),
     })
 
+DECK_PAGE_SIZE = 20
+DECK_MAX_PAGE_SIZE = 100
+
+def _deck_queryset(params):
+    """Words matching the deck filters in params, with the keyset ordering to page them by"""
+    words = WordsBank.objects.select_related('word_type', 'difficulty_level').all()
+    
+    word_list_id = params.get('list')
+    difficulty_id = params.get('difficulty')
+    word_type_id = params.get('type')
+    if word_list_id and word_list_id.isdigit():
+        # A correlated EXISTS keeps the walk in word order; a join or IN would sort the whole list first
+        words = words.filter(Exists(WordsBank.word_lists.through.objects.filter(
+            wordlist_id=word_list_id, wordsbank_id=OuterRef('pk'),
+        )))
+    if difficulty_id and difficulty_id.isdigit():
+        words = words.filter(difficulty_level_id=difficulty_id)
+    if word_type_id and word_type_id.isdigit():
+        words = words.filter(word_type_id=word_type_id)
+    
+    query = params.get('q', '')
+    if query:
+        return search_words(words, query), ['search_rank', 'word', 'id']
+    return words, ['word', 'id']
+
+def _shuffle_pivot(params, user):
+    """Start of the user's shuffled deck for the seed in params['shuffle'], or None; ValueError if malformed"""
+    seed = params.get('shuffle')
+    return sampling.pivot(sampling.parse_seed(seed), user.id) if seed else None
+
+def _deck_page(params, cursor=None, limit=DECK_PAGE_SIZE, pivot=None):
+    words, ordering = _deck_queryset(params)
+    if pivot is not None:
+        rows, next_cursor = sampling.shuffled_page(words, pivot, cursor, limit)
+    else:
+        rows, next_cursor = keyset_page(words, ordering, cursor, limit)
+    return {'cards': serialize_cards(rows), 'next_cursor': next_cursor}
+
+def _bundle_url(params):
+    """URL of the deck bundle the flashcard page can use for params, or '' to page from deck_api"""
+    word_list_id = params.get('list')
+    # Bundles hold the deck in word order; shuffled decks are paged
+    if params.get('q') or params.get('shuffle') or (word_list_id and not word_list_id.isdigit()):
+        return ''
+    word_list_id = int(word_list_id) if word_list_id else None
+    etag, word_count = deck_bundles.current_version(word_list_id)
+    if not word_count or word_count > deck_bundles.MAX_WORDS:
+        return ''
+    url = reverse('vocabulary:deck_bundle', args=[deck_bundles.key_for(word_list_id)])
+    # A versioned URL may be cached for good; without one the browser revalidates
+    return f'{url}?v={etag}' if etag else url
+
 @login_required
 def flashcard_view(request):
     query = request.GET.get('q', '')
-    words = WordsBank.objects.select_related('word_type', 'difficulty_level').all()
+    params = request.GET.copy()
+    if 'shuffle' in params:
+        # A new shuffled session gets its seed here, so the windows fetched later continue the same order
+        try:
+            sampling.parse_seed(params['shuffle'])
+        except ValueError:
+            params['shuffle'] = str(sampling.new_seed())
+    words, _ = _deck_queryset(params)
     
-    if query:
-        words = words.filter(
-            Q(word__icontains=query) |
-            Q(meaning_english__icontains=query) |
-            Q(meaning_urdu__icontains=query)
-        )
+    # Only the first window of cards is rendered; the page then loads the whole
+    # deck bundle, or fetches further windows from deck_api when there is none
+    return render(request, 'vocabulary/flashcard.html', {
+        'first_page': _deck_page(params, pivot=_shuffle_pivot(params, request.user)),
+        'total_cards': words.count(),
+        'query': query,
+        'deck_params': params.urlencode(),
+        'bundle_url': _bundle_url(params),
+    })
+
+def _deck_limit(params):
+    try:
+        return min(max(int(params.get('limit', DECK_PAGE_SIZE)), 1), DECK_MAX_PAGE_SIZE)
+    except (ValueError, TypeError):
+        return DECK_PAGE_SIZE
+
+SHUFFLE_ERROR = 'shuffle must be a non-negative integer seed'
+
+@login_required
+def deck_api(request):
+    try:
+        pivot = _shuffle_pivot(request.GET, request.user)
+    except ValueError:
+        return JsonResponse({'error': SHUFFLE_ERROR}, status=400)
+    return JsonResponse(_deck_page(request.GET, request.GET.get('cursor'), _deck_limit(request.GET), pivot))
+
+QUIZ_LENGTH = 10
+QUIZ_MAX_LENGTH = 50
+
+def _quiz_round(params):
+    """Questions for the deck filters in params; ValueError if kind or count is malformed"""
+    kind = params.get('kind') or quiz.MEANING
+    if kind not in quiz.KINDS:
+        raise ValueError(kind)
+    count = min(max(int(params.get('count', QUIZ_LENGTH)), 1), QUIZ_MAX_LENGTH)
+    words, _ = _deck_queryset(params)
+    return {'kind': kind, 'questions': quiz.questions(words, count, kind)}
+
+@login_required
+def quiz_view(request):
+    params = request.GET.copy()
+    try:
+        first_round = _quiz_round(params)
+    except ValueError:
+        # A malformed link starts a default quiz on the same words
+        params.pop('kind', None)
+        params.pop('count', None)
+        first_round = _quiz_round(params)
+    params['kind'] = first_round['kind']
     
-    words = words.order_by('word')
-    return render(request, 'vocabulary/flashcard.html', {'words': words, 'query': query})
+    # The first round is rendered; later rounds come from quiz_api with the same filters
+    return render(request, 'vocabulary/quiz.html', {
+        'first_round': first_round,
+        'kinds': quiz.KINDS,
+        'quiz_params': params.urlencode(),
+    })
 
 @login_required
-def dashboard(request):
-    total_words = WordsBank.objects.count()
-    word_types = WordType.objects.all()
-    difficulty_levels = DifficultyLevel.objects.all()
-    recent_words = WordsBank.objects.order_by('-created_at')[:5]
+def quiz_api(request):
+    try:
+        quiz_round = _quiz_round(request.GET)
+    except ValueError:
+        return JsonResponse({'error': f'kind must be one of {", ".join(quiz.KINDS)} and count a positive integer'}, status=400)
+    return JsonResponse(quiz_round, json_dumps_params={'ensure_ascii': False})
+
+@login_required
+def deck_bundle(request, key):
+    try:
+        word_list_id = deck_bundles.parse_key(key)
+    except ValueError:
+        raise Http404('No such deck')
+    if word_list_id and not WordList.objects.filter(id=word_list_id).exists():
+        raise Http404('No such deck')
     
-    context = {
+    bundle = deck_bundles.get_bundle(word_list_id)
+    gzipped = 'gzip' in request.headers.get('Accept-Encoding', '')
+    # Each encoding is its own representation with its own strong ETag
+    etag = f'"{bundle.etag}"' if gzipped else f'"{bundle.etag}-identity"'
+    if request.GET.get('v') == bundle.etag:
+        cache_control = 'private, max-age=31536000, immutable'
+    else:
+        cache_control = 'private, no-cache'
+    
+    if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+    if etag in if_none_match or '*' in if_none_match:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(bundle.content if gzipped else gzip.decompress(bundle.content), content_type='application/json')
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    response['Vary'] = 'Accept-Encoding'
+    return response
+
+def _changes_params(params):
+    """(cursor, limit) for the change feed; ValueError if malformed"""
+    cursor = changes.parse_cursor(params.get('since'))
+    limit = min(max(int(params.get('limit', changes.PAGE_SIZE)), 1), changes.MAX_PAGE_SIZE)
+    return cursor, limit
+
+CHANGES_ERROR = 'since and limit must be non-negative integers'
+
+@login_required
+def changes_api(request):
+    try:
+        cursor, limit = _changes_params(request.GET)
+    except ValueError:
+        return JsonResponse({'error': CHANGES_ERROR}, status=400)
+    
+    return JsonResponse(changes.feed(cursor, limit), json_dumps_params={'ensure_ascii': False})
+
+@login_required
+@require_POST
+def review_api(request):
+    try:
+        items = json.loads(request.body)['reviews']
+        if not isinstance(items, list):
+            raise TypeError
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Expected a JSON body like {"reviews": [...]}'}, status=400)
+    if len(items) > MAX_REVIEW_BATCH:
+        return JsonResponse({'error': f'At most {MAX_REVIEW_BATCH} reviews per request'}, status=400)
+    
+    events, rejected = parse_review_events(items)
+    known_ids = set(WordsBank.objects.filter(id__in={e[0] for e in events}).values_list('id', flat=True))
+    rejected += [i for i, item in enumerate(items) if i not in rejected and int(item['word_id']) not in known_ids]
+    events = [e for e in events if e[0] in known_ids]
+    
+    progress = ingest_reviews(request.user, events)
+    return JsonResponse({
+        'accepted': len(events),
+        'rejected': sorted(rejected),
+        'progress': [serialize_progress(p) for p in progress],
+    })
+
+def _dashboard_context(total_words, word_types, difficulty_levels, recent_words, learning):
+    return {
         'total_words': total_words,
         'word_types': word_types,
         'difficulty_levels': difficulty_levels,
         'recent_words': recent_words,
+        'learning': learning,
+        'words_learned': learning['words_mastered'],
+        'progress_percent': round(learning['words_studied'] * 100 / total_words) if total_words else 0,
     }
-    return render(request, 'vocabulary/dashboard.html', context)
+
+@login_required
+def dashboard(request):
+    # One row maintained incrementally, however many words the user has studied
+    learning = user_stats.summarize(user_stats.get_stats(request.user), request.user)
+    return render(request, 'vocabulary/dashboard.html', _dashboard_context(
+        caching.total_words(), caching.word_types(), caching.difficulty_levels(), caching.recent_words(), learning,
+    ))
 
 @user_passes_test(lambda u: u.is_staff)
 def admin_dashboard(request):
-    total_words = WordsBank.objects.count()
-    word_types = WordType.objects.all()
-    difficulty_levels = DifficultyLevel.objects.all()
-    word_lists = WordList.objects.all()
-    recent_words = WordsBank.objects.order_by('-created_at')[:5]
+    total_words = caching.total_words()
+    word_types = caching.word_types()
+    difficulty_levels = caching.difficulty_levels()
+    word_lists = caching.word_lists()
+    recent_words = caching.recent_words()
     
     return render(request, 'vocabulary/admin_dashboard.html', {
         'total_words': total_words,
         'word_types': word_types,
         'difficulty_levels': difficulty_levels,
         'word_lists': word_lists,
-        'recent_words': recent_words
+        'recent_words': recent_words,
+        'cache_stats': caching.cache_stats(),
+        'view_metrics': metrics.summary()[:10],
+        'slow_queries': metrics.slow_queries(5),
     })
 
+@user_passes_test(lambda u: u.is_staff)
+def metrics_view(request):
+    return HttpResponse(metrics.render_prometheus(), content_type=metrics.CONTENT_TYPE)
+
 @user_passes_test(lambda u: u.is_staff)
 def add_word(request):
     if request.method == 'POST':
@@ -101,9 +308,7 @@ def add_word(request):
     else:
         form = WordForm()
     
-    word_types = WordType.objects.all().order_by('word_type')
-    difficulty_levels = DifficultyLevel.objects.all().order_by('level')
-    word_lists = WordList.objects.all().order_by('word_list_name')
+    word_types, difficulty_levels, word_lists = caching.categories_with_counts()
     
     return render(request, 'vocabulary/add_word.html', {
         'form': form,
@@ -130,7 +335,7 @@ def edit_word(request, word_id):
 @user_passes_test(lambda u: u.is_staff)
 def user_management(request):
     query = request.GET.get('q', '')
-    users = User.objects.select_related().all()
+    users = User.objects.select_related('userprofile').all()
     
     if query:
         users = users.filter(
@@ -139,15 +344,14 @@ def user_management(request):
             Q(last_name__icontains=query)
         )
     
-    users = users.order_by('-date_joined')
-    paginator = Paginator(users, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    total_users, estimated = count_rows(users, 'user_count', (caching.USERS,), query.lower(), filtered=bool(query))
+    page_obj = paginate(users, ['-date_joined', '-id'], request.GET.get('cursor'), 20, total_users, estimated)
     
     return render(request, 'vocabulary/user_management.html', {
         'page_obj': page_obj,
         'query': query,
-        'total_users': users.count()
+        'total_users': total_users,
+        'page_params': querystring_without(request.GET, 'cursor', 'page'),
     })
 
 @user_passes_test(lambda u: u.is_staff)
@@ -182,9 +386,7 @@ def toggle_user_status(request, user_id):
 
 @user_passes_test(lambda u: u.is_staff)
 def manage_categories(request):
-    word_types = WordType.objects.all().order_by('word_type')
-    difficulty_levels = DifficultyLevel.objects.all().order_by('level')
-    word_lists = WordList.objects.all().order_by('word_list_name')
+    word_types, difficulty_levels, word_lists = caching.categories_with_counts()
     
     return render(request, 'vocabulary/manage_categories.html', {
         'word_types': word_types,
@@ -223,14 +425,14 @@ def add_word_list(request):
 
 @user_passes_test(lambda u: u.is_staff)
 def word_relationships(request):
-    relationships = WordRelationship.objects.select_related('word1', 'word2').all().order_by('-created_at')
-    paginator = Paginator(relationships, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    relationships = WordRelationship.objects.select_related('word1__word_type', 'word2__word_type').all()
+    total_relationships, estimated = count_rows(relationships, 'relationship_count', (caching.RELATIONSHIPS,))
+    page_obj = paginate(relationships, ['-created_at', '-id'], request.GET.get('cursor'), 20, total_relationships, estimated)
     
     return render(request, 'vocabulary/word_relationships.html', {
         'page_obj': page_obj,
-        'total_relationships': relationships.count()
+        'total_relationships': total_relationships,
+        'page_params': querystring_without(request.GET, 'cursor', 'page'),
     })
 
 @user_passes_test(lambda u: u.is_staff)
@@ -240,10 +442,13 @@ def add_relationship(request):
         word2_id = request.POST.get('word2')
         relationship_type = request.POST.get('relationship_type')
         
-        if word1_id and word2_id and relationship_type:
+        if relationship_type:
             try:
-                word1 = WordsBank.objects.get(id=word1_id)
-                word2 = WordsBank.objects.get(id=word2_id)
+                # The form sends ids when a suggestion was picked, otherwise the typed words
+                word1 = WordsBank.objects.get(id=word1_id) if word1_id else find_word(request.POST.get('word1_text'))
+                word2 = WordsBank.objects.get(id=word2_id) if word2_id else find_word(request.POST.get('word2_text'))
+                if word1 is None or word2 is None:
+                    raise WordsBank.DoesNotExist
                 
                 if relationship_type == 'synonym':
                     word1.add_synonym(word2)